@@ -0,0 +1,253 @@
+"""
+수신(ingest)과 조회를 섞은 부하 측정
+
+사용법:
+    python bench/bench_mixed.py [--dir DB디렉토리] [--duration 30] [--ingest-threads 2] [--ingest-rate 0]
+                                [--readers 4] [--mix 'api/data20:5,data30k:1,...'] [--cache-bust]
+                                [--url http://127.0.0.1:80]
+
+- 기본: 프로세스 안에서 Flask 테스트 클라이언트로 실행 (스레드마다 클라이언트 하나)
+  --dir 을 주면 build_db.py 로 만든 DB 를 복사하지 않고 그대로 사용하고, 없으면 빈 임시 DB 를 만든다.
+  db_lock 을 측정용 래퍼로 바꿔 락 대기/보유 시간을 함께 잰다.
+- --url: 실행 중인 서버(gunicorn 다중 워커 등)에 HTTP 로 요청 (락 측정은 제외)
+
+수신 스레드는 payloads.make_uplink() 로 만든 이벤트를 /uplink 로 보내고 (--ingest-rate 는
+스레드당 초당 요청 수, 0 이면 최대 속도), 조회 스레드는 --mix 가중치에 따라 경로를 고른다.
+결과(경로별 처리량, p50/p95/p99 지연, 오류 수, 저장된 행 수, 락 대기 시간)를 JSON 한 줄로 출력한다.
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+from payloads import make_uplink
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = 'api/data20:5,api/stats:5,api/records:3,api/devices:2,data20:2,data30k:1,download/all:0'
+USERNAME, PASSWORD = 'admin', 'admin015'
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+def summarize(durations, errors, elapsed):
+    ms = [d * 1000 for d in durations]
+    return {
+        'count': len(ms),
+        'errors': errors,
+        'per_sec': round(len(ms) / elapsed, 1),
+        'mean_ms': round(sum(ms) / len(ms), 2) if ms else None,
+        'p50_ms': round(percentile(ms, 0.50), 2) if ms else None,
+        'p95_ms': round(percentile(ms, 0.95), 2) if ms else None,
+        'p99_ms': round(percentile(ms, 0.99), 2) if ms else None
+    }
+
+
+class TimedLock:
+    """db_lock 대신 넣는 측정용 락 (대기 시간과 보유 시간 기록)"""
+
+    def __init__(self, lock):
+        self._lock = lock
+        self.waits = []
+        self.hold_total = 0.0
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._acquired_at = time.perf_counter()
+            self.waits.append(self._acquired_at - start)
+        return acquired
+
+    def release(self):
+        self.hold_total += time.perf_counter() - self._acquired_at
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class LocalTarget:
+    """Flask 테스트 클라이언트 (스레드마다 하나)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+
+    def get(self, path):
+        response = self.client.get(path)
+        response.get_data()
+        return response.status_code
+
+    def post_json(self, path, body):
+        return self.client.post(path, data=body, content_type='application/json').status_code
+
+
+class HttpTarget:
+    """실행 중인 서버에 keep-alive HTTP 연결 (스레드마다 하나)"""
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        self.headers = {}
+        self.conn.request('POST', '/login', body=urllib.parse.urlencode(
+            {'username': USERNAME, 'password': PASSWORD}),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        response = self.conn.getresponse()
+        response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.headers['Cookie'] = cookie.split(';', 1)[0]
+
+    def _request(self, method, path, body=None, headers=None):
+        self.conn.request(method, path, body=body, headers=dict(self.headers, **(headers or {})))
+        response = self.conn.getresponse()
+        response.read()
+        return response.status
+
+    def get(self, path):
+        return self._request('GET', path)
+
+    def post_json(self, path, body):
+        return self._request('POST', path, body, {'Content-Type': 'application/json'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dir', help='DB 디렉토리 (build_db.py 결과, 없으면 빈 임시 DB)')
+    parser.add_argument('--url', help='실행 중인 서버 주소 (지정하면 HTTP 로 측정)')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--ingest-threads', type=int, default=2)
+    parser.add_argument('--ingest-rate', type=float, default=0, help='스레드당 초당 uplink 수 (0: 최대)')
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='경로:가중치 목록 (쉼표 구분)')
+    parser.add_argument('--cache-bust', action='store_true', help='조회마다 쿼리를 바꿔 응답 캐시를 우회')
+    args = parser.parse_args()
+
+    mix = []
+    for item in args.mix.split(','):
+        path, _, weight = item.rpartition(':')
+        if float(weight) > 0:
+            mix.append(('/' + path.lstrip('/'), float(weight)))
+
+    timed_lock = None
+    ds = None
+    if args.url:
+        make_target = lambda: HttpTarget(args.url)
+    else:
+        workdir = args.dir or tempfile.mkdtemp(prefix='bench-mixed-')
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_DIR)
+        with contextlib.redirect_stdout(open(os.path.join(tempfile.gettempdir(), 'bench-mixed-stdout.log'), 'w')):
+            import dataServer as ds
+        timed_lock = ds.db_lock = TimedLock(ds.db_lock)
+        make_target = lambda: LocalTarget(ds.app)
+        stats_before = ds.get_statistics().get('total_count', 0)
+
+    results = {path: ([], [0]) for path, _ in mix}
+    results['/uplink'] = ([], [0])
+    stop = threading.Event()
+    counter = iter(range(10 ** 12))
+    counter_lock = threading.Lock()
+    start_at = datetime.now()
+
+    def ingest_worker(seed):
+        target = make_target()
+        rng = random.Random(seed)
+        durations, errors = results['/uplink']
+        interval = 1 / args.ingest_rate if args.ingest_rate else 0
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            with counter_lock:
+                i = next(counter)
+            body = json.dumps(make_uplink(i, args.devices, start_at, 0.001, rng))
+            start = time.perf_counter()
+            status = target.post_json('/uplink?event=up', body)
+            durations.append(time.perf_counter() - start)
+            if status != 200:
+                errors[0] += 1
+            if interval:
+                next_at += interval
+                time.sleep(max(0, next_at - time.perf_counter()))
+
+    def read_worker(seed):
+        target = make_target()
+        rng = random.Random(seed)
+        paths = [path for path, _ in mix]
+        weights = [weight for _, weight in mix]
+        n = 0
+        while not stop.is_set():
+            path = rng.choices(paths, weights)[0]
+            url = path
+            if args.cache_bust:
+                n += 1
+                url += ('&' if '?' in path else '?') + f'_bench={seed}-{n}'
+            start = time.perf_counter()
+            status = target.get(url)
+            durations, errors = results[path]
+            durations.append(time.perf_counter() - start)
+            if status != 200:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=ingest_worker, args=(n,), daemon=True)
+               for n in range(args.ingest_threads)]
+    threads += [threading.Thread(target=read_worker, args=(1000 + n,), daemon=True)
+                for n in range(args.readers if mix else 0)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'mode': 'http' if args.url else 'local',
+        'duration_s': round(elapsed, 1),
+        'ingest_threads': args.ingest_threads,
+        'readers': args.readers,
+        'routes': {path: summarize(durations, errors[0], elapsed)
+                   for path, (durations, errors) in results.items() if durations or errors[0]}
+    }
+
+    if ds is not None:
+        ds.flush_ingest_queue()
+        drained = time.perf_counter() - started
+        stored = ds.get_statistics().get('total_count', 0) - stats_before
+        result['stored_rows'] = stored
+        result['stored_rows_per_sec'] = round(stored / drained, 1)
+        waits = [w * 1000 for w in timed_lock.waits]
+        result['db_lock'] = {
+            'acquisitions': len(waits),
+            'wait_total_ms': round(sum(waits), 1),
+            'wait_p50_ms': round(percentile(waits, 0.50), 3) if waits else None,
+            'wait_p99_ms': round(percentile(waits, 0.99), 3) if waits else None,
+            'wait_max_ms': round(max(waits), 3) if waits else None,
+            'hold_total_ms': round(timed_lock.hold_total * 1000, 1),
+            'hold_fraction': round(timed_lock.hold_total / drained, 3)
+        }
+
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
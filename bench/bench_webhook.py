@@ -0,0 +1,80 @@
+"""
+/uplink Webhook 요청당 처리 비용 측정
+
+사용법:
+    python bench/bench_webhook.py [-n 요청수] [--devices N]
+
+임시 디렉토리에 빈 DB 를 만들고 Flask 테스트 클라이언트로 ChirpStack uplink
+이벤트를 보내 요청당 소요 시간(평균, p50, p95, p99)을 JSON 으로 출력한다.
+서버 stdout 출력은 gunicorn capture_output 처럼 파일로 보낸다.
+변경 전후 비교는 각 커밋에서 같은 옵션으로 실행한 결과를 비교한다.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_payload(i, devices):
+    dev = i % devices
+    return {
+        'deviceInfo': {'deviceName': f'sensor-{dev:05d}', 'devEui': f'{dev:016x}'},
+        'rxInfo': [{'rssi': -70 - i % 40, 'snr': 7.5 - i % 15}],
+        'object': {'temperature': 20 + i % 10},
+        'fPort': 2,
+        'fCnt': i // devices
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=5000)
+    parser.add_argument('--devices', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-webhook-')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+
+    stdout_sink = open(os.path.join(workdir, 'stdout.log'), 'w')
+    with contextlib.redirect_stdout(stdout_sink):
+        import dataServer
+        client = dataServer.app.test_client()
+        bodies = [json.dumps(make_payload(i, args.devices)) for i in range(args.requests)]
+
+        durations = []
+        for body in bodies:
+            start = time.perf_counter()
+            response = client.post('/uplink?event=up', data=body, content_type='application/json')
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.data
+
+        flush = getattr(dataServer, 'flush_ingest_queue', None)
+        if flush:
+            flush()
+
+    result = {
+        'requests': args.requests,
+        'mean_us': round(statistics.mean(durations) * 1e6, 1),
+        'p50_us': round(percentile(durations, 0.50) * 1e6, 1),
+        'p95_us': round(percentile(durations, 0.95) * 1e6, 1),
+        'p99_us': round(percentile(durations, 0.99) * 1e6, 1),
+        'requests_per_sec': round(len(durations) / sum(durations), 1)
+    }
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
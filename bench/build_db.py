@@ -0,0 +1,163 @@
+"""
+벤치마크용 대용량 합성 DB 생성
+
+사용법:
+    python bench/build_db.py DIR [--rows 1000000] [--devices 1000] [--days 365] [--schema 2]
+                             [--partition] [--no-rollups]
+
+DIR 에 dataServer 와 같은 이름(seoultel015.db)의 DB 를 만든다. 테이블은 dataServer 가
+직접 만들고(init_database), 행은 재귀 CTE 로 SQLite 안에서 생성하므로 Python 루프가 없다.
+(1M 행 수 초, 50M 행 수 분 수준)
+
+- 디바이스 devices 개가 days 일 동안 고르게 보낸 uplink (마지막 행이 현재 시각)
+- 디바이스마다 기본 온도/rssi/snr 이 다르고 행마다 작은 잡음이 들어감
+- --schema 1: 기존 텍스트 스키마 (v1) 로 생성 (이전 커밋과 비교하거나 migrate-schema 측정용)
+- 생성 후 통계/롤업을 dataServer 함수로 재계산하고, --partition 이면 월별 파티션으로 정리
+
+결과(행 수, 소요 시간, DB 크기)를 JSON 한 줄로 출력한다.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_ROWS = 1000000
+
+# 값 식: i = 행 번호(0부터), dev = i % devices
+VALUE_SQL = '''
+    (dev * 37) % 35 - 5 + abs(random()) % 5 - 2,
+    -60 - (dev * 13) % 55 - abs(random()) % 6,
+    round((dev * 7) % 18 - 8 + (abs(random()) % 20) / 10.0, 1),
+    2,
+    i / :devices
+'''
+
+V2_INSERT = f'''
+    WITH RECURSIVE seq(i) AS (SELECT :first UNION ALL SELECT i + 1 FROM seq WHERE i < :last),
+    rows AS (SELECT i, i % :devices AS dev FROM seq)
+    INSERT INTO lorawan_data_v2 (id, ts, device_id, temperature, rssi, snr, f_port, f_cnt)
+    SELECT i + 1, :start_us + i * :step_us, dev + 1, {VALUE_SQL}
+    FROM rows
+'''
+
+V1_INSERT = f'''
+    WITH RECURSIVE seq(i) AS (SELECT :first UNION ALL SELECT i + 1 FROM seq WHERE i < :last),
+    rows AS (SELECT i, i % :devices AS dev, :start_us + i * :step_us AS ts FROM seq)
+    INSERT INTO lorawan_data
+    (id, timestamp, device_name, dev_eui, temperature, rssi, snr, f_port, f_cnt, created_at)
+    SELECT
+        i + 1,
+        strftime('%Y-%m-%dT%H:%M:%S', ts / 1000000, 'unixepoch')
+            || CASE WHEN ts % 1000000 THEN printf('.%06d', ts % 1000000) ELSE '' END,
+        printf('sensor-%05d', dev),
+        printf('a84041%010x', dev),
+        {VALUE_SQL},
+        strftime('%Y-%m-%d %H:%M:%S', ts / 1000000, 'unixepoch')
+    FROM rows
+'''
+
+# v1 DB 는 테이블이 미리 있으면 dataServer 가 v1 로 인식한다 (init_database 참고)
+V1_TABLE = '''
+    CREATE TABLE lorawan_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        device_name TEXT NOT NULL,
+        dev_eui TEXT NOT NULL,
+        temperature REAL,
+        rssi INTEGER,
+        snr REAL,
+        f_port INTEGER,
+        f_cnt INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('dir', help='DB 를 만들 디렉토리 (없으면 생성)')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--schema', type=int, choices=(1, 2), default=2)
+    parser.add_argument('--partition', action='store_true', help='생성 후 월별 파티션으로 정리')
+    parser.add_argument('--no-rollups', action='store_true', help='롤업 재계산 생략 (대용량에서 시간 절약)')
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    os.chdir(args.dir)
+    sys.path.insert(0, REPO_DIR)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        import sqlite3
+        from importlib import import_module
+        if os.path.exists('seoultel015.db'):
+            sys.exit(f'이미 DB 가 있습니다: {os.path.abspath("seoultel015.db")}')
+        if args.schema == 1:
+            conn = sqlite3.connect('seoultel015.db')
+            conn.execute(V1_TABLE)
+            conn.close()
+        ds = import_module('dataServer')
+        if ds.SCHEMA_VERSION != args.schema:
+            sys.exit(f'스키마 버전 불일치: {ds.SCHEMA_VERSION}')
+
+    started = time.monotonic()
+    end = datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=args.days)
+    step_us = max(1, int(args.days * 86400 * 1000000 / args.rows))
+    start_us = ds._iso_to_micros(end.isoformat()) - step_us * (args.rows - 1)
+
+    with ds.db_lock:
+        conn = ds.get_write_connection()
+        if args.schema == 2:
+            conn.executemany(
+                'INSERT INTO devices (id, dev_eui, device_name) VALUES (?, ?, ?)',
+                [(dev + 1, f'a84041{dev:010x}', f'sensor-{dev:05d}') for dev in range(args.devices)]
+            )
+        insert_sql = V2_INSERT if args.schema == 2 else V1_INSERT
+        for first in range(0, args.rows, CHUNK_ROWS):
+            last = min(first + CHUNK_ROWS, args.rows) - 1
+            conn.execute(insert_sql, {
+                'first': first, 'last': last, 'devices': args.devices,
+                'start_us': start_us, 'step_us': step_us
+            })
+            conn.commit()
+            log(f'  {last + 1}/{args.rows} 행 ({time.monotonic() - started:.1f}초)')
+    insert_seconds = time.monotonic() - started
+
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.partition:
+            ds.run_partition_maintenance()
+        ds.rebuild_statistics()
+        if not args.no_rollups:
+            ds.rebuild_rollups()
+        with ds.db_lock:
+            ds.get_write_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        ds.stop_ingest_writer()
+
+    result = {
+        'path': os.path.abspath('seoultel015.db'),
+        'schema': args.schema,
+        'rows': args.rows,
+        'devices': args.devices,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'partitions': len(ds._partitions),
+        'insert_seconds': round(insert_seconds, 1),
+        'total_seconds': round(time.monotonic() - started, 1),
+        'db_bytes': os.path.getsize('seoultel015.db')
+    }
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
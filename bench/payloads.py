@@ -0,0 +1,129 @@
+"""
+ChirpStack v4 uplink 이벤트 생성기
+
+사용법:
+    python bench/payloads.py [-n 개수] [--devices N] [--start ISO시각] [--interval 초] > uplinks.ndjson
+
+디바이스 N 개가 interval 초마다 번갈아 보내는 uplink 이벤트(/uplink?event=up 본문)를
+한 줄에 하나씩 NDJSON 으로 출력한다. 다른 벤치마크 스크립트는 make_uplink() 를 import 해서 쓴다.
+출력은 /uplink/batch 본문이나 flask --app dataServer import-uplinks 입력으로 그대로 쓸 수 있다.
+
+- deviceInfo / rxInfo / txInfo / object / fCnt / fPort / data 필드를 ChirpStack v4 와 같은 구조로 채움
+- object.temperature 는 디코더가 부호 없는 1바이트로 내보내는 값 (영하는 128 이상)
+- 디바이스마다 수신 게이트웨이 수(1~3)가 다르고 rssi/snr 은 거리에 따라 흔들림
+- 일부 디바이스는 가끔 f_cnt 를 건너뛰어 패킷 손실을 흉내냄
+"""
+
+import argparse
+import base64
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+TENANT_ID = '52f14cd4-c6f1-4fbd-8f87-4025e1d49242'
+APPLICATION_ID = 'f6f1b8a4-7c44-4a2b-9a5e-3b1c2f0e1d11'
+GATEWAYS = [f'0016c001f1{n:06x}' for n in range(8)]
+
+
+def device_eui(dev):
+    return f'a84041{dev:010x}'
+
+
+def _device_profile(dev):
+    """디바이스별로 고정된 특성 (게이트웨이, 거리, 손실률)"""
+    rng = random.Random(dev)
+    return {
+        'gateways': rng.sample(GATEWAYS, rng.randint(1, 3)),
+        'base_rssi': rng.uniform(-115, -60),
+        'base_snr': rng.uniform(-8, 10),
+        'base_temp': rng.uniform(-5, 30),
+        'loss': rng.choice((0, 0, 0, 0.01, 0.05))
+    }
+
+
+_profiles = {}
+_lost_frames = {}    # 디바이스별로 지금까지 건너뛴 f_cnt 수 (손실 후에도 f_cnt 가 반복되지 않도록 계속 더함)
+
+
+def make_uplink(i, devices, start=None, interval=1.0, rng=random):
+    """i 번째 uplink 이벤트 (디바이스 i % devices, f_cnt 는 해당 디바이스의 i // devices 번째 전송 + 손실된 프레임 수)"""
+    dev = i % devices
+    profile = _profiles.get(dev)
+    if profile is None:
+        profile = _profiles[dev] = _device_profile(dev)
+    if profile['loss'] and rng.random() < profile['loss']:
+        _lost_frames[dev] = _lost_frames.get(dev, 0) + 1
+    f_cnt = i // devices + _lost_frames.get(dev, 0)
+    moment = (start or datetime(2026, 1, 1)) + timedelta(seconds=i * interval)
+
+    temperature = round(profile['base_temp'] + rng.gauss(0, 1.5))
+    if temperature < 0:
+        temperature += 256
+    raw = bytes([temperature & 0xff, dev & 0xff])
+
+    rx_info = []
+    for gateway in profile['gateways']:
+        rx_info.append({
+            'gatewayId': gateway,
+            'uplinkId': rng.randint(1, 2 ** 31),
+            'time': moment.isoformat() + 'Z',
+            'rssi': int(profile['base_rssi'] + rng.gauss(0, 3)),
+            'snr': round(profile['base_snr'] + rng.gauss(0, 1.5), 1),
+            'channel': rng.randint(0, 7),
+            'location': {},
+            'context': 'AAAAAA==',
+            'crcStatus': 'CRC_OK'
+        })
+
+    return {
+        'deduplicationId': str(uuid.UUID(int=rng.getrandbits(128))),
+        'time': moment.isoformat() + 'Z',
+        'deviceInfo': {
+            'tenantId': TENANT_ID,
+            'tenantName': 'SeoulTel',
+            'applicationId': APPLICATION_ID,
+            'applicationName': 'temperature',
+            'deviceProfileId': 'c0f2a1d3-0000-4000-8000-000000000001',
+            'deviceProfileName': 'LHT65N',
+            'deviceName': f'sensor-{dev:05d}',
+            'devEui': device_eui(dev),
+            'deviceClassEnabled': 'CLASS_A',
+            'tags': {}
+        },
+        'devAddr': f'{0x26000000 + dev:08x}',
+        'adr': True,
+        'dr': 5,
+        'fCnt': f_cnt,
+        'fPort': 2,
+        'confirmed': False,
+        'data': base64.b64encode(raw).decode('ascii'),
+        'object': {'temperature': temperature},
+        'rxInfo': rx_info,
+        'txInfo': {
+            'frequency': 922100000 + 200000 * rng.randint(0, 7),
+            'modulation': {'lora': {'bandwidth': 125000, 'spreadingFactor': 7, 'codeRate': 'CR_4_5'}}
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--count', type=int, default=10000)
+    parser.add_argument('--devices', type=int, default=200)
+    parser.add_argument('--start', default='2026-01-01T00:00:00', help='첫 uplink 시각 (ISO)')
+    parser.add_argument('--interval', type=float, default=1.0, help='uplink 간격 (초)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime.fromisoformat(args.start)
+    write = sys.stdout.write
+    for i in range(args.count):
+        write(json.dumps(make_uplink(i, args.devices, start, args.interval, rng), separators=(',', ':')))
+        write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,68 @@
 # configuration for gunicorn
 #
 
+import os
+import subprocess
+import sys
+import time
+
 bind = '0.0.0.0:80'
+# workers = 1: 단일 프로세스 모드 (기본, 워커 안의 writer 스레드가 저장)
+# workers > 1: 다중 프로세스 모드
+#   저장은 별도 writer 프로세스(flask --app dataServer writer)가 전담하고
+#   워커는 읽기 전용 연결로 조회하며 수신 데이터를 Unix 소켓으로 writer 에 전달한다.
+#   켜려면 아래 값을 바꾸거나 실행 시 지정한다 (writer 프로세스는 아래 훅이 자동으로 띄움):
+#       gunicorn --config dataServer.conf.py --workers 4 dataServer:app
+#   조회가 많아 한 프로세스의 CPU(GIL)가 부족할 때 사용한다.
 workers = 1
-threads = 4
+threads = 16  # 실시간 피드(SSE) 연결이 스레드를 점유하므로 SSE_MAX_SUBSCRIBERS 보다 크게
 accesslog = '-'
 loglevel = 'info'
 capture_output = True
 enable_stdio_inheritance = True
 
+graceful_timeout = 30
+
+writer_socket = 'dataServer-writer.sock'  # dataServer.WRITER_SOCKET 과 같게
+writer_start_timeout = 120  # writer 프로세스 DB 초기화 대기 시간 (초)
+
+_writer = None
+
+
+def on_starting(server):
+    # 워커보다 먼저 writer 프로세스를 띄우고 소켓이 열릴 때까지 대기 (DB 초기화 포함)
+    # (마스터에서 dataServer 를 import 하면 워커가 초기화 상태를 물려받으므로 import 하지 않음)
+    global _writer
+    if server.cfg.workers <= 1:
+        return
+    if os.path.exists(writer_socket):
+        os.unlink(writer_socket)
+    _writer = subprocess.Popen([sys.executable, '-m', 'flask', '--app', 'dataServer',
+                                'writer', '--socket', writer_socket])
+    deadline = time.monotonic() + writer_start_timeout
+    while not os.path.exists(writer_socket):
+        if _writer.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError('writer 프로세스 시작 실패')
+        time.sleep(0.1)
+
+
+def post_fork(server, worker):
+    # 앱 import 전에 호출되므로 여기서 읽기 워커로 지정
+    if server.cfg.workers > 1:
+        os.environ['DATASERVER_ROLE'] = 'reader'
+
+
+def worker_exit(server, worker):
+    # 워커 종료 전 수신 대기열에 남은 데이터 저장 (단일 프로세스 모드)
+    import dataServer
+    dataServer.stop_ingest_writer()
+
+
+def on_exit(server):
+    # writer 프로세스는 SIGTERM 을 받으면 대기열을 모두 저장한 뒤 종료
+    if _writer is not None and _writer.poll() is None:
+        _writer.terminate()
+        try:
+            _writer.wait(graceful_timeout)
+        except subprocess.TimeoutExpired:
+            _writer.kill()
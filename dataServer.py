@@ -9,49 +9,2490 @@ LoRaWAN ChirpStack Flask 웹 서버
 - 10초마다 자동 새로고침
 """
 
-from flask import Flask, request, jsonify, render_template, render_template_string, redirect, url_for, session, Response, abort, send_file
-from datetime import datetime, timedelta
+import click
+from flask import Flask, request, jsonify, render_template, render_template_string, stream_template, redirect, url_for, session, Response, abort, send_file, stream_with_context, g
+from datetime import datetime, timedelta, timezone
 import sqlite3
+import csv
+import json
+import calendar
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
 import threading
+import queue
+import time
+import atexit
+import itertools
+import zlib
+import codecs
+import gzip
+import logging
+import sys
 import os
+import tempfile
+import bisect
+import heapq
+import signal
+import socket
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from urllib.parse import urlparse, parse_qs
-from io import BytesIO
+from collections import Counter, OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from io import StringIO
+from urllib.request import pathname2url, Request, urlopen
+
+# 바이너리 응답 형식 / 압축용 (선택 의존성)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Webhook 본문 파싱용 고속 JSON 디코더 (선택 의존성, 없으면 표준 json)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# Parquet 내보내기용 (선택 의존성)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 분석 API 용 (선택 의존성)
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Flask 앱 초기화
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'  # 보안을 위해 변경 필요
 
-# 설정
-DB_PATH = 'seoultel015.db'
-HTTP_INTEGRATION_PORT = 80
-WEB_PORT = 80
+# 설정
+DB_PATH = 'seoultel015.db'
+HTTP_INTEGRATION_PORT = 80
+WEB_PORT = 80
+
+# 로그인 정보 (실제 환경에서는 암호화된 데이터베이스 사용 권장)
+USERS = {
+    #'admin': 'admin123',
+    'admin': 'admin015',
+    #'user': 'password123'
+}
+
+# 로그 설정
+LOG_LEVEL = 'INFO'
+LOG_QUEUE_SIZE = 10000           # 비동기 로그 대기열 크기 (가득 차면 로그 버림)
+# uplink 마다 남는 로그는 레벨별로 N 건 중 1건만 기록 (0: 기록 안 함, 1: 모두 기록)
+LOG_UPLINK_SAMPLE_EVERY = {'DEBUG': 0, 'INFO': 100}
+
+# 수신 큐 설정 (Write-behind)
+INGEST_QUEUE_MAXSIZE = 10000     # 대기열 최대 크기 (가득 차면 백프레셔 적용)
+INGEST_ENQUEUE_TIMEOUT = 0.5     # 대기열이 가득 찼을 때 최대 대기 시간 (초)
+INGEST_BATCH_SIZE = 500          # 한 트랜잭션에 저장할 최대 건수
+INGEST_FLUSH_INTERVAL = 0.2      # 배치를 모으는 최대 시간 (초)
+INGEST_MAX_RETRIES = 3           # 배치 저장 실패 시 재시도 횟수
+
+# /api/records 페이지 크기
+RECORDS_DEFAULT_PAGE_SIZE = 100
+RECORDS_MAX_PAGE_SIZE = 1000
+
+# 내보내기 설정
+EXPORT_FETCH_SIZE = 5000         # 커서에서 한 번에 읽는 행 수
+EXCEL_WIDTH_SAMPLE_ROWS = 1000   # 엑셀 열 너비 추정에 사용할 행 수
+
+# 백그라운드 내보내기 작업 (/api/exports)
+EXPORT_JOB_WORKERS = 2                   # 동시에 실행하는 내보내기 작업 수
+EXPORT_JOB_DIR = 'exports'               # 완료된 파일 보관 디렉토리
+EXPORT_JOB_QUOTA_BYTES = 2 * 1024 ** 3   # 보관 파일 전체 크기 한도 (넘으면 오래 쓰이지 않은 파일부터 삭제)
+EXPORT_JOB_RETENTION = 86400             # 완료된 작업과 파일 보관 시간 (초, 마지막 사용 기준)
+EXPORT_JOB_WAIT = 10                     # /download/all 이 작업 완료를 기다리는 최대 시간 (초)
+
+# 최근 데이터 링 버퍼 크기 (이 개수 이하의 최근 데이터 조회는 DB를 거치지 않음)
+RECENT_BUFFER_SIZE = 30000
+
+# 대시보드 (/?limit=N) 설정
+DASHBOARD_DEFAULT_LIMIT = 20
+DASHBOARD_MAX_LIMIT = 100000
+DASHBOARD_LIVE_MAX_LIMIT = 100          # 이 개수 이하는 실시간 피드(SSE)로 갱신
+DASHBOARD_STREAM_MIN_LIMIT = 1000       # 이 개수를 넘으면 스트리밍 렌더링 (응답 캐시 제외)
+DASHBOARD_STREAM_BUFFER = 4096          # 스트리밍 시 한 번에 모아 보내는 템플릿 조각 수 (행당 약 20개)
+DASHBOARD_ALIASES = {                   # 기존 /dataN 경로
+    '10': 10, '20': 20, '50': 50, '100': 100,
+    '1k': 1000, '10k': 10000, '30k': 30000
+}
+
+# 시간 버킷 롤업 설정 (해상도: 초 단위 버킷 크기)
+ROLLUP_RESOLUTIONS = (60, 3600, 86400)   # 1분, 1시간, 1일
+ROLLUP_DEFAULT_POINTS = 500              # 조회 시 기본 포인트 수
+ROLLUP_MAX_POINTS = 5000
+
+# 디바이스 원본 시계열 (/api/devices/<dev_eui>/series) 최대 행 수
+SERIES_DEFAULT_LIMIT = 10000
+SERIES_MAX_LIMIT = 100000
+
+# 분석 API (/api/analytics, NumPy 필요) 설정
+ANALYTICS_DEFAULT_WINDOW = 86400              # from 이 없을 때 조회 구간 (초)
+ANALYTICS_CACHE_SIZE = 32                     # 결과를 캐시할 구간 수
+ANALYTICS_CACHE_MAX_AGE = 30                  # 새 데이터가 들어와도 결과를 재사용하는 시간 (초)
+ANALYTICS_CACHE_STALE_AGE = 600               # 이 시간까지는 이전 결과를 주면서 백그라운드에서 다시 계산 (초)
+ANALYTICS_PERCENTILES = (5, 50, 95)
+ANALYTICS_RSSI_BINS = (-140, -30, 5)          # 히스토그램 (시작, 끝, 폭), 범위 밖 값은 양 끝 구간에
+ANALYTICS_SNR_BINS = (-25, 15, 2.5)
+ANALYTICS_MAX_FCNT_GAP = 16384                # 이보다 큰 f_cnt 증가는 손실이 아니라 카운터 초기화로 봄
+ANALYTICS_LINK_RSSI_RANGE = (-120, -70)       # 링크 점수에서 0점 / 만점이 되는 평균 RSSI
+ANALYTICS_LINK_SNR_RANGE = (-20, 10)          # 링크 점수에서 0점 / 만점이 되는 평균 SNR
+ANALYTICS_LINK_WEIGHTS = (0.4, 0.3, 0.3)      # 링크 점수 가중치 (RSSI, SNR, 수신율)
+ANALYTICS_LINK_POOR_SCORE = 50                # 이 점수 미만 디바이스를 poor 로 집계
+ANALYTICS_DEFAULT_DEVICES = 100               # 응답에 넣는 디바이스 수 (점수 낮은 순)
+
+# 데이터 API 응답 압축 (이 크기 이상일 때만 압축)
+RESPONSE_COMPRESS_MIN_BYTES = 1024
+RESPONSE_GZIP_LEVEL = 6
+RESPONSE_BROTLI_QUALITY = 5
+
+# 월별 파티션 / 보존 정책
+PARTITION_RETENTION_MONTHS = 24          # 보존 개월 수 (초과 파티션은 압축 보관 후 삭제, 0: 무기한 보존)
+PARTITION_ARCHIVE_DIR = 'archive'        # 보관 파일(.ndjson.gz) 저장 디렉토리
+PARTITION_MOVE_BATCH = 10000             # 파티션 이동 시 트랜잭션 당 행 수
+PARTITION_MAINTENANCE_INTERVAL = 6 * 3600    # 자동 파티션 정리 주기 (초, 0: 비활성)
+
+# 중복 uplink 제거 ((dev_eui, f_cnt) 기준, ChirpStack 재전송 / 다중 게이트웨이 수신)
+DEDUP_WINDOW = 600               # 같은 f_cnt 를 중복으로 보는 시간 범위 (초, 0: 비활성)
+DEDUP_LRU_DEVICES = 100000       # 메모리에 최근 f_cnt 를 기억할 최대 디바이스 수
+DEDUP_LRU_PER_DEVICE = 64        # 디바이스마다 기억할 최근 f_cnt 개수
+DEDUP_RESET_GAP = 64             # f_cnt 가 마지막 값보다 이만큼 넘게 작아지면 카운터 리셋(재접속)으로 판단
+
+# 다중 프로세스 모드 (gunicorn workers > 1, dataServer.conf.py 참고)
+# 저장은 writer 프로세스(flask --app dataServer writer) 하나가 전담하고
+# 워커는 읽기 전용으로 동작하며 수신 데이터를 Unix 소켓으로 writer 에 전달한다.
+WRITER_SOCKET = 'dataServer-writer.sock'     # writer 프로세스 소켓 경로
+WRITER_TIMEOUT = 5.0             # 워커 -> writer 전달 응답 대기 시간 (초)
+FOLLOW_INTERVAL = 0.2            # 워커가 writer 의 새 커밋을 확인하는 주기 (초)
+
+# 대량 수신 / 과거 데이터 가져오기 (/uplink/batch, flask --app dataServer import-uplinks)
+IMPORT_BATCH_SIZE = 20000        # 트랜잭션 당 저장할 행 수 (저장 중에는 실시간 수신이 db_lock 을 기다림)
+IMPORT_READ_SIZE = 1024 * 1024   # 입력 스트림에서 한 번에 읽는 바이트 수
+IMPORT_MAX_ERRORS = 20           # 결과에 담을 거부 사유 최대 개수
+IMPORT_WRITER_TIMEOUT_PER_ROW = 0.001   # 읽기 워커가 writer 에 배치를 저장시킬 때 행당 추가 응답 대기 시간 (초)
+
+# 알림 (저장된 행마다 임계값 규칙 평가 + 무응답 디바이스 감지)
+# 규칙: metric 은 temperature / rssi / snr, op 는 '>' 또는 '<'.
+# threshold 를 넘으면 발생하고 clear 까지 돌아와야 해제 (히스테리시스, 생략 시 threshold).
+# dev_eui 를 지정하면 해당 디바이스에만 적용.
+ALERT_RULES = [
+    {'name': 'temperature_high', 'metric': 'temperature', 'op': '>', 'threshold': 40, 'clear': 38},
+    {'name': 'temperature_low', 'metric': 'temperature', 'op': '<', 'threshold': -10, 'clear': -8},
+]
+ALERT_SILENT_AFTER = 3600        # 마지막 uplink 후 이 시간 동안 수신이 없으면 무응답 알림 (초, 0: 비활성)
+ALERT_CHECK_INTERVAL = 10        # 무응답 디바이스 확인 주기 (초)
+ALERT_FILE = 'alerts.ndjson'     # 알림을 한 줄씩 기록할 파일 (None: 사용 안 함)
+ALERT_WEBHOOK_URL = None         # 알림을 JSON 으로 POST 할 주소 (None: 사용 안 함)
+ALERT_WEBHOOK_TIMEOUT = 5        # webhook 전송 응답 대기 시간 (초)
+ALERT_QUEUE_SIZE = 10000         # 전송 대기 알림 최대 개수 (가득 차면 버림)
+
+# v2 스키마 마이그레이션 (flask --app dataServer migrate-schema)
+SCHEMA_MIGRATION_BATCH = 20000           # 트랜잭션 당 복사할 행 수
+
+# 응답 캐시 (대시보드 / JSON API) 최대 크기
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# 실시간 피드 (Server-Sent Events) 설정
+# 연결 하나가 gunicorn 스레드 하나를 점유하므로 SSE_MAX_SUBSCRIBERS 는 threads 보다 작게 유지
+SSE_MAX_SUBSCRIBERS = 12
+SSE_HEARTBEAT_INTERVAL = 15      # keep-alive 주석 전송 간격 (초)
+SSE_MAX_CONNECTION_TIME = 300    # 연결 최대 유지 시간 (초, 이후 브라우저가 자동 재연결)
+SSE_RETRY_MS = 2000              # 재연결 대기 시간 (밀리초)
+SSE_QUEUE_SIZE = 256             # 구독자별 미전송 이벤트 최대 개수
+
+# SQLite 연결 설정
+DB_BUSY_TIMEOUT = 30             # 잠금 대기 시간 (초)
+DB_SYNCHRONOUS = 'NORMAL'        # WAL 모드에서는 NORMAL 로도 커밋 내구성 유지 (체크포인트 시 fsync)
+DB_CACHE_SIZE = -65536           # 페이지 캐시 크기 (음수: KiB 단위, 64MB)
+DB_MMAP_SIZE = 268435456         # 메모리 맵 크기 (256MB)
+
+# 지표 (/metrics, Prometheus 텍스트 형식) 히스토그램 구간 (초)
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+METRICS_EXPORT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+# ==================== 로깅 ====================
+#
+# 로그 레코드는 요청 스레드에서 대기열에 넣기만 하고,
+# 별도 리스너 스레드가 stdout (gunicorn capture_output) 에 기록한다.
+
+logger = logging.getLogger('dataServer')
+uplink_logger = logging.getLogger('dataServer.uplink')   # uplink 마다 남는 로그 (샘플링)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """대기열이 가득 차면 기다리지 않고 레코드를 버리는 QueueHandler"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """레벨별로 N 건 중 1건만 통과시키는 필터"""
+
+    def __init__(self, every_by_level):
+        super().__init__()
+        self.every = {logging.getLevelName(level): n for level, n in every_by_level.items()}
+        self.counters = {level: itertools.count() for level in self.every}
+
+    def filter(self, record):
+        every = self.every.get(record.levelno)
+        if every is None:
+            return True
+        if every <= 0:
+            return False
+        return next(self.counters[record.levelno]) % every == 0
+
+
+_log_listener = None
+
+
+def setup_logging():
+    """비동기 로그 핸들러 설정 (리스너 스레드 시작)"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s %(message)s'))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    uplink_logger.addFilter(SamplingFilter(LOG_UPLINK_SAMPLE_EVERY))
+
+    _log_listener = QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+
+
+def stop_logging():
+    """대기열에 남은 로그를 모두 기록하고 리스너 종료"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+setup_logging()
+atexit.register(stop_logging)
+
+
+# ==================== 지표 (Prometheus /metrics) ====================
+#
+# 요청 경로별 지연, db_lock 대기/보유 시간, 커밋 지연, 저장 행 수, 수신 대기열 길이,
+# 내보내기 소요 시간을 메모리에 누적하고 /metrics 에서 텍스트 형식으로 내보낸다.
+# 기록은 값 하나를 구간에 더하는 정도라 요청마다의 부담은 무시할 수 있다.
+# writer_side 지표는 저장을 담당하는 프로세스의 값이다 (다중 프로세스 모드에서는
+# 읽기 워커의 /metrics 가 writer 프로세스에서 받아 함께 내보낸다).
+
+_metrics = []
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class CounterMetric:
+    """누적 카운터 (레이블 값 튜플별)"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=(), writer_side=False):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.writer_side = writer_side
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.label_names, labels)} {value}'
+
+
+class HistogramMetric:
+    """구간별 누적 히스토그램 (레이블 값 튜플별)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=METRICS_LATENCY_BUCKETS, label_names=(), writer_side=False):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = label_names
+        self.writer_side = writer_side
+        self._children = {}     # labels -> [구간별 건수 (마지막은 +Inf), 합계]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(labels)
+            if child is None:
+                child = self._children[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            child[0][index] += 1
+            child[1] += value
+
+    def samples(self):
+        with self._lock:
+            children = [(labels, list(counts), total) for labels, (counts, total) in self._children.items()]
+        for labels, counts, total in children:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                yield f'{self.name}_bucket{le} {cumulative}'
+            label_text = _format_labels(self.label_names, labels)
+            yield f'{self.name}_sum{label_text} {total}'
+            yield f'{self.name}_count{label_text} {cumulative}'
+
+
+class CallbackMetric:
+    """내보낼 때 함수를 호출해 값을 읽는 지표 (함수는 (레이블 값 튜플, 값) 목록 반환)"""
+
+    def __init__(self, kind, name, help_text, callback, label_names=(), writer_side=False):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.label_names = label_names
+        self.writer_side = writer_side
+        _metrics.append(self)
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield f'{self.name}{_format_labels(self.label_names, labels)} {value}'
+
+
+def render_metrics(writer_side=None):
+    """Prometheus 텍스트 형식 (writer_side 가 True/False 면 해당 지표만)"""
+    lines = []
+    for metric in _metrics:
+        if writer_side is not None and metric.writer_side != writer_side:
+            continue
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+http_request_seconds = HistogramMetric(
+    'dataserver_http_request_duration_seconds', 'HTTP 요청 처리 시간 (스트리밍 응답은 첫 응답까지)',
+    label_names=('route', 'method'))
+http_requests_total = CounterMetric(
+    'dataserver_http_requests_total', 'HTTP 요청 수', label_names=('route', 'method', 'status'))
+db_lock_wait_seconds = HistogramMetric(
+    'dataserver_db_lock_wait_seconds', 'db_lock 획득 대기 시간', writer_side=True)
+db_lock_hold_seconds = HistogramMetric(
+    'dataserver_db_lock_hold_seconds', 'db_lock 보유 시간', writer_side=True)
+db_commit_seconds = HistogramMetric(
+    'dataserver_db_commit_seconds', '데이터 저장 트랜잭션 커밋 시간', writer_side=True)
+rows_inserted_total = CounterMetric(
+    'dataserver_rows_inserted_total', '저장된 행 수 (rate() 로 초당 저장 건수)', writer_side=True)
+rows_dropped_total = CounterMetric(
+    'dataserver_rows_dropped_total', '수신 응답 후 저장하지 못하고 버린 행 수', writer_side=True)
+alerts_total = CounterMetric(
+    'dataserver_alerts_total', '알림 발생/해제 수', label_names=('type', 'state'), writer_side=True)
+export_seconds = HistogramMetric(
+    'dataserver_export_duration_seconds', '다운로드/내보내기 생성 시간',
+    buckets=METRICS_EXPORT_BUCKETS, label_names=('format',))
+
+
+class InstrumentedLock:
+    """대기 시간과 보유 시간을 지표로 기록하는 threading.Lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._acquired_at = time.perf_counter()
+            db_lock_wait_seconds.observe(self._acquired_at - start)
+        return acquired
+
+    def release(self):
+        db_lock_hold_seconds.observe(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# 데이터베이스 락 (쓰기 전용 - 읽기는 WAL 모드로 락 없이 병렬 처리)
+db_lock = InstrumentedLock()
+
+# 다른 구성 요소의 현재 값 (내보낼 때 읽음)
+CallbackMetric('gauge', 'dataserver_ingest_queue_depth', '수신 대기열에 쌓인 레코드 수',
+               lambda: [((), ingest_queue.qsize())], writer_side=True)
+CallbackMetric('counter', 'dataserver_duplicates_dropped_total', '중복으로 버린 uplink 수 (판정 방법별)',
+               lambda: [((method,), count) for method, count in dedup_counters.items()],
+               label_names=('method',), writer_side=True)
+CallbackMetric('gauge', 'dataserver_live_subscribers', '실시간 피드(SSE) 구독자 수',
+               lambda: [((), len(live_feed))])
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        http_request_seconds.observe(time.perf_counter() - started, (route, request.method))
+        http_requests_total.inc(1, (route, request.method, str(response.status_code)))
+    return response
+
+
+def _timed_export(export_format, stream):
+    """내보내기 스트림을 그대로 전달하면서 전체 생성 시간 기록"""
+    start = time.perf_counter()
+    try:
+        yield from stream
+    finally:
+        export_seconds.observe(time.perf_counter() - start, (export_format,))
+
+
+# ==================== 데이터베이스 연결 ====================
+#
+# 연결을 요청마다 열고 닫지 않고 재사용한다.
+# - 읽기: 스레드별 읽기 전용 연결 (threading.local) - 락 없이 서로, 그리고 writer와 병렬 실행
+# - 쓰기: 프로세스당 하나의 연결 - db_lock 을 잡은 상태에서만 사용
+#   (다중 프로세스 모드에서는 writer 프로세스만 쓰기 연결을 사용)
+
+_db_local = threading.local()
+_write_conn = None
+_write_conn_pid = None
+
+
+def _open_connection(read_only=False):
+    """튜닝된 pragma 를 적용한 SQLite 연결 생성 (read_only: 쓰기가 거부되는 연결)"""
+    if read_only:
+        conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(DB_PATH))}?mode=ro', uri=True,
+                               timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute(f'PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT * 1000)}')
+    conn.execute(f'PRAGMA synchronous = {DB_SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size = {DB_CACHE_SIZE}')
+    conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+
+def get_read_connection():
+    """현재 스레드 전용 읽기 연결 반환 (없으면 생성)"""
+    conn = getattr(_db_local, 'conn', None)
+    # fork 된 프로세스에서는 부모의 연결을 사용하지 않는다
+    if conn is None or _db_local.pid != os.getpid():
+        conn = _open_connection(read_only=True)
+        _db_local.conn = conn
+        _db_local.pid = os.getpid()
+        _db_local.data_version = None
+    return conn
+
+
+def get_write_connection():
+    """쓰기 연결 반환 (db_lock 을 잡은 상태에서 호출해야 함)"""
+    global _write_conn, _write_conn_pid
+    if _write_conn is None or _write_conn_pid != os.getpid():
+        _write_conn = _open_connection()
+        _write_conn_pid = os.getpid()
+    return _write_conn
+
+
+def close_write_connection():
+    """쓰기 연결 종료"""
+    global _write_conn
+    with db_lock:
+        if _write_conn is not None and _write_conn_pid == os.getpid():
+            _write_conn.close()
+        _write_conn = None
+
+
+atexit.register(close_write_connection)
+
+
+# ==================== 저장 스키마 (v1 / v2) ====================
+#
+# v1: lorawan_data 에 행마다 ISO 시간 문자열, 디바이스 이름/EUI 문자열, created_at 저장
+# v2: lorawan_data_v2 에 정수 시간(ts, epoch 마이크로초)과 devices 테이블 id 만 저장
+#     - 행과 인덱스가 작아지고 시간 조건이 정수 비교가 된다
+#     - created_at 은 v1 과 같은 UTC 저장 시각을 정수(created, epoch 초)로 저장한다
+#       (ts 는 수신 시각 로컬 시간이라 대신 쓸 수 없음. created 가 없던 이전 v2 행은 ts 를 UTC 로 바꿔 사용)
+# 스키마 버전은 PRAGMA user_version 으로 구분한다. 새 DB 는 v2 로 만들고,
+# 기존 DB 는 flask --app dataServer migrate-schema 로 운영 중에 옮긴다.
+# 조회는 _select_list() / _source_sql() 을 거쳐 두 스키마 모두 LORAWAN_COLUMNS
+# 형태의 행을 돌려주므로 라우트와 캐시는 스키마를 알 필요가 없다.
+# (v2 에서도 lorawan_data 이름으로 v1 형태의 호환 뷰를 유지한다)
+
+SCHEMA_VERSION = 1      # init_database() 에서 DB 의 user_version 으로 설정
+
+_EPOCH = datetime(1970, 1, 1)
+
+# v2 테이블(d)과 devices(v) 로부터 v1 컬럼 값을 만드는 SQL 식
+V2_COLUMN_SQL = {
+    'id': 'd.id',
+    'timestamp': ("strftime('%Y-%m-%dT%H:%M:%S', d.ts / 1000000, 'unixepoch')"
+                  " || CASE WHEN d.ts % 1000000 THEN printf('.%06d', d.ts % 1000000) ELSE '' END"),
+    'device_name': 'v.device_name',
+    'dev_eui': 'v.dev_eui',
+    'temperature': 'd.temperature',
+    'rssi': 'd.rssi',
+    'snr': 'd.snr',
+    'f_port': 'd.f_port',
+    'f_cnt': 'd.f_cnt',
+    'created_at': ("CASE WHEN d.created IS NULL"
+                   " THEN strftime('%Y-%m-%d %H:%M:%S', d.ts / 1000000, 'unixepoch', 'utc')"
+                   " ELSE strftime('%Y-%m-%d %H:%M:%S', d.created, 'unixepoch') END")
+}
+
+V2_INSERT_SQL = '''
+    INSERT INTO lorawan_data_v2
+    (ts, device_id, temperature, rssi, snr, f_port, f_cnt, created)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+LORAWAN_DEVICE_COLUMNS = ('device_name', 'dev_eui')     # v2 에서 devices 에 있는 컬럼
+
+_device_ids = {}    # (dev_eui, device_name) -> devices.id (v2, writer 전용)
+
+
+def _live_table():
+    """새 데이터가 저장되는 테이블 (현재 파티션)"""
+    return 'lorawan_data_v2' if SCHEMA_VERSION >= 2 else 'lorawan_data'
+
+
+def _time_column():
+    return 'ts' if SCHEMA_VERSION >= 2 else 'timestamp'
+
+
+def _time_value(timestamp):
+    """ISO 시간 문자열을 현재 스키마의 시간 컬럼 값으로 변환"""
+    return _iso_to_micros(timestamp) if SCHEMA_VERSION >= 2 else timestamp
+
+
+def _iso_to_micros(timestamp):
+    """ISO 시간 문자열을 epoch 마이크로초로 (시간대가 있으면 로컬 시각으로 바꾼 뒤 변환)"""
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    delta = moment - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _micros_to_iso(micros):
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def _utc_seconds(created_at):
+    """created_at 문자열(UTC, 'YYYY-MM-DD HH:MM:SS')을 epoch 초로 (None 은 그대로)"""
+    if created_at is None:
+        return None
+    return calendar.timegm(datetime.fromisoformat(created_at).utctimetuple())
+
+
+def _utc_text(seconds):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))
+
+
+def _column_sql(column):
+    return V2_COLUMN_SQL[column] if SCHEMA_VERSION >= 2 else f'd.{column}'
+
+
+def _select_list(columns):
+    """v1 컬럼 이름 목록을 현재 스키마의 SELECT 목록으로"""
+    return ', '.join(f'{_column_sql(column)} AS {column}' for column in columns)
+
+
+def _source_sql(table, columns=LORAWAN_DEVICE_COLUMNS):
+    """데이터 테이블을 별칭 d 로 (v2 에서 디바이스 컬럼이 필요하면 devices 를 v 로 조인)"""
+    if SCHEMA_VERSION >= 2 and any(column in LORAWAN_DEVICE_COLUMNS for column in columns):
+        return f'{table} d JOIN devices v ON v.id = d.device_id'
+    return f'{table} d'
+
+
+def _dev_eui_condition():
+    if SCHEMA_VERSION >= 2:
+        return 'd.device_id IN (SELECT id FROM devices WHERE dev_eui = ?)'
+    return 'd.dev_eui = ?'
+
+
+def _create_v2_tables(conn):
+    """devices / lorawan_data_v2 테이블과 인덱스 생성"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS devices (
+            id INTEGER PRIMARY KEY,
+            dev_eui TEXT NOT NULL,
+            device_name TEXT NOT NULL,
+            UNIQUE (dev_eui, device_name)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS lorawan_data_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts INTEGER NOT NULL,
+            device_id INTEGER NOT NULL REFERENCES devices(id),
+            temperature REAL,
+            rssi INTEGER,
+            snr REAL,
+            f_port INTEGER,
+            f_cnt INTEGER,
+            created INTEGER
+        )
+    ''')
+    _add_created_column(conn, 'lorawan_data_v2')
+    _create_v2_indexes(conn, 'lorawan_data_v2')
+
+
+def _add_created_column(conn, table):
+    """created 컬럼이 없던 이전 버전의 v2 테이블에 컬럼 추가 (파티션 이동의 SELECT * 와 컬럼 순서 유지)"""
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    if 'created' not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN created INTEGER')
+
+
+def _create_v2_indexes(conn, table):
+    # 시간 범위 조회와 디바이스별 시간 범위 조회 (dev_eui 조건은 devices 에서 id 로 바뀜)
+    # 최신/키셋 조회는 id (rowid) 를 그대로 사용하므로 별도 인덱스가 필요 없다
+    # 디바이스별 키셋 조회(/api/records?dev_eui=)는 (device_id) 인덱스가 id 순서를 그대로 내므로
+    # 복합 인덱스와 별도로 유지한다 (복합 인덱스는 ts 순이라 id 정렬에 임시 B-tree 가 필요)
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(ts)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_device_ts ON {table}(device_id, ts)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_device ON {table}(device_id)')
+
+
+def _create_compat_view(conn):
+    """v2 에서 v1 형태(LORAWAN_COLUMNS)의 lorawan_data 호환 뷰 생성"""
+    conn.execute('DROP VIEW IF EXISTS lorawan_data')
+    conn.execute(f"CREATE VIEW lorawan_data AS SELECT {_select_list(LORAWAN_COLUMNS)} "
+                 f"FROM {_source_sql('lorawan_data_v2')}")
+
+
+def _load_schema(conn):
+    """DB 의 user_version 으로 스키마 버전을 읽고 관련 메모리 상태 갱신"""
+    global SCHEMA_VERSION
+    SCHEMA_VERSION = max(conn.execute('PRAGMA user_version').fetchone()[0], 1)
+    _device_ids.clear()
+    _load_partitions(conn)
+
+
+def _device_id(conn, dev_eui, device_name):
+    """디바이스 id 조회 (없으면 등록, db_lock 안에서 호출)"""
+    key = (dev_eui, device_name)
+    device_id = _device_ids.get(key)
+    if device_id is None:
+        # INSERT OR IGNORE 는 NOT NULL 위반도 무시하므로 먼저 확인 (v1 의 NOT NULL 제약 위반과 같은 예외)
+        if not isinstance(dev_eui, str) or not isinstance(device_name, str):
+            raise sqlite3.IntegrityError(f"잘못된 디바이스: dev_eui={dev_eui!r}, device_name={device_name!r}")
+        conn.execute('INSERT OR IGNORE INTO devices (dev_eui, device_name) VALUES (?, ?)', key)
+        row = conn.execute('SELECT id FROM devices WHERE dev_eui = ? AND device_name = ?', key).fetchone()
+        if row is None:
+            raise sqlite3.IntegrityError(f"디바이스 등록 실패: {dev_eui} ({device_name})")
+        device_id = _device_ids[key] = row[0]
+    return device_id
+
+
+def _insert_rows(conn, rows):
+    """INSERT 파라미터 튜플(_lorawan_row) 목록을 현재 스키마로 저장하고 마지막 id 반환"""
+    # 다른 프로세스(migrate-schema)가 스키마를 바꿨으면 다시 읽음
+    if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+        _load_schema(conn)
+    if SCHEMA_VERSION >= 2:
+        # 디바이스 등록이 executemany 이전에 끝나야 last_insert_rowid 가 데이터 행을 가리킨다
+        rows = [(_v2_time(_iso_to_micros, 'timestamp', row[0]), _device_id(conn, row[2], row[1]))
+                + row[3:8] + (_v2_time(_utc_seconds, 'created_at', row[8]),) for row in rows]
+        conn.executemany(V2_INSERT_SQL, rows)
+    else:
+        conn.executemany(LORAWAN_INSERT_SQL, rows)
+    return conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+
+def _v2_time(convert, name, value):
+    """v2 정수 시간 변환 (잘못된 값은 v1 의 NOT NULL 제약 위반과 같은 방식으로 호출 측에서 처리되도록 IntegrityError)"""
+    try:
+        return convert(value)
+    except (TypeError, ValueError) as e:
+        raise sqlite3.IntegrityError(f"잘못된 {name}: {value!r} ({e})")
+
+
+def _stored_record(record_id, row):
+    """INSERT 파라미터 튜플을 조회 결과와 같은 LORAWAN_COLUMNS 순서의 행으로"""
+    if SCHEMA_VERSION < 2:
+        return (record_id,) + row
+    timestamp = _micros_to_iso(_iso_to_micros(row[0]))
+    return (record_id, timestamp) + row[1:8] + (_utc_text(_utc_seconds(row[8])),)
+
+
+# ==================== 데이터베이스 초기화 ====================
+
+def init_database():
+    """데이터베이스 및 테이블 초기화"""
+    with db_lock:
+        conn = get_write_connection()
+        cursor = conn.cursor()
+        
+        # WAL 모드: 읽기와 쓰기가 서로 막지 않음 (DB 파일에 영구 저장되는 설정)
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
+        # 월별 파티션 목록 (v1: lorawan_data_YYYYMM, v2: lorawan_data_v2_YYYYMM 테이블)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lorawan_partitions (
+                name TEXT PRIMARY KEY,
+                start_ts TEXT NOT NULL,
+                end_ts TEXT NOT NULL,
+                min_id INTEGER,
+                max_id INTEGER,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                sealed INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+        # 스키마 버전: v1 테이블이 없는 새 DB 는 v2 로 생성
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        has_v1 = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lorawan_data'"
+        ).fetchone() is not None
+        if version >= 2 or not has_v1:
+            _create_v2_tables(conn)
+            cursor.execute('PRAGMA user_version = 2')
+        else:
+            # LoRaWAN 데이터 테이블
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS lorawan_data (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    device_name TEXT NOT NULL,
+                    dev_eui TEXT NOT NULL,
+                    temperature REAL,
+                    rssi INTEGER,
+                    snr REAL,
+                    f_port INTEGER,
+                    f_cnt INTEGER,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # 인덱스 생성
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_timestamp 
+                ON lorawan_data(timestamp)
+            ''')
+        
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_dev_eui_timestamp 
+                ON lorawan_data(dev_eui, timestamp)
+            ''')
+            # dev_eui 단일 인덱스는 디바이스별 키셋 조회(id 순)용으로 복합 인덱스와 함께 유지
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_dev_eui 
+                ON lorawan_data(dev_eui)
+            ''')
+        
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_created_at 
+                ON lorawan_data(created_at)
+            ''')
+            cursor.execute('PRAGMA user_version = 1')
+            logger.warning("⚠️ v1 스키마 사용 중. v2 로 전환: flask --app dataServer migrate-schema")
+        _load_schema(conn)
+        if SCHEMA_VERSION < 2:
+            # 이전 버전에서 만든 월별 파티션에도 복합 인덱스 적용
+            for name, *_ in _partitions:
+                _create_v1_partition_indexes(conn, name)
+        else:
+            for name, *_ in _partitions:
+                _add_created_column(conn, name)
+        _recreate_data_view(conn)
+        
+        # 통계 요약 테이블 (삽입 시 누적 갱신 - 전체 테이블 집계 대체)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lorawan_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_count INTEGER NOT NULL DEFAULT 0,
+                device_count INTEGER NOT NULL DEFAULT 0,
+                temp_count INTEGER NOT NULL DEFAULT 0,
+                temp_sum REAL NOT NULL DEFAULT 0,
+                min_temp REAL,
+                max_temp REAL,
+                rssi_count INTEGER NOT NULL DEFAULT 0,
+                rssi_sum REAL NOT NULL DEFAULT 0,
+                duplicate_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        stats_columns = [row[1] for row in cursor.execute('PRAGMA table_info(lorawan_stats)')]
+        if 'duplicate_count' not in stats_columns:
+            cursor.execute('ALTER TABLE lorawan_stats ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lorawan_stats_devices (
+                dev_eui TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        ''')
+        
+        # 기존 DB 최초 적용 시 요약 테이블을 원본 테이블로부터 생성
+        if cursor.execute('SELECT 1 FROM lorawan_stats WHERE id = 1').fetchone() is None:
+            _rebuild_statistics(conn)
+        
+        # 디바이스별 시간 버킷 롤업 (resolution: 버킷 크기(초), bucket: 버킷 시작 epoch)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lorawan_rollup (
+                resolution INTEGER NOT NULL,
+                dev_eui TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                temp_count INTEGER NOT NULL,
+                temp_sum REAL NOT NULL,
+                temp_min REAL,
+                temp_max REAL,
+                rssi_count INTEGER NOT NULL,
+                rssi_sum REAL NOT NULL,
+                rssi_min INTEGER,
+                rssi_max INTEGER,
+                snr_count INTEGER NOT NULL,
+                snr_sum REAL NOT NULL,
+                snr_min REAL,
+                snr_max REAL,
+                PRIMARY KEY (resolution, dev_eui, bucket)
+            ) WITHOUT ROWID
+        ''')
+        
+        # 중복 판정용 (dev_eui, f_cnt) 기록 - 기본 키(유니크 제약)가 메모리 LRU 의 백업 역할
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lorawan_dedup (
+                dev_eui TEXT NOT NULL,
+                f_cnt INTEGER NOT NULL,
+                first_seen INTEGER NOT NULL,
+                PRIMARY KEY (dev_eui, f_cnt)
+            ) WITHOUT ROWID
+        ''')
+        
+        if (cursor.execute('SELECT 1 FROM lorawan_rollup LIMIT 1').fetchone() is None
+                and cursor.execute(f'SELECT 1 FROM {_live_table()} LIMIT 1').fetchone() is not None):
+            logger.warning("⚠️ 롤업 테이블이 비어 있습니다. 기존 데이터 반영: flask --app dataServer backfill-rollups")
+        
+        conn.commit()
+        check_series_plan(conn)
+        logger.info(f"✓ 데이터베이스 초기화 완료: {DB_PATH}")
+
+
+# ==================== 데이터베이스 함수 ====================
+
+def save_lorawan_data(data):
+    """LoRaWAN 데이터를 데이터베이스에 저장"""
+    with db_lock:
+        conn = get_write_connection()
+        try:
+            batch, duplicates, histories = _drop_duplicates(conn, [data])
+            if not batch:
+                _count_duplicates(conn, duplicates)
+                conn.commit()
+                uplink_history.update(histories)
+                if duplicates:
+                    _load_statistics(conn)
+                    bump_data_generation()
+                    logger.info(f"✓ 중복 uplink 무시: {data.get('dev_eui')} f_cnt={data.get('f_cnt')}")
+                return None
+
+            row = _lorawan_row(data)
+            record_id = _insert_rows(conn, [row])
+            _before_commit(conn, [data], record_id, record_id)
+            
+            _timed_commit(conn)
+            rows_inserted_total.inc()
+            uplink_history.update(histories)
+            _after_insert(conn, [_stored_record(record_id, row)])
+            
+            return record_id
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            _device_ids.clear()
+            logger.error(f"✗ 데이터 저장 오류: {e}")
+            return None
+
+
+# lorawan_data 테이블 컬럼 순서 (SELECT * 결과 및 링 버퍼 행 튜플과 동일)
+LORAWAN_COLUMNS = (
+    'id', 'timestamp', 'device_name', 'dev_eui', 'temperature',
+    'rssi', 'snr', 'f_port', 'f_cnt', 'created_at'
+)
+
+LORAWAN_INSERT_SQL = '''
+    INSERT INTO lorawan_data 
+    (timestamp, device_name, dev_eui, temperature, rssi, snr, f_port, f_cnt, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _real(value):
+    """REAL 컬럼 값을 DB 에서 읽을 때와 같은 float 로 (링 버퍼에서 응답해도 20 이 아닌 20.0, 숫자가 아니면 그대로)"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _lorawan_row(data, created_at=None):
+    """처리된 데이터를 INSERT 파라미터 튜플로 변환 (created_at: 배치 공통 저장 시각)"""
+    # created_at 은 DEFAULT CURRENT_TIMESTAMP 와 같은 형식(UTC)으로 직접 채워
+    # 저장된 행을 DB 재조회 없이 링 버퍼에 넣을 수 있게 한다
+    created_at = data.get('created_at') or created_at or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return (
+        data.get('timestamp'),
+        data.get('device_name'),
+        data.get('dev_eui'),
+        _real(data.get('temperature')),
+        data.get('rssi'),
+        _real(data.get('snr')),
+        data.get('f_port'),
+        data.get('f_cnt'),
+        created_at
+    )
+
+
+def save_lorawan_batch(batch):
+    """여러 건의 LoRaWAN 데이터를 하나의 트랜잭션으로 저장 (커밋 1회, 마지막 id 반환)
+
+    중복 uplink 와 재접속(join) 표시는 걸러내고 저장하지 않는다.
+    """
+    return _save_batch(batch)[0]
+
+
+def _save_batch(batch, live=True):
+    """save_lorawan_batch 본체: (마지막 id, 저장 건수, 중복 건수) 반환
+
+    live=False (과거 데이터 가져오기) 이면 알림 평가를 하지 않는다.
+    """
+    with db_lock:
+        conn = get_write_connection()
+        try:
+            batch, duplicates, histories = _drop_duplicates(conn, batch)
+            created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            rows = [_lorawan_row(d, created_at) for d in batch]
+            last_id = None
+            if rows:
+                last_id = _insert_rows(conn, rows)
+                _before_commit(conn, batch, last_id - len(rows) + 1, last_id)
+            _count_duplicates(conn, duplicates)
+            _timed_commit(conn)
+        except Exception:
+            # 잘못된 값(TypeError 등)으로 중간에 실패해도 일부만 반영된 트랜잭션이 다음 커밋에 섞이지 않도록
+            conn.rollback()
+            # 롤백된 디바이스 등록이 캐시에 남지 않도록
+            _device_ids.clear()
+            raise
+        # 중복 판정 기록은 커밋이 끝난 뒤에만 반영 (재시도 시 자기 자신을 중복으로 보지 않도록)
+        uplink_history.update(histories)
+        rows_inserted_total.inc(len(rows))
+        if not rows:
+            if duplicates:
+                _load_statistics(conn)
+                bump_data_generation()
+            return last_id, 0, duplicates
+        # db_lock 아래의 단일 writer 이므로 AUTOINCREMENT id 는 연속으로 부여된다
+        first_id = last_id - len(rows) + 1
+        try:
+            _after_insert(conn, [_stored_record(first_id + i, row) for i, row in enumerate(rows)], live)
+        except Exception as e:
+            # 이미 커밋된 배치이므로 호출 측이 다시 저장하지 않도록 예외를 넘기지 않음
+            logger.error(f"✗ 저장 후 캐시 갱신 오류: {e}")
+            bump_data_generation()
+        return last_id, len(rows), duplicates
+
+
+def _timed_commit(conn):
+    start = time.perf_counter()
+    conn.commit()
+    db_commit_seconds.observe(time.perf_counter() - start)
+
+
+def _before_commit(conn, batch, first_id, last_id):
+    """삽입과 같은 트랜잭션에서 파생 테이블(통계, 롤업) 갱신 (first_id ~ last_id: 삽입된 행)"""
+    _apply_statistics(conn, batch)
+    _apply_rollups(conn, first_id, last_id)
+
+
+def _after_insert(conn, records, live=True):
+    """커밋 완료 후 메모리 캐시 갱신 (records: LORAWAN_COLUMNS 순서의 행 튜플, 오래된 순)"""
+    _load_statistics(conn)
+    recent_buffer.extend(records)
+    device_states.update(records)
+    if live:
+        alert_engine.process(records)
+    bump_data_generation()
+    live_feed.publish(records)
+
+
+def get_latest_rows(limit=20):
+    """최근 데이터 행 튜플 조회 (링 버퍼 크기 이내는 메모리에서, 초과 시 DB 조회)"""
+    if limit <= recent_buffer.capacity:
+        return recent_buffer.latest(limit)
+
+    try:
+        cursor = get_read_connection().cursor()
+        
+        sql, params = select_records_sql(LORAWAN_COLUMNS, order='DESC', limit=limit)
+        cursor.execute(sql, params)
+        
+        return cursor.fetchall()
+        
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+        return []
+
+
+def iter_latest_rows(limit=20):
+    """최근 데이터 행 튜플을 최신 순으로 하나씩 반환 (링 버퍼 초과 시 커서에서 EXPORT_FETCH_SIZE 단위로 읽음)"""
+    if limit <= recent_buffer.capacity:
+        yield from recent_buffer.latest(limit)
+        return
+
+    cursor = get_read_connection().cursor()
+    try:
+        sql, params = select_records_sql(LORAWAN_COLUMNS, order='DESC', limit=limit)
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+    finally:
+        cursor.close()
+
+
+def get_latest_data(limit=20):
+    """최근 데이터 조회 (행마다 컬럼명 dict)"""
+    return [dict(zip(LORAWAN_COLUMNS, row)) for row in get_latest_rows(limit)]
+
+
+def _parse_record_filters(args):
+    """요청 인자(dev_eui, from, to)를 WHERE 조건, 파라미터, 시간 범위로 변환 (잘못된 값은 ValueError)"""
+    # 조건의 컬럼과 값 형식이 스키마 버전에 따라 다름
+    sync_schema()
+    conditions = []
+    params = []
+    time_range = {}
+
+    dev_eui = args.get('dev_eui')
+    if dev_eui and SCHEMA_VERSION >= 2:
+        # devices id 로 미리 바꿔 (device_id) 인덱스로 id 순서대로 읽음 (IN 서브쿼리는 정렬이 따로 필요)
+        device_ids = [row[0] for row in get_read_connection().execute(
+            'SELECT id FROM devices WHERE dev_eui = ?', (dev_eui,)
+        )] or [0]
+        conditions.append(f"d.device_id IN ({', '.join('?' * len(device_ids))})")
+        params.extend(device_ids)
+    elif dev_eui:
+        conditions.append(_dev_eui_condition())
+        params.append(dev_eui)
+
+    # v1 timestamp 는 ISO 문자열이므로 정규화한 ISO 문자열과 사전순 비교, v2 는 정수 ts 비교
+    for name, op in (('from', '>='), ('to', '<')):
+        value = args.get(name)
+        if value:
+            try:
+                value = datetime.fromisoformat(value).isoformat()
+            except ValueError:
+                raise ValueError(f"잘못된 시간 형식: {name}={value}")
+            conditions.append(f'd.{_time_column()} {op} ?')
+            params.append(_time_value(value))
+            time_range[name] = value
+
+    return conditions, params, (time_range.get('from'), time_range.get('to'))
+
+
+def get_records_page(args):
+    """id 기준 키셋 페이지 조회
+
+    - after_id: 해당 id 보다 큰 레코드를 오래된 순으로 (신규 데이터 폴링)
+    - before_id: 해당 id 보다 작은 레코드를 최신 순으로 (과거 페이지)
+    - 둘 다 없으면 최신 레코드부터
+    """
+    conditions, params, time_range = _parse_record_filters(args)
+
+    after_id = args.get('after_id', type=int)
+    before_id = args.get('before_id', type=int)
+    if after_id is not None:
+        conditions.append('d.id > ?')
+        params.append(after_id)
+    if before_id is not None:
+        conditions.append('d.id < ?')
+        params.append(before_id)
+    order = 'ASC' if after_id is not None and before_id is None else 'DESC'
+
+    limit = args.get('limit', RECORDS_DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, RECORDS_MAX_PAGE_SIZE))
+
+    fields = args.get('fields')
+    if fields:
+        columns = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in columns if name not in LORAWAN_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+        # 키셋 커서 계산을 위해 id 는 항상 첫 컬럼
+        if 'id' in columns:
+            columns.remove('id')
+        columns.insert(0, 'id')
+    else:
+        columns = list(LORAWAN_COLUMNS)
+
+    sql, params = select_records_sql(
+        columns, conditions, params, order=order, limit=limit + 1,
+        time_range=time_range, id_range=(after_id, before_id)
+    )
+    rows = get_read_connection().execute(sql, params).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    ids = [row[0] for row in rows]
+
+    return {
+        'columns': columns,
+        'rows': rows,
+        'has_more': has_more,
+        'next_after_id': max(ids) if ids else after_id,
+        'next_before_id': min(ids) if ids else before_id
+    }
+
+
+# 디바이스 원본 시계열 컬럼 (시간순)
+SERIES_COLUMNS = ('timestamp', 'temperature', 'rssi', 'snr', 'f_cnt')
+
+
+def series_sql(time_range):
+    """디바이스 한 개의 [from, to) 원본 행을 시간순으로 읽는 SQL (파라미터: dev_eui, from, to 반복 + limit)
+
+    각 파티션에서 (dev_eui, timestamp) / (device_id, ts) 복합 인덱스 범위 스캔 한 번으로 끝나도록
+    시간 컬럼 원본 값으로 조건과 정렬을 건다 (v2 의 ts 는 조회 후 ISO 문자열로 변환).
+    """
+    tables = _partition_tables(time_range)
+    time_column = _time_column()
+    where = f"{_dev_eui_condition()} AND d.{time_column} >= ? AND d.{time_column} < ?"
+    columns = ', '.join(f'd.{column}' for column in (time_column,) + SERIES_COLUMNS[1:])
+    sql = ' UNION ALL '.join(f"SELECT {columns} FROM {table} d WHERE {where}" for table in tables)
+    return sql + ' ORDER BY 1 LIMIT ?', len(tables)
+
+
+def get_device_series(dev_eui, start, end, limit=SERIES_DEFAULT_LIMIT):
+    """디바이스의 [start, end) 원본 시계열 조회 (start, end: naive datetime)"""
+    time_range = (start.isoformat(), end.isoformat())
+    sql, table_count = series_sql(time_range)
+    params = [dev_eui, _time_value(time_range[0]), _time_value(time_range[1])] * table_count
+    rows = get_read_connection().execute(sql, params + [limit + 1]).fetchall()
+
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+    if SCHEMA_VERSION >= 2:
+        rows = [(_micros_to_iso(row[0]),) + row[1:] for row in rows]
+
+    return {
+        'dev_eui': dev_eui,
+        'from': time_range[0],
+        'to': time_range[1],
+        'columns': list(SERIES_COLUMNS),
+        'rows': rows,
+        'truncated': truncated
+    }
+
+
+def check_series_plan(conn):
+    """디바이스 시계열 조회가 테이블마다 복합 인덱스 범위 스캔을 쓰는지 쿼리 플랜으로 확인"""
+    now = datetime.now().replace(microsecond=0)
+    time_range = ((now - timedelta(days=30)).isoformat(), now.isoformat())
+    sql, table_count = series_sql(time_range)
+    params = ['', _time_value(time_range[0]), _time_value(time_range[1])] * table_count + [1]
+    plan = [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+    index_suffix = '_device_ts' if SCHEMA_VERSION >= 2 else 'dev_eui_timestamp'
+    range_scans = [detail for detail in plan if index_suffix in detail and '>?' in detail]
+    full_scans = [detail for detail in plan if detail.startswith('SCAN d')]
+    if len(range_scans) == table_count and not full_scans:
+        logger.info(f"✓ 디바이스 시계열 쿼리 플랜: 테이블 {table_count}개 모두 복합 인덱스 범위 스캔")
+        return True
+    logger.warning(f"⚠️ 디바이스 시계열 쿼리가 복합 인덱스를 쓰지 않습니다: {' / '.join(plan)}")
+    return False
+
+
+# ==================== 최근 데이터 링 버퍼 ====================
+
+class RecentBuffer:
+    """최근 레코드 링 버퍼 (고정 크기 슬롯 배열, 행 튜플 저장)"""
+
+    __slots__ = ('capacity', '_slots', '_next', '_size', '_lock')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next = 0      # 다음에 쓸 슬롯 위치
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, rows):
+        """행 추가 (rows: 오래된 순)"""
+        with self._lock:
+            for row in rows:
+                self._slots[self._next] = row
+                self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + len(rows), self.capacity)
+
+    def latest(self, limit):
+        """최근 limit 개 행 반환 (최신 순)"""
+        with self._lock:
+            count = min(limit, self._size)
+            if count <= 0:
+                return []
+            start = self._next - count
+            if start >= 0:
+                rows = self._slots[start:self._next]
+            else:
+                rows = self._slots[start:] + self._slots[:self._next]
+        rows.reverse()
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._slots = [None] * self.capacity
+            self._next = 0
+            self._size = 0
+
+
+recent_buffer = RecentBuffer(RECENT_BUFFER_SIZE)
+
+
+def warm_recent_buffer():
+    """DB의 최근 데이터로 링 버퍼 채우기 (시작 시 호출)"""
+    try:
+        sql, params = select_records_sql(LORAWAN_COLUMNS, order='DESC', limit=recent_buffer.capacity)
+        rows = get_read_connection().execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        logger.error(f"✗ 링 버퍼 초기화 오류: {e}")
+        return
+    rows.reverse()
+    recent_buffer.clear()
+    recent_buffer.extend(rows)
+    logger.info(f"✓ 링 버퍼 초기화 완료: {len(rows)}건")
+
+
+# ==================== 디바이스별 최신 상태 ====================
+
+class DeviceStateCache:
+    """dev_eui 별 마지막 수신 값과 수신 횟수 (메모리 맵)"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    @staticmethod
+    def _state(row, uplink_count):
+        record = dict(zip(LORAWAN_COLUMNS, row))
+        return {
+            'dev_eui': record['dev_eui'],
+            'device_name': record['device_name'],
+            'temperature': record['temperature'],
+            'rssi': record['rssi'],
+            'snr': record['snr'],
+            'f_port': record['f_port'],
+            'f_cnt': record['f_cnt'],
+            'last_id': record['id'],
+            'last_seen': record['timestamp'],
+            'uplink_count': uplink_count
+        }
+
+    def update(self, records):
+        """저장된 행 반영 (records: LORAWAN_COLUMNS 순서의 행 튜플, 오래된 순)"""
+        dev_eui_idx = LORAWAN_COLUMNS.index('dev_eui')
+        # 디바이스별 마지막 행과 건수만 반영 (대량 배치에서도 상태 dict 는 디바이스 수만큼만 생성)
+        counts = Counter(row[dev_eui_idx] for row in records)
+        latest = {row[dev_eui_idx]: row for row in records}
+        with self._lock:
+            for dev_eui, row in latest.items():
+                previous = self._states.get(dev_eui)
+                count = previous['uplink_count'] + counts[dev_eui] if previous else counts[dev_eui]
+                self._states[dev_eui] = self._state(row, count)
+
+    def load(self, rows_with_counts):
+        """(행 튜플, 수신 횟수) 목록으로 전체 교체"""
+        states = {}
+        for row, count in rows_with_counts:
+            state = self._state(row, count)
+            states[state['dev_eui']] = state
+        with self._lock:
+            self._states = states
+
+    def get(self, dev_eui):
+        state = self._states.get(dev_eui)
+        return dict(state) if state else None
+
+    def snapshot(self):
+        """전체 디바이스 상태 목록 (최근 수신 순)"""
+        with self._lock:
+            states = [dict(state) for state in self._states.values()]
+        states.sort(key=lambda state: state['last_id'], reverse=True)
+        return states
+
+
+device_states = DeviceStateCache()
+
+
+def warm_device_states():
+    """DB로부터 디바이스별 최신 상태 재구성 (시작 시 호출)"""
+    columns = ', '.join(f'd.{name}' for name in LORAWAN_COLUMNS)
+    try:
+        cursor = get_read_connection().execute(f'''
+            SELECT {columns}, g.uplink_count
+            FROM (
+                SELECT dev_eui, MAX(id) AS last_id, COUNT(*) AS uplink_count
+                FROM lorawan_data_all
+                GROUP BY dev_eui
+            ) g
+            JOIN lorawan_data_all d ON d.id = g.last_id
+        ''')
+        device_states.load((row[:-1], row[-1]) for row in cursor)
+    except sqlite3.Error as e:
+        logger.error(f"✗ 디바이스 상태 초기화 오류: {e}")
+        return
+    logger.info(f"✓ 디바이스 상태 초기화 완료: {len(device_states)}개")
+
+
+# ==================== 실시간 피드 (Server-Sent Events) ====================
+#
+# 저장된 행과 갱신된 통계를 구독 중인 대시보드로 전송한다.
+# 이벤트는 저장 시 한 번만 직렬화되므로 서버 부하는 시청자 수가 아닌 수신량에 비례한다.
+
+def _format_sse(records):
+    """행 튜플 목록을 SSE 'uplink' 이벤트 문자열로 변환 (id: 마지막 레코드 id)"""
+    payload = {
+        'records': [dict(zip(LORAWAN_COLUMNS, row)) for row in records],
+        'stats': get_statistics()
+    }
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"id: {records[-1][0]}\nevent: uplink\ndata: {data}\n\n"
+
+
+class LiveFeed:
+    """SSE 구독자 관리 (구독자별 이벤트 큐)"""
+
+    def __init__(self, max_subscribers):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """구독 등록 (최대 구독자 수 초과 시 None)"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, records):
+        """새 행을 모든 구독자에게 전송"""
+        if not self._subscribers or not records:
+            return
+        message = _format_sse(records)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # 따라오지 못하는 구독자는 연결을 끊는다 (재연결 시 Last-Event-ID 로 이어받음)
+                self.unsubscribe(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
+
+
+live_feed = LiveFeed(SSE_MAX_SUBSCRIBERS)
+
+
+# ==================== 알림 (임계값 / 무응답 디바이스) ====================
+#
+# 저장된 행마다 ALERT_RULES 를 평가하고 (규칙/디바이스별 상태로 히스테리시스 적용),
+# 디바이스마다 다음 uplink 기한을 최소 힙에 넣어 기한이 지난 디바이스만 꺼내 무응답으로 본다.
+# (uplink 마다 힙 삽입 O(log n), 갱신된 디바이스의 이전 항목은 꺼낼 때 버림)
+# 알림은 대기열을 거쳐 별도 스레드에서 notifier 로 전송하므로 저장 경로를 막지 않는다.
+# 평가는 저장을 담당하는 프로세스(standalone / writer)에서만 한다 (읽기 워커는 start_alerting 안 함).
+
+ALERT_OPS = {'>': lambda value, limit: value > limit, '<': lambda value, limit: value < limit}
+
+
+class FileNotifier:
+    """알림을 파일에 한 줄씩 JSON 으로 기록"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, 'ab') as f:
+            f.write(_json_bytes(alert) + b'\n')
+
+    def silent_alerts(self):
+        """기록에서 해제되지 않은 무응답 알림 (dev_eui -> 알림, 재시작 시 같은 알림을 다시 보내지 않도록)"""
+        alerts = {}
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        alert = _json_loads(line)
+                    except ValueError:
+                        continue    # 기록 중 중단된 마지막 줄
+                    if alert.get('type') != 'silent':
+                        continue
+                    if alert.get('state') == 'firing':
+                        alerts[alert['dev_eui']] = alert
+                    else:
+                        alerts.pop(alert['dev_eui'], None)
+        except FileNotFoundError:
+            pass
+        return alerts
+
+
+class WebhookNotifier:
+    """알림을 JSON 본문으로 POST"""
+
+    def __init__(self, url, timeout=ALERT_WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        request = Request(self.url, data=_json_bytes(alert), headers={'Content-Type': 'application/json'})
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def _local_epoch(timestamp, default=None):
+    """시간대 없는 로컬 ISO 시간 문자열을 epoch 초로 (time.time() 과 비교용, 읽을 수 없으면 default)"""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class AlertEngine:
+    """임계값 규칙과 무응답 디바이스 감지 (process 는 db_lock 안, check_silent 는 감시 스레드에서 호출)"""
+
+    def __init__(self, rules, silent_after):
+        self.rules = self._compile(rules)
+        self.silent_after = silent_after
+        self.notifiers = []
+        self.enabled = False
+        self._active = {}          # (규칙 이름, dev_eui) 또는 ('silent', dev_eui) -> 발생한 알림
+        self._deadlines = {}       # dev_eui -> 다음 uplink 기한 (epoch 초)
+        self._heap = []            # (기한, dev_eui)
+        self._names = {}           # dev_eui -> device_name (무응답 알림용)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=ALERT_QUEUE_SIZE)
+
+    @staticmethod
+    def _compile(rules):
+        compiled = []
+        for rule in rules:
+            if rule['metric'] not in ('temperature', 'rssi', 'snr') or rule['op'] not in ALERT_OPS:
+                raise ValueError(f"잘못된 알림 규칙: {rule}")
+            clear = rule.get('clear', rule['threshold'])
+            # 해제 기준은 발생 기준과 같거나 정상 쪽에 있어야 함
+            if ALERT_OPS[rule['op']](clear, rule['threshold']):
+                raise ValueError(f"잘못된 알림 해제 기준: {rule}")
+            compiled.append((rule['name'], LORAWAN_COLUMNS.index(rule['metric']), rule['metric'],
+                             ALERT_OPS[rule['op']], rule['threshold'], clear, rule.get('dev_eui')))
+        return compiled
+
+    def _emit(self, alert):
+        alert['time'] = datetime.now().isoformat()
+        alerts_total.inc(1, (alert['type'], alert['state']))
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            logger.error(f"✗ 알림 대기열 가득 참, 버림: {alert['type']} {alert['dev_eui']}")
+
+    def process(self, records):
+        """저장된 행 평가 (records: LORAWAN_COLUMNS 순서의 행 튜플, 오래된 순)"""
+        if not self.enabled:
+            return
+        dev_eui_idx = LORAWAN_COLUMNS.index('dev_eui')
+        name_idx = LORAWAN_COLUMNS.index('device_name')
+        timestamp_idx = LORAWAN_COLUMNS.index('timestamp')
+        now = time.time()
+        with self._lock:
+            for row in records:
+                dev_eui = row[dev_eui_idx]
+                for name, index, metric, breached, threshold, clear, only in self.rules:
+                    value = row[index]
+                    if value is None or (only is not None and only != dev_eui):
+                        continue
+                    key = (name, dev_eui)
+                    if key not in self._active:
+                        if breached(value, threshold):
+                            alert = {'type': 'threshold', 'state': 'firing', 'rule': name,
+                                     'dev_eui': dev_eui, 'device_name': row[name_idx], 'metric': metric,
+                                     'value': value, 'threshold': threshold, 'timestamp': row[timestamp_idx]}
+                            self._active[key] = alert
+                            self._emit(dict(alert))
+                    elif not breached(value, clear):
+                        alert = self._active.pop(key)
+                        self._emit(dict(alert, state='resolved', value=value, timestamp=row[timestamp_idx]))
+
+                if self.silent_after:
+                    silent = self._active.pop(('silent', dev_eui), None)
+                    if silent is not None:
+                        self._emit(dict(silent, state='resolved', timestamp=row[timestamp_idx]))
+                    deadline = now + self.silent_after
+                    self._deadlines[dev_eui] = deadline
+                    self._names[dev_eui] = row[name_idx]
+                    heapq.heappush(self._heap, (deadline, dev_eui))
+
+            # 갱신으로 버려진 항목이 많아지면 힙 재구성
+            if len(self._heap) > 2 * len(self._deadlines) + 1024:
+                self._heap = [(deadline, dev_eui) for dev_eui, deadline in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def watch(self, devices, reported=None):
+        """시작 시 알려진 디바이스를 마지막 수신 시각부터 무응답 감시
+
+        devices: (dev_eui, device_name, 마지막 수신 epoch 초) 목록
+        reported: 이전 실행에서 보낸 뒤 해제되지 않은 무응답 알림 (dev_eui -> 알림).
+                  그 뒤로 수신이 없던 디바이스는 다시 보내지 않고 발생 중인 알림으로 복원한다.
+        """
+        reported = reported or {}
+        with self._lock:
+            for dev_eui, device_name, last_seen in devices:
+                if dev_eui in self._deadlines or ('silent', dev_eui) in self._active:
+                    continue
+                alert = reported.get(dev_eui)
+                # 알림 이후에 다시 수신했다면 마지막 수신은 알림의 last_seen + silent_after 이후
+                if alert is not None and last_seen < _local_epoch(alert.get('last_seen'), 0) + self.silent_after:
+                    self._active[('silent', dev_eui)] = {key: value for key, value in alert.items() if key != 'time'}
+                    continue
+                deadline = last_seen + self.silent_after
+                self._deadlines[dev_eui] = deadline
+                self._names[dev_eui] = device_name
+                heapq.heappush(self._heap, (deadline, dev_eui))
+
+    def check_silent(self, now=None):
+        """기한이 지난 디바이스를 무응답 알림으로 전환 (발생 건수 반환)"""
+        now = now or time.time()
+        fired = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, dev_eui = heapq.heappop(self._heap)
+                if self._deadlines.get(dev_eui) != deadline:
+                    continue    # 이후 uplink 로 기한이 갱신된 항목
+                del self._deadlines[dev_eui]
+                alert = {'type': 'silent', 'state': 'firing', 'rule': 'silent', 'dev_eui': dev_eui,
+                         'device_name': self._names.get(dev_eui), 'silent_after': self.silent_after,
+                         'last_seen': datetime.fromtimestamp(deadline - self.silent_after).isoformat()}
+                self._active[('silent', dev_eui)] = alert
+                self._emit(dict(alert))
+                fired += 1
+        return fired
+
+    def active(self):
+        """현재 발생 중인 알림 목록"""
+        with self._lock:
+            return [dict(alert) for alert in self._active.values()]
+
+    def deliver(self, timeout=None):
+        """대기열의 알림 하나를 모든 notifier 로 전송 (대기열이 비어 timeout 이 지나면 False)"""
+        try:
+            alert = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        for notifier in self.notifiers:
+            try:
+                notifier.send(alert)
+            except Exception as e:
+                logger.error(f"✗ 알림 전송 오류 ({type(notifier).__name__}): {e}")
+        return True
+
+
+alert_engine = AlertEngine(ALERT_RULES, ALERT_SILENT_AFTER)
+_alert_thread = None
+
+
+def _alert_loop():
+    next_check = time.monotonic() + ALERT_CHECK_INTERVAL
+    while True:
+        alert_engine.deliver(timeout=max(0.0, next_check - time.monotonic()))
+        if time.monotonic() >= next_check:
+            try:
+                alert_engine.check_silent()
+            except Exception as e:
+                logger.error(f"✗ 무응답 디바이스 확인 오류: {e}")
+            next_check = time.monotonic() + ALERT_CHECK_INTERVAL
+
+
+def start_alerting():
+    """알림 평가/전송 스레드 시작 (디바이스 상태를 읽은 뒤 호출)"""
+    global _alert_thread
+    if _alert_thread is not None:
+        return
+    if ALERT_FILE:
+        alert_engine.notifiers.append(FileNotifier(ALERT_FILE))
+    if ALERT_WEBHOOK_URL:
+        alert_engine.notifiers.append(WebhookNotifier(ALERT_WEBHOOK_URL))
+    if ALERT_SILENT_AFTER:
+        # 기한은 시작 시각이 아닌 마지막 수신 시각부터 (이미 알린 무응답 디바이스는 재시작마다 다시 알리지 않음)
+        reported = {}
+        for notifier in alert_engine.notifiers:
+            if isinstance(notifier, FileNotifier):
+                reported.update(notifier.silent_alerts())
+        now = time.time()
+        alert_engine.watch(
+            ((state['dev_eui'], state['device_name'], _local_epoch(state['last_seen'], now))
+             for state in device_states.snapshot()),
+            reported
+        )
+    alert_engine.enabled = True
+    _alert_thread = threading.Thread(target=_alert_loop, name='alerting', daemon=True)
+    _alert_thread.start()
+    logger.info(f"✓ 알림 시작: 규칙 {len(alert_engine.rules)}개, 무응답 기준 {ALERT_SILENT_AFTER}초")
+
+
+# ==================== 통계 (누적 집계) ====================
+#
+# 통계는 lorawan_stats (단일 행) 과 lorawan_stats_devices (디바이스 집합) 에
+# 삽입과 같은 트랜잭션에서 누적 갱신되고, 커밋 후 메모리 캐시로 읽힌다.
+# 행 삭제 등으로 값이 어긋나면 rebuild_statistics() (flask rebuild-stats) 로 재계산한다.
+
+_stats_cache = None
+
+
+def _apply_statistics(conn, batch):
+    """삽입되는 배치만큼 통계 요약 테이블을 누적 갱신 (커밋은 호출자가 수행)"""
+    temps = [d.get('temperature') for d in batch if d.get('temperature') is not None]
+    rssis = [d.get('rssi') for d in batch if d.get('rssi') is not None]
+
+    before = conn.total_changes
+    conn.executemany(
+        'INSERT OR IGNORE INTO lorawan_stats_devices (dev_eui) VALUES (?)',
+        [(dev_eui,) for dev_eui in {d.get('dev_eui') for d in batch}]
+    )
+    new_devices = conn.total_changes - before
+
+    conn.execute('''
+        UPDATE lorawan_stats SET
+            total_count = total_count + ?,
+            device_count = device_count + ?,
+            temp_count = temp_count + ?,
+            temp_sum = temp_sum + ?,
+            min_temp = COALESCE(MIN(min_temp, ?), min_temp, ?),
+            max_temp = COALESCE(MAX(max_temp, ?), max_temp, ?),
+            rssi_count = rssi_count + ?,
+            rssi_sum = rssi_sum + ?
+        WHERE id = 1
+    ''', (
+        len(batch),
+        new_devices,
+        len(temps),
+        sum(temps),
+        min(temps, default=None), min(temps, default=None),
+        max(temps, default=None), max(temps, default=None),
+        len(rssis),
+        sum(rssis)
+    ))
+
+
+def _rebuild_statistics(conn):
+    """원본 테이블 전체를 집계하여 통계 요약 테이블 재생성 (커밋은 호출자가 수행)"""
+    conn.execute('DELETE FROM lorawan_stats_devices')
+    conn.execute('''
+        INSERT INTO lorawan_stats_devices (dev_eui)
+        SELECT DISTINCT dev_eui FROM lorawan_data_all
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO lorawan_stats
+        (id, total_count, device_count, temp_count, temp_sum, min_temp, max_temp, rssi_count, rssi_sum,
+         duplicate_count)
+        SELECT
+            1,
+            COUNT(*),
+            (SELECT COUNT(*) FROM lorawan_stats_devices),
+            COUNT(temperature),
+            COALESCE(SUM(temperature), 0),
+            MIN(temperature),
+            MAX(temperature),
+            COUNT(rssi),
+            COALESCE(SUM(rssi), 0),
+            -- 중복 건수는 원본 테이블로부터 다시 셀 수 없으므로 유지
+            COALESCE((SELECT duplicate_count FROM lorawan_stats WHERE id = 1), 0)
+        FROM lorawan_data_all
+    ''')
+
+
+def _load_statistics(conn):
+    """요약 테이블에서 통계를 읽어 메모리 캐시 갱신"""
+    global _stats_cache
+    row = conn.execute('''
+        SELECT total_count, device_count, temp_count, temp_sum, min_temp, max_temp, rssi_count, rssi_sum,
+               duplicate_count
+        FROM lorawan_stats WHERE id = 1
+    ''').fetchone()
+    if row is None:
+        return None
+    (total_count, device_count, temp_count, temp_sum, min_temp, max_temp, rssi_count, rssi_sum,
+     duplicate_count) = row
+    _stats_cache = {
+        'total_count': total_count,
+        'device_count': device_count,
+        'avg_temp': temp_sum / temp_count if temp_count else None,
+        'min_temp': min_temp,
+        'max_temp': max_temp,
+        'avg_rssi': rssi_sum / rssi_count if rssi_count else None,
+        'duplicate_count': duplicate_count
+    }
+    return _stats_cache
+
+
+def rebuild_statistics():
+    """통계 요약 테이블을 원본 테이블로부터 재계산"""
+    with db_lock:
+        conn = get_write_connection()
+        try:
+            _rebuild_statistics(conn)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return _load_statistics(conn)
+
+
+def get_statistics():
+    """통계 정보 조회 (O(1) - 메모리 캐시 또는 요약 테이블 한 행)"""
+    stats = _stats_cache
+    if stats is not None:
+        return dict(stats)
+    try:
+        stats = _load_statistics(get_read_connection())
+        return dict(stats) if stats else {}
+        
+    except sqlite3.Error as e:
+        logger.error(f"✗ 통계 조회 오류: {e}")
+        return {}
+
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """통계 요약 테이블 재계산: flask --app dataServer rebuild-stats"""
+    stats = rebuild_statistics()
+    print(f"✓ 통계 재계산 완료: {stats}")
+
+
+# ==================== 시간 버킷 롤업 ====================
+#
+# 디바이스별로 ROLLUP_RESOLUTIONS 의 각 해상도(1분/1시간/1일) 버킷에
+# 온도, RSSI, SNR 의 count/sum/min/max 를 누적한다 (mean = sum / count).
+# 버킷은 timestamp(로컬 시각 ISO 문자열)를 UTC 로 간주한 epoch 기준이며,
+# 백필 SQL 의 strftime('%s', timestamp) 와 같은 값이 된다.
+
+ROLLUP_METRICS = ('temp', 'rssi', 'snr')
+
+# 삽입된 id 범위의 행을 모든 해상도의 버킷으로 집계해 누적 ({rows}: 별칭 d 기준 원본 행 조회)
+ROLLUP_APPLY_SQL = '''
+    INSERT INTO lorawan_rollup (
+        resolution, dev_eui, bucket, count,
+        temp_count, temp_sum, temp_min, temp_max,
+        rssi_count, rssi_sum, rssi_min, rssi_max,
+        snr_count, snr_sum, snr_min, snr_max
+    )
+    SELECT
+        r.resolution, dev_eui, epoch - epoch % r.resolution, COUNT(*),
+        COUNT(temperature), COALESCE(SUM(temperature), 0), MIN(temperature), MAX(temperature),
+        COUNT(rssi), COALESCE(SUM(rssi), 0), MIN(rssi), MAX(rssi),
+        COUNT(snr), COALESCE(SUM(snr), 0), MIN(snr), MAX(snr)
+    FROM ({rows}) AS b, ({resolutions}) AS r
+    WHERE epoch IS NOT NULL
+    GROUP BY r.resolution, dev_eui, epoch - epoch % r.resolution
+    ON CONFLICT (resolution, dev_eui, bucket) DO UPDATE SET
+        count = count + excluded.count,
+''' + ',\n'.join(
+    f'''        {m}_count = {m}_count + excluded.{m}_count,
+        {m}_sum = {m}_sum + excluded.{m}_sum,
+        {m}_min = COALESCE(MIN({m}_min, excluded.{m}_min), {m}_min, excluded.{m}_min),
+        {m}_max = COALESCE(MAX({m}_max, excluded.{m}_max), {m}_max, excluded.{m}_max)'''
+    for m in ROLLUP_METRICS
+)
+
+
+def _epoch_seconds(timestamp):
+    """ISO 시간 문자열을 (UTC 로 간주한) epoch 초로 변환"""
+    return calendar.timegm(datetime.fromisoformat(timestamp).timetuple())
+
+
+def _apply_rollups(conn, first_id, last_id):
+    """방금 삽입한 id 범위(현재 파티션)의 행을 버킷별로 집계하여 롤업 테이블에 누적 (커밋은 호출자가 수행)
+
+    배치 크기와 관계없이 SQL 한 번으로 집계하므로 대량 가져오기에서도 행마다 Python 연산이 없다.
+    """
+    if SCHEMA_VERSION >= 2:
+        epoch = 'd.ts / 1000000'
+    else:
+        epoch = "CAST(strftime('%s', d.timestamp) AS INTEGER)"
+    rows = (f"SELECT {_column_sql('dev_eui')} AS dev_eui, d.temperature, d.rssi, d.snr, {epoch} AS epoch "
+            f"FROM {_source_sql(_live_table(), ('dev_eui',))} WHERE d.id BETWEEN ? AND ?")
+    resolutions = ' UNION ALL '.join(f'SELECT {resolution} AS resolution' for resolution in ROLLUP_RESOLUTIONS)
+    conn.execute(ROLLUP_APPLY_SQL.format(rows=rows, resolutions=resolutions), (first_id, last_id))
+
+
+def _rebuild_rollups(conn):
+    """원본 테이블 전체로부터 롤업 테이블 재생성 (커밋은 호출자가 수행)"""
+    conn.execute('DELETE FROM lorawan_rollup')
+    for resolution in ROLLUP_RESOLUTIONS:
+        conn.execute(f'''
+            INSERT INTO lorawan_rollup
+            SELECT
+                ?, dev_eui, epoch - epoch % ?, COUNT(*),
+                COUNT(temperature), COALESCE(SUM(temperature), 0), MIN(temperature), MAX(temperature),
+                COUNT(rssi), COALESCE(SUM(rssi), 0), MIN(rssi), MAX(rssi),
+                COUNT(snr), COALESCE(SUM(snr), 0), MIN(snr), MAX(snr)
+            FROM (
+                SELECT *, CAST(strftime('%s', timestamp) AS INTEGER) AS epoch
+                FROM lorawan_data_all
+            )
+            WHERE epoch IS NOT NULL
+            GROUP BY dev_eui, epoch - epoch % ?
+        ''', (resolution, resolution, resolution))
+
+
+def rebuild_rollups():
+    """롤업 테이블을 원본 테이블로부터 재계산"""
+    with db_lock:
+        conn = get_write_connection()
+        try:
+            _rebuild_rollups(conn)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return conn.execute('SELECT COUNT(*) FROM lorawan_rollup').fetchone()[0]
+
+
+def choose_rollup_resolution(start_epoch, end_epoch, points):
+    """포인트 수 예산 안에 들어오는 가장 세밀한 해상도 선택 (없으면 가장 큰 해상도)"""
+    span = max(end_epoch - start_epoch, 0)
+    for resolution in sorted(ROLLUP_RESOLUTIONS):
+        if span / resolution <= points:
+            return resolution
+    return max(ROLLUP_RESOLUTIONS)
+
+
+def get_device_history(dev_eui, start, end, points=ROLLUP_DEFAULT_POINTS):
+    """디바이스의 [start, end) 구간 롤업 시계열 조회 (start, end: naive datetime)"""
+    start_epoch = calendar.timegm(start.timetuple())
+    end_epoch = calendar.timegm(end.timetuple())
+    resolution = choose_rollup_resolution(start_epoch, end_epoch, points)
+
+    cursor = get_read_connection().execute('''
+        SELECT bucket, count,
+               temp_count, temp_sum, temp_min, temp_max,
+               rssi_count, rssi_sum, rssi_min, rssi_max,
+               snr_count, snr_sum, snr_min, snr_max
+        FROM lorawan_rollup
+        WHERE resolution = ? AND dev_eui = ? AND bucket >= ? AND bucket < ?
+        ORDER BY bucket
+    ''', (resolution, dev_eui, start_epoch - start_epoch % resolution, end_epoch))
+
+    series = []
+    for row in cursor:
+        point = {
+            'time': datetime.fromtimestamp(row[0], timezone.utc).replace(tzinfo=None).isoformat(),
+            'count': row[1]
+        }
+        for i, metric in enumerate(ROLLUP_METRICS):
+            count, total, minimum, maximum = row[2 + i * 4:6 + i * 4]
+            point[f'{metric}_min'] = minimum
+            point[f'{metric}_max'] = maximum
+            point[f'{metric}_mean'] = total / count if count else None
+        series.append(point)
+
+    return {
+        'dev_eui': dev_eui,
+        'resolution': resolution,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'points': series
+    }
+
+
+@app.cli.command('backfill-rollups')
+def backfill_rollups_command():
+    """기존 데이터로 롤업 테이블 재생성: flask --app dataServer backfill-rollups"""
+    count = rebuild_rollups()
+    print(f"✓ 롤업 백필 완료: {count}개 버킷")
+
+
+# ==================== 분석 (백분위 / 히스토그램 / 링크 품질) ====================
+#
+# 구간의 행을 NumPy 컬럼 배열로 읽어 한 번에 계산한다 (행마다 Python 루프를 돌지 않음).
+# - 온도 백분위 (ANALYTICS_PERCENTILES), RSSI/SNR 백분위와 히스토그램
+# - 패킷 손실: 디바이스별로 id 순 정렬한 f_cnt 의 증가폭 - 1 을 손실로 합산
+#   (0 이하나 ANALYTICS_MAX_FCNT_GAP 초과는 재접속/카운터 초기화로 보고 제외)
+# - 링크 점수 (0~100): 평균 RSSI, 평균 SNR, 수신율을 각각 0~1 로 맞춰 가중 합
+# 결과는 (dev_eui, from, to) 구간별로 캐시하고, 데이터 세대가 같거나
+# ANALYTICS_CACHE_MAX_AGE 초 이내면 다시 계산하지 않는다. 그보다 오래된 결과는 백그라운드에서
+# 다시 계산하는 동안 그대로 돌려주므로 첫 계산 뒤로는 응답이 행 수와 무관하다.
+# from/to 를 생략한 기본 구간(최근 24시간)은 요청 시각과 관계없이 한 키로 캐시한다.
+
+ANALYTICS_VALUE_COLUMNS = ('temperature', 'rssi', 'snr', 'f_cnt')
+
+_analytics_cache = OrderedDict()    # (dev_eui, from, to) -> (데이터 세대, 계산 시각, 결과)
+_analytics_refreshing = set()       # 백그라운드에서 다시 계산 중인 키
+_analytics_lock = threading.Lock()
+
+
+def analytics_sql(conditions, time_range):
+    """분석용 (id, 디바이스 키, 값 컬럼) 을 id 순으로 읽는 SQL 과 파티션 수
+
+    v2 는 devices 를 조인하지 않고 정수 device_id 를 디바이스 키로 읽는다 (dev_eui 는 나중에 한 번에 조회).
+    """
+    tables = _partition_tables(time_range)
+    device_column = 'd.device_id' if SCHEMA_VERSION >= 2 else 'd.dev_eui'
+    columns = ', '.join(['d.id', device_column] + [f'd.{column}' for column in ANALYTICS_VALUE_COLUMNS])
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = ' UNION ALL '.join(f"SELECT {columns} FROM {table} d{where}" for table in tables)
+    return sql + ' ORDER BY 1', len(tables)
+
+
+def _load_analytics_arrays(filters):
+    """조건에 맞는 행을 (디바이스 번호 배열, 번호별 dev_eui 목록, 값 컬럼 배열 dict) 로 읽기 (id 순)"""
+    conditions, params, time_range = _parse_record_filters(filters)
+    sql, table_count = analytics_sql(conditions, time_range)
+    keys = []
+    values = {column: [] for column in ANALYTICS_VALUE_COLUMNS}
+
+    conn = get_read_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params * table_count)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            _, device_keys, *columns = zip(*rows)
+            keys.append(device_keys)
+            # None 은 float 배열에서 NaN 이 된다
+            for column, data in zip(values, columns):
+                values[column].append(np.array(data, dtype=np.float64))
+    finally:
+        cursor.close()
+
+    values = {column: np.concatenate(chunks) if chunks else np.empty(0) for column, chunks in values.items()}
+    if SCHEMA_VERSION >= 2:
+        device_keys = np.concatenate([np.array(chunk, dtype=np.int64) for chunk in keys]) if keys else []
+        device_ids, device = np.unique(device_keys, return_inverse=True)
+        names = dict(conn.execute('SELECT id, dev_eui FROM devices'))
+        dev_euis = [names.get(device_id) for device_id in device_ids.tolist()]
+    else:
+        index = {}
+        device = np.fromiter((index.setdefault(key, len(index)) for chunk in keys for key in chunk),
+                             dtype=np.int64)
+        dev_euis = list(index)
+    return device.astype(np.int64), dev_euis, values
+
+
+def _round_list(values, digits=2):
+    """NumPy 배열을 JSON 용 리스트로 (NaN 은 None)"""
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def _distribution(values, bins=None):
+    """NaN 을 뺀 값의 개수/평균/최소/최대/백분위 (bins=(시작, 끝, 폭) 이면 히스토그램 포함)"""
+    values = values[~np.isnan(values)]
+    result = {'count': int(values.size)}
+    if values.size:
+        percentiles = np.percentile(values, ANALYTICS_PERCENTILES)
+        result.update(
+            mean=round(float(values.mean()), 2),
+            min=round(float(values.min()), 2),
+            max=round(float(values.max()), 2),
+            percentiles={f'p{q}': value for q, value in zip(ANALYTICS_PERCENTILES, _round_list(percentiles))}
+        )
+    if bins is not None:
+        start, stop, width = bins
+        edges = np.arange(start, stop + width / 2, width)
+        counts, _ = np.histogram(np.clip(values, start, stop), bins=edges)
+        result['histogram'] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+    return result
+
+
+def _group_mean(device, values, device_count):
+    """디바이스별 평균 (NaN 제외, 값이 없으면 NaN)"""
+    valid = ~np.isnan(values)
+    counts = np.bincount(device[valid], minlength=device_count)
+    sums = np.bincount(device[valid], weights=values[valid], minlength=device_count)
+    return np.divide(sums, counts, out=np.full(device_count, np.nan), where=counts > 0)
+
+
+def _scale(values, value_range):
+    low, high = value_range
+    return np.nan_to_num(np.clip((values - low) / (high - low), 0, 1), nan=0.0)
+
+
+def compute_analytics(dev_eui=None, start=None, end=None):
+    """[start, end) 구간 (naive datetime) 의 분포, 손실, 디바이스별 링크 점수 계산
+
+    end 가 None 이면 최신 데이터까지, start 가 None 이면 end (또는 지금) 에서 ANALYTICS_DEFAULT_WINDOW 전부터.
+    """
+    if start is None:
+        start = (end or datetime.now()) - timedelta(seconds=ANALYTICS_DEFAULT_WINDOW)
+    filters = {'dev_eui': dev_eui,
+               'from': start.isoformat() if start else None,
+               'to': end.isoformat() if end else None}
+    device, dev_euis, values = _load_analytics_arrays(filters)
+    device_count = len(dev_euis)
+
+    # 디바이스별로 모으되 같은 디바이스 안에서는 id(수신) 순서를 유지
+    order = np.argsort(device, kind='stable')
+    sorted_device = device[order]
+    f_cnt = values['f_cnt'][order]
+    step = np.diff(f_cnt)
+    lost_mask = (sorted_device[1:] == sorted_device[:-1]) & (step > 1) & (step <= ANALYTICS_MAX_FCNT_GAP)
+    lost = np.bincount(sorted_device[1:][lost_mask], weights=step[lost_mask] - 1, minlength=device_count)
+
+    received = np.bincount(device, minlength=device_count)
+    loss_rate = np.divide(lost, received + lost, out=np.zeros(device_count), where=received > 0)
+    rssi_mean = _group_mean(device, values['rssi'], device_count)
+    snr_mean = _group_mean(device, values['snr'], device_count)
+    rssi_weight, snr_weight, delivery_weight = ANALYTICS_LINK_WEIGHTS
+    score = 100 * (rssi_weight * _scale(rssi_mean, ANALYTICS_LINK_RSSI_RANGE)
+                   + snr_weight * _scale(snr_mean, ANALYTICS_LINK_SNR_RANGE)
+                   + delivery_weight * (1 - loss_rate))
+
+    # 점수 낮은 (확인이 필요한) 디바이스부터
+    ranked = np.argsort(score, kind='stable')
+    device_rows = zip(
+        [dev_euis[i] for i in ranked.tolist()],
+        received[ranked].tolist(),
+        lost[ranked].astype(np.int64).tolist(),
+        _round_list(loss_rate[ranked], 4),
+        _round_list(rssi_mean[ranked]),
+        _round_list(snr_mean[ranked]),
+        _round_list(score[ranked], 1)
+    )
+    devices = []
+    for device_eui, rows, lost_count, rate, rssi, snr, link_score in device_rows:
+        state = device_states.get(device_eui)
+        devices.append({
+            'dev_eui': device_eui,
+            'device_name': state['device_name'] if state else None,
+            'rows': rows,
+            'lost': lost_count,
+            'loss_rate': rate,
+            'rssi_mean': rssi,
+            'snr_mean': snr,
+            'link_score': link_score
+        })
+
+    total_received = int(received.sum())
+    total_lost = int(lost.sum())
+    return {
+        'dev_eui': dev_eui,
+        'from': filters['from'],
+        'to': filters['to'],
+        'rows': int(device.size),
+        'device_count': device_count,
+        'temperature': _distribution(values['temperature']),
+        'rssi': _distribution(values['rssi'], ANALYTICS_RSSI_BINS),
+        'snr': _distribution(values['snr'], ANALYTICS_SNR_BINS),
+        'packet_loss': {
+            'received': total_received,
+            'lost': total_lost,
+            'rate': round(total_lost / (total_received + total_lost), 4) if total_received else None
+        },
+        'link_quality': dict(
+            _distribution(score),
+            poor=int((score < ANALYTICS_LINK_POOR_SCORE).sum())
+        ),
+        'devices': devices
+    }
+
+
+def get_analytics(dev_eui=None, start=None, end=None):
+    """compute_analytics 결과 (구간별 캐시)
+
+    ANALYTICS_CACHE_MAX_AGE 가 지났고 새 데이터가 들어왔으면 ANALYTICS_CACHE_STALE_AGE 까지는
+    이전 결과를 바로 돌려주고 백그라운드에서 다시 계산한다 (구간 키마다 한 번에 하나).
+    """
+    key = (dev_eui, start, end)
+    now = time.monotonic()
+    with _analytics_lock:
+        entry = _analytics_cache.get(key)
+        if entry is not None:
+            generation, computed_at, result = entry
+            age = now - computed_at
+            if generation == data_generation or age < ANALYTICS_CACHE_MAX_AGE:
+                _analytics_cache.move_to_end(key)
+                return result
+            if age < ANALYTICS_CACHE_STALE_AGE:
+                if key not in _analytics_refreshing:
+                    _analytics_refreshing.add(key)
+                    threading.Thread(target=_refresh_analytics, args=(key,),
+                                     name='analytics-refresh', daemon=True).start()
+                return result
+    return _refresh_analytics(key)
+
+
+def _refresh_analytics(key):
+    """구간 결과를 계산해 캐시에 넣고 반환"""
+    generation = data_generation
+    now = time.monotonic()
+    try:
+        result = compute_analytics(*key)
+    except Exception as e:
+        logger.error(f"✗ 분석 계산 오류: {e}")
+        raise
+    finally:
+        with _analytics_lock:
+            _analytics_refreshing.discard(key)
+
+    with _analytics_lock:
+        _analytics_cache[key] = (generation, now, result)
+        _analytics_cache.move_to_end(key)
+        while len(_analytics_cache) > ANALYTICS_CACHE_SIZE:
+            _analytics_cache.popitem(last=False)
+    return result
+
+
+# ==================== 중복 uplink 제거 ====================
+#
+# ChirpStack 은 HTTP integration 응답이 늦으면 재전송하고, 여러 게이트웨이가 받은
+# 같은 프레임이 두 번 이상 올 수도 있다. (dev_eui, f_cnt) 가 DEDUP_WINDOW 초 안에
+# 다시 오면 중복으로 보고 저장하지 않는다 (중복 건수는 통계 duplicate_count 에 누적).
+# - 디바이스별 최근 f_cnt 를 메모리 LRU 에 두어 대부분의 중복은 DB 조회 없이 걸러낸다.
+# - lorawan_dedup 의 기본 키가 백업이다 (재시작, LRU 에서 밀려난 디바이스, 같은 배치 안의 중복).
+#   f_cnt 는 재접속이나 순환으로 다시 쓰이므로 데이터 테이블이 아닌 별도 테이블에 두고
+#   파티션 정리 때 DEDUP_WINDOW 가 지난 기록을 지운다.
+# - 재접속(join 이벤트) 또는 f_cnt 가 DEDUP_RESET_GAP 넘게 줄어들면 카운터 리셋으로 보고
+#   그 디바이스의 기록을 비운다.
+# 판정은 저장 트랜잭션 안(db_lock)에서만 하므로 다중 프로세스 모드에서도 writer 하나가 담당한다.
+
+DEDUP_UPSERT_SQL = '''
+    INSERT INTO lorawan_dedup (dev_eui, f_cnt, first_seen) VALUES (?, ?, ?)
+    ON CONFLICT (dev_eui, f_cnt) DO UPDATE SET first_seen = excluded.first_seen
+    WHERE abs(excluded.first_seen - first_seen) > ?
+'''
+
+# 판정 방법별 누적 건수 (프로세스 단위)
+dedup_counters = {'memory_hits': 0, 'db_hits': 0, 'resets': 0}
+
+
+class UplinkHistory:
+    """dev_eui 별 최근 f_cnt -> 처음 수신 시각(epoch 초) LRU (db_lock 안에서만 사용)"""
+
+    def __init__(self, max_devices, per_device):
+        self.max_devices = max_devices
+        self.per_device = per_device
+        self._devices = OrderedDict()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def get(self, dev_eui):
+        """디바이스 기록의 사본 (오래된 순 OrderedDict, 없으면 None)"""
+        history = self._devices.get(dev_eui)
+        if history is None:
+            return None
+        self._devices.move_to_end(dev_eui)
+        return OrderedDict(history)
+
+    def update(self, histories):
+        """커밋된 디바이스 기록 반영"""
+        for dev_eui, history in histories.items():
+            self._devices[dev_eui] = history
+            self._devices.move_to_end(dev_eui)
+        while len(self._devices) > self.max_devices:
+            self._devices.popitem(last=False)
+
+    def clear(self):
+        self._devices.clear()
+
+
+uplink_history = UplinkHistory(DEDUP_LRU_DEVICES, DEDUP_LRU_PER_DEVICE)
+
+
+def _device_history(conn, dev_eui, histories):
+    """배치 처리 중인 디바이스 기록 (메모리에 없으면 lorawan_dedup 에서 읽음)"""
+    history = histories.get(dev_eui)
+    if history is None:
+        history = uplink_history.get(dev_eui)
+        if history is None:
+            rows = conn.execute('''
+                SELECT f_cnt, first_seen FROM lorawan_dedup
+                WHERE dev_eui = ? ORDER BY first_seen DESC LIMIT ?
+            ''', (dev_eui, DEDUP_LRU_PER_DEVICE)).fetchall()
+            history = OrderedDict(reversed(rows))
+        histories[dev_eui] = history
+    return history
+
+
+def _reset_device_history(conn, dev_eui, histories):
+    conn.execute('DELETE FROM lorawan_dedup WHERE dev_eui = ?', (dev_eui,))
+    histories[dev_eui] = OrderedDict()
+    dedup_counters['resets'] += 1
+
+
+def _drop_duplicates(conn, batch):
+    """배치에서 중복 uplink 와 join 표시를 걸러냄 (db_lock 안, 커밋 전)
+
+    반환: (저장할 데이터 목록, 중복 건수, 커밋 후 uplink_history 에 반영할 디바이스 기록)
+    """
+    kept = []
+    duplicates = 0
+    histories = {}
+    for data in batch:
+        dev_eui = data.get('dev_eui')
+        if data.get('event') == 'join':
+            _reset_device_history(conn, dev_eui, histories)
+            continue
+        f_cnt = data.get('f_cnt')
+        if DEDUP_WINDOW <= 0 or f_cnt is None:
+            kept.append(data)
+            continue
+        try:
+            seen_at = _epoch_seconds(data.get('timestamp'))
+        except (TypeError, ValueError):
+            kept.append(data)
+            continue
+
+        history = _device_history(conn, dev_eui, histories)
+        if history and f_cnt + DEDUP_RESET_GAP < next(reversed(history)):
+            _reset_device_history(conn, dev_eui, histories)
+            history = histories[dev_eui]
+
+        first_seen = history.get(f_cnt)
+        if first_seen is not None and abs(seen_at - first_seen) <= DEDUP_WINDOW:
+            dedup_counters['memory_hits'] += 1
+            duplicates += 1
+            continue
+        cursor = conn.execute(DEDUP_UPSERT_SQL, (dev_eui, f_cnt, seen_at, DEDUP_WINDOW))
+        if cursor.rowcount == 0:
+            dedup_counters['db_hits'] += 1
+            duplicates += 1
+            continue
+
+        history.pop(f_cnt, None)
+        history[f_cnt] = seen_at
+        while len(history) > DEDUP_LRU_PER_DEVICE:
+            history.popitem(last=False)
+        kept.append(data)
+    return kept, duplicates, histories
+
+
+def _count_duplicates(conn, duplicates):
+    if duplicates:
+        conn.execute('UPDATE lorawan_stats SET duplicate_count = duplicate_count + ? WHERE id = 1',
+                     (duplicates,))
+
+
+def _prune_dedup(now=None):
+    """DEDUP_WINDOW 가 지난 중복 판정 기록 삭제 (삭제 건수 반환)"""
+    cutoff = _epoch_seconds((now or datetime.now()).isoformat()) - DEDUP_WINDOW
+    with db_lock:
+        conn = get_write_connection()
+        try:
+            cursor = conn.execute('DELETE FROM lorawan_dedup WHERE first_seen < ?', (cutoff,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return cursor.rowcount
+
+
+# ==================== 월별 파티션 / 보존 정책 ====================
+#
+# - 새 데이터는 항상 현재 파티션 (v1: lorawan_data, v2: lorawan_data_v2) 에 저장된다.
+# - 정리 작업이 지난 달 이전 데이터를 월별 테이블 (현재 파티션 이름_YYYYMM) 로 옮긴다.
+#   (id 는 그대로 유지되며 AUTOINCREMENT 로 재사용되지 않는다)
+# - PARTITION_RETENTION_MONTHS 를 넘은 파티션은 .ndjson.gz 로 보관 후 삭제한다.
+#   롤업 테이블은 유지되므로 장기 이력 조회는 계속 가능하다.
+# - 조회는 select_records_sql() 이 시간/id 범위에 겹치는 파티션만 UNION ALL 로 묶는다.
+#   전체 조회용으로 lorawan_data_all 뷰를 함께 유지한다.
+
+_partitions = []     # (name, start_ts, end_ts, min_id, max_id, sealed), 오래된 순
+
+
+def _load_partitions(conn):
+    """파티션 목록을 메모리로 읽기"""
+    global _partitions
+    _partitions = conn.execute('''
+        SELECT name, start_ts, end_ts, min_id, max_id, sealed
+        FROM lorawan_partitions
+        ORDER BY start_ts
+    ''').fetchall()
+    return _partitions
+
+
+def _recreate_data_view(conn):
+    """현재 파티션과 월별 파티션을 합친 lorawan_data_all 뷰 재생성 (v1 컬럼 형태)"""
+    tables = [_live_table()] + [partition[0] for partition in _partitions]
+    conn.execute('DROP VIEW IF EXISTS lorawan_data_all')
+    conn.execute('CREATE VIEW lorawan_data_all AS ' + ' UNION ALL '.join(
+        f"SELECT {_select_list(LORAWAN_COLUMNS)} FROM {_source_sql(table)}" for table in tables
+    ))
+    if SCHEMA_VERSION >= 2:
+        _create_compat_view(conn)
+
+
+def _refresh_schema(conn):
+    """DB 의 스키마 버전과 파티션 목록을 다시 읽어 메모리에 반영 (바뀌었으면 캐시된 응답 무효화)"""
+    partitions = _partitions
+    if max(conn.execute('PRAGMA user_version').fetchone()[0], 1) != SCHEMA_VERSION:
+        _load_schema(conn)
+        bump_data_generation()
+    elif _load_partitions(conn) != partitions:
+        bump_data_generation()
+
+
+def sync_schema():
+    """다른 연결이 커밋한 뒤 첫 조회라면 스키마 버전/파티션 목록을 다시 읽기 (조회 SQL 을 만들기 전에 호출)
+
+    partitions / migrate-schema CLI 처럼 다른 프로세스가 행이나 스키마를 바꾼 경우에도
+    다음 저장을 기다리지 않고 바로 반영하도록 스레드별 읽기 연결의 PRAGMA data_version 으로 변경을 감지한다.
+    """
+    conn = get_read_connection()
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    if version != _db_local.data_version:
+        _db_local.data_version = version
+        _refresh_schema(conn)
+
+
+def _partition_tables(time_range=(None, None), id_range=(None, None)):
+    """시간 범위 [from, to) 와 id 범위 (after, before) 에 겹치는 테이블 목록"""
+    sync_schema()
+    start, end = time_range
+    after_id, before_id = id_range
+    tables = []
+    for name, start_ts, end_ts, min_id, max_id, sealed in _partitions:
+        if start is not None and end_ts <= start:
+            continue
+        if end is not None and start_ts >= end:
+            continue
+        # 이동이 끝난(sealed) 파티션만 id 범위로 제외 (이동 중에는 범위가 바뀜)
+        if sealed and min_id is not None:
+            if after_id is not None and max_id <= after_id:
+                continue
+            if before_id is not None and min_id >= before_id:
+                continue
+        tables.append(name)
+    # 현재 파티션에는 늦게 들어온 과거 데이터가 있을 수 있으므로 항상 포함
+    tables.append(_live_table())
+    return tables
 
-# 로그인 정보 (실제 환경에서는 암호화된 데이터베이스 사용 권장)
-USERS = {
-    #'admin': 'admin123',
-    'admin': 'admin015',
-    #'user': 'password123'
-}
 
-# 데이터베이스 락
-db_lock = threading.Lock()
+def select_records_sql(columns, conditions=(), params=(), order='ASC', limit=None,
+                       time_range=(None, None), id_range=(None, None)):
+    """조건에 맞는 파티션만 조회하는 SQL 과 파라미터 생성 (id 순 정렬)
 
+    columns 는 LORAWAN_COLUMNS 의 이름, conditions 는 테이블 별칭 d 기준 조건이다.
+    """
+    tables = _partition_tables(time_range, id_range)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = ' UNION ALL '.join(
+        f"SELECT {_select_list(columns)} FROM {_source_sql(table, columns)}{where}" for table in tables
+    )
+    sql += f' ORDER BY id {order}'
+    params = list(params) * len(tables)
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    return sql, params
 
-# ==================== 데이터베이스 초기화 ====================
 
-def init_database():
-    """데이터베이스 및 테이블 초기화"""
-    with db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # LoRaWAN 데이터 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS lorawan_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+def _month_bounds(month):
+    """'YYYY-MM' 의 [시작, 다음 달 시작) ISO 문자열"""
+    year, mon = int(month[:4]), int(month[5:7])
+    next_year, next_mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f'{year:04d}-{mon:02d}-01T00:00:00', f'{next_year:04d}-{next_mon:02d}-01T00:00:00'
+
+
+def _create_partition(conn, month):
+    """월별 파티션 테이블 생성 및 등록 (이미 있으면 무시)"""
+    name = f"{_live_table()}_{month[:4]}{month[5:7]}"
+    start_ts, end_ts = _month_bounds(month)
+    if SCHEMA_VERSION >= 2:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY,
+                ts INTEGER NOT NULL,
+                device_id INTEGER NOT NULL,
+                temperature REAL,
+                rssi INTEGER,
+                snr REAL,
+                f_port INTEGER,
+                f_cnt INTEGER,
+                created INTEGER
+            )
+        ''')
+        _create_v2_indexes(conn, name)
+    else:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY,
                 timestamp TEXT NOT NULL,
                 device_name TEXT NOT NULL,
                 dev_eui TEXT NOT NULL,
@@ -60,124 +2501,661 @@ def init_database():
                 snr REAL,
                 f_port INTEGER,
                 f_cnt INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                created_at DATETIME
             )
         ''')
-        
-        # 인덱스 생성
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_timestamp 
-            ON lorawan_data(timestamp)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_dev_eui 
-            ON lorawan_data(dev_eui)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_created_at 
-            ON lorawan_data(created_at)
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print(f"✓ 데이터베이스 초기화 완료: {DB_PATH}")
+        _create_v1_partition_indexes(conn, name)
+    conn.execute('''
+        INSERT OR IGNORE INTO lorawan_partitions (name, start_ts, end_ts)
+        VALUES (?, ?, ?)
+    ''', (name, start_ts, end_ts))
+    # 다시 채우는 경우 id 범위 제외를 멈춤
+    conn.execute('UPDATE lorawan_partitions SET sealed = 0 WHERE name = ?', (name,))
+    return name, start_ts, end_ts
 
 
-# 데이터베이스 초기화
-init_database()
-    
+def _create_v1_partition_indexes(conn, name):
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_timestamp ON {name}(timestamp)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_dev_eui_timestamp ON {name}(dev_eui, timestamp)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{name}_dev_eui ON {name}(dev_eui)')
 
-# ==================== 데이터베이스 함수 ====================
 
-def save_lorawan_data(data):
-    """LoRaWAN 데이터를 데이터베이스에 저장"""
+def _move_month_to_partition(month):
+    """현재 파티션의 해당 월 데이터를 월별 파티션으로 이동 (배치 단위 트랜잭션)"""
     with db_lock:
+        conn = get_write_connection()
         try:
-            conn = sqlite3.connect(DB_PATH, timeout=30)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO lorawan_data 
-                (timestamp, device_name, dev_eui, temperature, rssi, snr, f_port, f_cnt)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get('timestamp'),
-                data.get('device_name'),
-                data.get('dev_eui'),
-                data.get('temperature'),
-                data.get('rssi'),
-                data.get('snr'),
-                data.get('f_port'),
-                data.get('f_cnt')
-            ))
-            
+            name, start_ts, end_ts = _create_partition(conn, month)
+            _load_partitions(conn)
+            _recreate_data_view(conn)
             conn.commit()
-            record_id = cursor.lastrowid
-            conn.close()
-            
-            return record_id
-            
-        except sqlite3.Error as e:
-            print(f"✗ 데이터 저장 오류: {e}")
-            return None
+        except sqlite3.Error:
+            conn.rollback()
+            raise
 
+    live = _live_table()
+    time_column = _time_column()
+    bounds = (_time_value(start_ts), _time_value(end_ts))
+    moved = 0
+    while True:
+        # 배치마다 락을 놓아 수신 저장이 오래 막히지 않도록 함
+        with db_lock:
+            conn = get_write_connection()
+            try:
+                upper = conn.execute(f'''
+                    SELECT MAX(id) FROM (
+                        SELECT id FROM {live}
+                        WHERE {time_column} >= ? AND {time_column} < ?
+                        ORDER BY id LIMIT ?
+                    )
+                ''', bounds + (PARTITION_MOVE_BATCH,)).fetchone()[0]
+                if upper is None:
+                    conn.execute('''
+                        UPDATE lorawan_partitions SET sealed = 1,
+                            min_id = (SELECT MIN(id) FROM {0}),
+                            max_id = (SELECT MAX(id) FROM {0}),
+                            row_count = (SELECT COUNT(*) FROM {0})
+                        WHERE name = ?
+                    '''.format(name), (name,))
+                    conn.commit()
+                    _load_partitions(conn)
+                    break
+                # 파티션은 현재 파티션과 같은 컬럼 순서로 만들어진다
+                conn.execute(f'''
+                    INSERT INTO {name}
+                    SELECT * FROM {live}
+                    WHERE {time_column} >= ? AND {time_column} < ? AND id <= ?
+                ''', bounds + (upper,))
+                cursor = conn.execute(f'''
+                    DELETE FROM {live}
+                    WHERE {time_column} >= ? AND {time_column} < ? AND id <= ?
+                ''', bounds + (upper,))
+                moved += cursor.rowcount
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+    return name, moved
+
+
+def _archive_partition(name):
+    """파티션을 .ndjson.gz 로 보관한 뒤 테이블 삭제"""
+    os.makedirs(PARTITION_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(PARTITION_ARCHIVE_DIR, f'{name}.ndjson.gz')
+    temp_path = path + '.tmp'
+
+    cursor = get_read_connection().execute(
+        f"SELECT {_select_list(LORAWAN_COLUMNS)} FROM {_source_sql(name)} ORDER BY d.id"
+    )
+    count = 0
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                archive.write(json.dumps(dict(zip(LORAWAN_COLUMNS, row)), ensure_ascii=False) + '\n')
+            count += len(rows)
+    with open(temp_path, 'rb') as archive:
+        os.fsync(archive.fileno())
+    os.replace(temp_path, path)
 
-def get_latest_data(limit=20):
-    """최근 데이터 조회"""
     with db_lock:
+        conn = get_write_connection()
         try:
-            conn = sqlite3.connect(DB_PATH, timeout=30)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM lorawan_data 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (limit,))
-            
-            columns = [description[0] for description in cursor.description]
-            results = []
-            
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            conn.close()
-            return results
-            
-        except sqlite3.Error as e:
-            print(f"✗ 데이터 조회 오류: {e}")
-            return []
+            conn.execute('DELETE FROM lorawan_partitions WHERE name = ?', (name,))
+            _load_partitions(conn)
+            _recreate_data_view(conn)
+            conn.execute(f'DROP TABLE {name}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            _load_partitions(conn)
+            raise
+    return path, count
 
 
-def get_statistics():
-    """통계 정보 조회"""
+def run_partition_maintenance(now=None, vacuum=False):
+    """지난 달 이전 데이터를 월별 파티션으로 옮기고 보존 기간이 지난 파티션 보관/삭제"""
+    now = now or datetime.now()
+    current_month = now.strftime('%Y-%m')
+    current_start = _month_bounds(current_month)[0]
+
+    months = [row[0] for row in get_read_connection().execute(f'''
+        SELECT DISTINCT substr({_column_sql('timestamp')}, 1, 7) FROM {_live_table()} d
+        WHERE d.{_time_column()} < ?
+    ''', (_time_value(current_start),))]
+    for month in months:
+        name, moved = _move_month_to_partition(month)
+        logger.info(f"✓ 파티션 이동: {name} ({moved}건)")
+
+    archived = []
+    if PARTITION_RETENTION_MONTHS > 0:
+        year, mon = now.year, now.month - PARTITION_RETENTION_MONTHS
+        while mon <= 0:
+            year, mon = year - 1, mon + 12
+        cutoff = f'{year:04d}-{mon:02d}-01T00:00:00'
+        for name, start_ts, end_ts, *_ in list(_partitions):
+            if end_ts <= cutoff:
+                path, count = _archive_partition(name)
+                archived.append(name)
+                logger.info(f"✓ 파티션 보관 및 삭제: {name} ({count}건) -> {path}")
+
+    if archived:
+        # 삭제된 행은 누적 통계(min/max)에서 뺄 수 없으므로 재계산
+        rebuild_statistics()
+        if vacuum:
+            with db_lock:
+                get_write_connection().execute('VACUUM')
+
+    _prune_dedup(now)
+
+    if months or archived:
+        bump_data_generation()
+    return months, archived
+
+
+def _partition_maintenance_loop():
+    while True:
+        time.sleep(PARTITION_MAINTENANCE_INTERVAL)
+        try:
+            run_partition_maintenance()
+        except Exception as e:
+            logger.error(f"✗ 파티션 정리 오류: {e}")
+
+
+_partition_thread = None
+
+
+def start_partition_scheduler():
+    """주기적 파티션 정리 스레드 시작 (PARTITION_MAINTENANCE_INTERVAL 이 0 이면 비활성)"""
+    global _partition_thread
+    if PARTITION_MAINTENANCE_INTERVAL <= 0 or _partition_thread is not None:
+        return
+    _partition_thread = threading.Thread(
+        target=_partition_maintenance_loop, name='partition-maintenance', daemon=True
+    )
+    _partition_thread.start()
+
+
+@app.cli.command('partitions')
+@click.option('--vacuum', is_flag=True, help='보관 후 VACUUM 으로 DB 파일 크기 축소')
+def partitions_command(vacuum):
+    """월별 파티션 정리 및 보존 정책 적용: flask --app dataServer partitions"""
+    months, archived = run_partition_maintenance(vacuum=vacuum)
+    print(f"✓ 파티션 정리 완료: 이동 {len(months)}개월, 보관 {len(archived)}개")
+    for name, start_ts, end_ts, min_id, max_id, sealed in _partitions:
+        print(f"  {name}: {start_ts} ~ {end_ts} (id {min_id} ~ {max_id})")
+
+
+# ==================== v2 스키마 마이그레이션 ====================
+#
+# v1 테이블(현재 파티션 + 월별 파티션)의 행을 id 순으로 배치 복사한다.
+# - 복사 중에는 수신/조회 모두 계속 v1 을 사용한다 (배치마다 쓰기 락을 놓음)
+# - 진행 위치(마지막 id)를 schema_migration 에 기록하므로 중단 후 다시 실행하면 이어서 진행
+# - 남은 행이 배치보다 적어지면 같은 트랜잭션에서 나머지를 복사하고 전환한다
+#   (v1 테이블 삭제, user_version = 2). 실행 중인 서버는 다음 조회나 저장 시 전환을 감지한다.
+# 통계/롤업 테이블은 dev_eui 기준이라 그대로 유지된다.
+
+V2_MIGRATE_SQL = '''
+    INSERT INTO lorawan_data_v2
+    (id, ts, device_id, temperature, rssi, snr, f_port, f_cnt, created)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _switch_to_v2(conn):
+    """v1 테이블을 삭제하고 v2 로 전환 (복사를 마친 트랜잭션 안에서 호출)"""
+    global SCHEMA_VERSION
+    # 삭제된 끝 id 가 재사용되지 않도록 AUTOINCREMENT 시퀀스를 이어받음
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'lorawan_data'").fetchone()
+    if seq is not None:
+        cursor = conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'lorawan_data_v2'", seq
+        )
+        if cursor.rowcount == 0:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('lorawan_data_v2', ?)", seq)
+
+    conn.execute('DROP VIEW IF EXISTS lorawan_data_all')
+    for partition in _partitions:
+        conn.execute(f'DROP TABLE IF EXISTS {partition[0]}')
+    conn.execute('DELETE FROM lorawan_partitions')
+    conn.execute('DROP TABLE lorawan_data')
+    conn.execute('DROP TABLE schema_migration')
+    conn.execute('PRAGMA user_version = 2')
+
+    SCHEMA_VERSION = 2
+    _load_partitions(conn)
+    _recreate_data_view(conn)
+
+
+def migrate_schema(batch_size=SCHEMA_MIGRATION_BATCH, progress=None):
+    """v1 데이터를 v2 스키마로 복사한 뒤 전환 (복사한 행 수 반환)
+
+    progress: 배치마다 (복사한 행 수, 마지막 id) 로 호출되는 콜백
+    """
+    if SCHEMA_VERSION >= 2:
+        return 0
+
     with db_lock:
+        conn = get_write_connection()
         try:
-            conn = sqlite3.connect(DB_PATH, timeout=30)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_count,
-                    COUNT(DISTINCT dev_eui) as device_count,
-                    AVG(temperature) as avg_temp,
-                    MIN(temperature) as min_temp,
-                    MAX(temperature) as max_temp,
-                    AVG(rssi) as avg_rssi
-                FROM lorawan_data
+            _create_v2_tables(conn)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migration (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    last_id INTEGER NOT NULL
+                )
             ''')
-            
-            row = cursor.fetchone()
-            columns = [description[0] for description in cursor.description]
-            
-            conn.close()
-            return dict(zip(columns, row))
-            
+            conn.execute('INSERT OR IGNORE INTO schema_migration (id, last_id) VALUES (1, 0)')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        last_id = conn.execute('SELECT last_id FROM schema_migration WHERE id = 1').fetchone()[0]
+
+    copied = 0
+    done = False
+    while not done:
+        with db_lock:
+            conn = get_write_connection()
+            try:
+                # 조회부터 쓰기 락을 잡아야 마지막 배치와 전환 사이에 다른 프로세스의 저장이 끼지 않음
+                conn.execute('BEGIN IMMEDIATE')
+                _load_partitions(conn)
+                sql, params = select_records_sql(
+                    LORAWAN_COLUMNS, ['d.id > ?'], [last_id], limit=batch_size, id_range=(last_id, None)
+                )
+                rows = conn.execute(sql, params).fetchall()
+                conn.executemany(V2_MIGRATE_SQL, [
+                    (row[0], _iso_to_micros(row[1]), _device_id(conn, row[3], row[2])) + row[4:9]
+                    + (_utc_seconds(row[9]),)
+                    for row in rows
+                ])
+                if rows:
+                    last_id = rows[-1][0]
+                conn.execute('UPDATE schema_migration SET last_id = ? WHERE id = 1', (last_id,))
+                done = len(rows) < batch_size
+                if done:
+                    _switch_to_v2(conn)
+                conn.commit()
+            except (sqlite3.Error, ValueError):
+                conn.rollback()
+                _load_schema(conn)
+                raise
+        copied += len(rows)
+        if progress is not None:
+            progress(copied, last_id)
+
+    _device_ids.clear()
+    bump_data_generation()
+    return copied
+
+
+@app.cli.command('migrate-schema')
+@click.option('--batch', 'batch_size', default=SCHEMA_MIGRATION_BATCH, show_default=True,
+              help='트랜잭션 당 복사할 행 수')
+@click.option('--vacuum', is_flag=True, help='전환 후 VACUUM 으로 DB 파일 크기 축소')
+def migrate_schema_command(batch_size, vacuum):
+    """v1 스키마를 v2 (정수 시간 + 디바이스 사전) 로 전환: flask --app dataServer migrate-schema"""
+    if SCHEMA_VERSION >= 2:
+        print("✓ 이미 v2 스키마입니다")
+        return
+    started = time.monotonic()
+
+    def report(copied, last_id):
+        elapsed = time.monotonic() - started
+        print(f"  {copied}건 복사 (마지막 id {last_id}, {copied / max(elapsed, 0.001):.0f}건/초)")
+
+    copied = migrate_schema(batch_size, progress=report)
+    print(f"✓ v2 스키마 전환 완료: {copied}건, {time.monotonic() - started:.1f}초")
+    if vacuum:
+        with db_lock:
+            get_write_connection().execute('VACUUM')
+        print("✓ VACUUM 완료")
+
+
+# ==================== 수신 큐 (Write-behind) ====================
+#
+# Webhook 요청 스레드는 데이터를 대기열에 넣고 바로 응답한다.
+# 전용 writer 스레드가 대기열을 비우면서 INGEST_BATCH_SIZE 건 또는
+# INGEST_FLUSH_INTERVAL 초 단위로 묶어 executemany + 커밋 1회로 저장한다.
+
+ingest_queue = queue.Queue(maxsize=INGEST_QUEUE_MAXSIZE)
+_INGEST_STOP = object()
+_ingest_thread = None
+_ingest_thread_lock = threading.Lock()
+
+
+def enqueue_lorawan_data(data):
+    """데이터를 수신 대기열에 등록 (대기열이 가득 차면 False 반환)"""
+    if PROCESS_ROLE == 'reader':
+        return forward_to_writer([data]) == 1
+    start_ingest_writer()
+    try:
+        ingest_queue.put(data, timeout=INGEST_ENQUEUE_TIMEOUT)
+        return True
+    except queue.Full:
+        return False
+
+
+def _write_ingest_batch(batch):
+    """배치 저장 (일시적 오류는 INGEST_MAX_RETRIES 회까지 재시도, 잘못된 행이 섞였으면 한 건씩 저장)"""
+    for attempt in range(1, INGEST_MAX_RETRIES + 1):
+        try:
+            last_id = save_lorawan_batch(batch)
+            logger.info(f"✓ 데이터 {len(batch)}건 저장 (마지막 ID: {last_id})")
+            return True
+        except (sqlite3.IntegrityError, TypeError, ValueError, AttributeError) as e:
+            # 같은 데이터로 다시 시도해도 실패하므로 재시도하지 않고 실패한 행만 버림
+            logger.error(f"✗ 배치 저장 오류 (잘못된 데이터): {e} - {len(batch)}건을 한 건씩 저장")
+            return _write_rows_one_by_one(batch)
+        except sqlite3.Error as e:
+            logger.error(f"✗ 배치 저장 오류 ({attempt}/{INGEST_MAX_RETRIES}): {e}")
+            time.sleep(0.1 * attempt)
+    logger.error(f"✗ 배치 저장 실패: {len(batch)}건 유실")
+    rows_dropped_total.inc(len(batch))
+    return False
+
+
+def _write_rows_one_by_one(batch):
+    """배치를 한 건씩 저장하고 저장할 수 없는 행만 버림 (모두 저장했으면 True)"""
+    dropped = 0
+    for data in batch:
+        try:
+            save_lorawan_batch([data])
+        except Exception as e:
+            dropped += 1
+            dev_eui = data.get('dev_eui') if isinstance(data, dict) else None
+            logger.error(f"✗ 저장할 수 없는 데이터 버림 (Device: {dev_eui}): {e}")
+    rows_dropped_total.inc(dropped)
+    return dropped == 0
+
+
+def _ingest_writer_loop():
+    """writer 스레드: 대기열을 배치 단위로 비우면서 저장"""
+    stop = False
+    while not stop:
+        item = ingest_queue.get()
+        if item is _INGEST_STOP:
+            ingest_queue.task_done()
+            break
+
+        batch = [item]
+        deadline = time.monotonic() + INGEST_FLUSH_INTERVAL
+        while len(batch) < INGEST_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = ingest_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _INGEST_STOP:
+                stop = True
+                break
+            batch.append(item)
+
+        try:
+            _write_ingest_batch(batch)
+        except Exception as e:
+            # 예기치 않은 오류로 writer 스레드가 멈추면 이후 수신이 모두 쌓이기만 하므로 계속 진행
+            logger.error(f"✗ 배치 저장 중 예기치 않은 오류: {e} ({len(batch)}건 유실)")
+            rows_dropped_total.inc(len(batch))
+        finally:
+            # flush_ingest_queue() (queue.join) 가 끝나도록 꺼낸 항목은 항상 완료 처리
+            for _ in range(len(batch) + (1 if stop else 0)):
+                ingest_queue.task_done()
+
+
+def start_ingest_writer():
+    """writer 스레드 시작 (이미 실행 중이면 무시)"""
+    global _ingest_thread
+    if _ingest_thread is not None and _ingest_thread.is_alive():
+        return
+    with _ingest_thread_lock:
+        if _ingest_thread is None or not _ingest_thread.is_alive():
+            _ingest_thread = threading.Thread(
+                target=_ingest_writer_loop, name='ingest-writer', daemon=True
+            )
+            _ingest_thread.start()
+
+
+def flush_ingest_queue():
+    """대기열에 쌓인 데이터가 모두 저장될 때까지 대기"""
+    if _ingest_thread is not None and _ingest_thread.is_alive():
+        ingest_queue.join()
+
+
+def stop_ingest_writer(timeout=30):
+    """남은 데이터를 모두 저장한 뒤 writer 스레드 종료 (종료 시 호출)"""
+    global _ingest_thread
+    thread = _ingest_thread
+    if thread is None or not thread.is_alive():
+        return
+    ingest_queue.put(_INGEST_STOP)
+    thread.join(timeout)
+    _ingest_thread = None
+    logger.info("✓ 수신 대기열 flush 완료")
+
+
+atexit.register(stop_ingest_writer)
+
+
+# ==================== 다중 프로세스 (writer 프로세스 / 읽기 워커) ====================
+#
+# SQLite 는 쓰기가 한 번에 하나뿐이고 db_lock 은 프로세스 안에서만 유효하므로
+# 워커를 여러 개 띄울 때는 저장을 writer 프로세스 하나에 모은다.
+# - writer 프로세스: flask --app dataServer writer
+#   DB 초기화, 수신 대기열 + writer 스레드, 파티션 정리를 맡고 Unix 소켓으로 데이터를 받는다.
+#   (한 줄에 레코드 JSON 배열, 응답은 대기열에 등록된 건수.
+#    {"command": "metrics"} 처럼 WRITER_COMMANDS 명령 한 줄이면 결과를 JSON 으로,
+#    명령이 실패하면 {"error": "..."} 로 응답하고 읽기 워커는 그 오류를 그대로 전달)
+# - 읽기 워커 (환경 변수 DATASERVER_ROLE=reader, gunicorn post_fork 에서 설정):
+#   읽기 전용 연결만 사용하고 수신 데이터는 forward_to_writer() 로 전달한다.
+#   링 버퍼/디바이스 상태/통계/실시간 피드는 writer 의 커밋을 PRAGMA data_version 으로
+#   감지해 새 행을 읽어 갱신한다 (FOLLOW_INTERVAL 주기).
+
+PROCESS_ROLE = os.environ.get('DATASERVER_ROLE', 'standalone')
+
+_writer_local = threading.local()
+
+
+def _close_writer_connection():
+    sock = getattr(_writer_local, 'sock', None)
+    if sock is not None:
+        sock.close()
+    _writer_local.sock = None
+
+
+def _writer_request(line, timeout=WRITER_TIMEOUT):
+    """writer 프로세스에 요청 한 줄을 보내고 응답 한 줄 반환 (실패 시 None, timeout: 응답 대기 시간)"""
+    for attempt in range(2):
+        sock = getattr(_writer_local, 'sock', None)
+        reused = sock is not None
+        try:
+            if sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                _writer_local.sock = sock
+                sock.settimeout(WRITER_TIMEOUT)
+                sock.connect(WRITER_SOCKET)
+                _writer_local.reader = sock.makefile('rb')
+            sock.settimeout(timeout)
+            sock.sendall(line)
+            reply = _writer_local.reader.readline()
+            if reply:
+                return reply
+        except socket.timeout:
+            # writer 가 처리했을 수도 있으므로 재전송하지 않음
+            logger.error("✗ writer 프로세스 응답 시간 초과")
+            _close_writer_connection()
+            return None
+        except OSError as e:
+            logger.error(f"✗ writer 프로세스 전달 오류: {e}")
+        _close_writer_connection()
+        # writer 가 재시작되어 끊긴 연결이었으면 새로 연결해 한 번 더 시도
+        if not reused:
+            break
+    return None
+
+
+def forward_to_writer(batch):
+    """레코드 목록을 writer 프로세스로 전달하고 대기열에 등록된 건수 반환 (전달 실패 시 0)"""
+    reply = _writer_request(_json_bytes(batch) + b'\n')
+    return int(reply) if reply else 0
+
+
+class WriterError(Exception):
+    """writer 프로세스가 명령을 처리하다 실패함 (메시지는 writer 쪽 오류)"""
+
+
+def query_writer(command, default=None, timeout=WRITER_TIMEOUT, **args):
+    """writer 프로세스에 명령을 보내고 결과 반환 (연결 실패 시 default, 명령 실패 시 WriterError)"""
+    reply = _writer_request(_json_bytes(dict(args, command=command)) + b'\n', timeout)
+    if not reply:
+        return default
+    result = _json_loads(reply)
+    # 명령 결과에는 'error' 하나만 있는 dict 가 없으므로 오류 응답과 구분된다
+    if isinstance(result, dict) and result.keys() == {'error'}:
+        raise WriterError(result['error'])
+    return result
+
+
+# 읽기 워커가 writer 프로세스에 요청하는 명령 (인자: 요청 dict)
+WRITER_COMMANDS = {
+    'metrics': lambda request: render_metrics(writer_side=True),
+    'alerts': lambda request: alert_engine.active(),
+    'import': lambda request: _save_batch(request['records'], live=False)[1:],
+    'export_submit': lambda request: export_jobs.submit(request['format'], request['filters']),
+    'export_status': lambda request: export_jobs.get(request['id'], request['touch']) or {}
+}
+
+
+class _WriterRequestHandler(socketserver.StreamRequestHandler):
+    """읽기 워커 연결 하나를 처리 (writer 프로세스)"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                batch = _json_loads(line)
+            except ValueError:
+                logger.error("✗ writer 소켓: 잘못된 요청")
+                break
+            if isinstance(batch, dict):
+                # 명령 요청 (writer 쪽 상태 조회), 실패하면 {"error": ...} 로 응답하고 연결은 유지
+                name = batch.get('command')
+                command = WRITER_COMMANDS.get(name)
+                try:
+                    if command is None:
+                        raise ValueError(f'알 수 없는 명령: {name}')
+                    result = command(batch)
+                except Exception as e:
+                    logger.error(f"✗ writer 명령 오류 ({name}): {e}")
+                    result = {'error': str(e)}
+                self.wfile.write(_json_bytes(result) + b'\n')
+                continue
+            accepted = 0
+            for data in batch:
+                if not enqueue_lorawan_data(data):
+                    break
+                accepted += 1
+            self.wfile.write(b'%d\n' % accepted)
+
+
+@app.cli.command('writer')
+@click.option('--socket', 'path', default=WRITER_SOCKET, show_default=True, help='Unix 소켓 경로')
+def writer_command(path):
+    """다중 프로세스 모드의 writer 프로세스 실행: flask --app dataServer writer"""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socketserver.ThreadingUnixStreamServer(path, _WriterRequestHandler)
+    server.daemon_threads = True
+    start_ingest_writer()
+
+    def shutdown(signum, frame):
+        # serve_forever 가 도는 스레드에서는 shutdown() 을 직접 호출할 수 없음
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    logger.info(f"✓ writer 프로세스 시작: {path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        stop_ingest_writer()
+        logger.info("✓ writer 프로세스 종료")
+
+
+_followed_id = 0     # 읽기 워커가 캐시에 반영한 마지막 id
+
+
+def _follow_commits(conn):
+    """writer 의 새 커밋 반영: 새 행은 _after_insert 로, 그 외 변경은 통계/세대만 갱신"""
+    global _followed_id
+    # 파티션 이동이나 스키마 전환도 커밋으로 감지되므로 매번 다시 읽음
+    _load_schema(conn)
+    found = False
+    while True:
+        sql, params = select_records_sql(
+            LORAWAN_COLUMNS, ['d.id > ?'], [_followed_id], limit=EXPORT_FETCH_SIZE,
+            id_range=(_followed_id, None)
+        )
+        rows = conn.execute(sql, params).fetchall()
+        if rows:
+            _followed_id = rows[-1][0]
+            _after_insert(conn, rows)
+            found = True
+        if len(rows) < EXPORT_FETCH_SIZE:
+            break
+    if not found:
+        _load_statistics(conn)
+        bump_data_generation()
+
+
+def _follow_commits_loop():
+    conn = _open_connection(read_only=True)
+    data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+    while True:
+        time.sleep(FOLLOW_INTERVAL)
+        try:
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != data_version:
+                data_version = version
+                _follow_commits(conn)
         except sqlite3.Error as e:
-            print(f"✗ 통계 조회 오류: {e}")
-            return {}
+            logger.error(f"✗ 커밋 반영 오류: {e}")
+
+
+def init_reader():
+    """읽기 워커 초기화: 스키마/캐시를 읽고 writer 커밋 추적 스레드 시작 (DB 초기화는 writer 가 담당)"""
+    global _followed_id
+    conn = get_read_connection()
+    # 링 버퍼와 디바이스 상태를 같은 스냅샷에서 읽어 추적 시작 id 와 맞춤
+    conn.execute('BEGIN')
+    try:
+        _load_schema(conn)
+        _load_statistics(conn)
+        warm_recent_buffer()
+        warm_device_states()
+        latest = recent_buffer.latest(1)
+        _followed_id = latest[0][0] if latest else 0
+    finally:
+        conn.commit()
+    threading.Thread(target=_follow_commits_loop, name='commit-follower', daemon=True).start()
+
+
+# 데이터베이스 초기화
+if PROCESS_ROLE == 'reader':
+    init_reader()
+else:
+    init_database()
+    warm_recent_buffer()
+    warm_device_states()
+    start_partition_scheduler()
+    start_alerting()
 
 
 # ==================== 인증 데코레이터 ====================
@@ -192,6 +3170,187 @@ def login_required(f):
     return decorated_function
 
 
+# ==================== 데이터 응답 인코딩 / 압축 ====================
+#
+# format=json      : 행마다 객체 (기본값, 기존 클라이언트 호환)
+# format=columnar  : 컬럼마다 배열 하나 (키 이름 반복 없음, 행 dict 생성 없음)
+# format=msgpack   : columnar 구조를 MessagePack 으로 (msgpack 필요)
+# format=arrow     : Arrow IPC stream (pyarrow 필요)
+# 응답 본문은 Accept-Encoding 에 따라 brotli 또는 gzip 으로 압축한다.
+
+DATA_FORMATS = ('json', 'columnar', 'msgpack', 'arrow')
+
+
+def _columnar(columns, rows, meta):
+    body = dict(meta or {})
+    body['columns'] = list(columns)
+    body['count'] = len(rows)
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    body['data'] = {column: list(value) for column, value in zip(columns, values)}
+    return body
+
+
+def _json_bytes(body):
+    if orjson is not None:
+        return orjson.dumps(body)
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _arrow_bytes(columns, rows, meta):
+    schema = _parquet_schema()
+    schema = pa.schema([schema.field(column) for column in columns],
+                       metadata={'meta': json.dumps(meta or {})})
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    table = pa.Table.from_arrays(
+        [pa.array(value, type=field.type) for value, field in zip(values, schema)],
+        schema=schema
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def compress_response(response):
+    """Accept-Encoding 에 따라 응답 본문 압축 (brotli 우선, 없으면 gzip)"""
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < RESPONSE_COMPRESS_MIN_BYTES or 'Content-Encoding' in response.headers:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        response.set_data(brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def encode_rows_response(columns, rows, meta=None):
+    """행 튜플 목록을 요청된 형식(format 인자)으로 인코딩한 압축 응답 생성
+
+    meta 가 있으면 함께 포함한다 (json 형식에서는 rows 가 'records' 로 들어감).
+    """
+    data_format = request.args.get('format', 'json')
+    if data_format not in DATA_FORMATS:
+        return jsonify({'error': f'지원하지 않는 형식: {data_format}'}), 400
+
+    if data_format == 'json':
+        records = [dict(zip(columns, row)) for row in rows]
+        if meta is None:
+            response = jsonify(records)
+        else:
+            response = jsonify(dict(meta, records=records, count=len(records)))
+    elif data_format == 'columnar':
+        response = Response(_json_bytes(_columnar(columns, rows, meta)), mimetype='application/json')
+    elif data_format == 'msgpack':
+        if msgpack is None:
+            return jsonify({'error': 'msgpack 형식에는 msgpack 패키지가 필요합니다'}), 501
+        response = Response(msgpack.packb(_columnar(columns, rows, meta)), mimetype='application/msgpack')
+    else:
+        if pa is None:
+            return jsonify({'error': 'arrow 형식에는 pyarrow 가 필요합니다'}), 501
+        response = Response(_arrow_bytes(columns, rows, meta), mimetype='application/vnd.apache.arrow.stream')
+
+    return compress_response(response)
+
+
+# ==================== 응답 캐시 / 조건부 GET ====================
+#
+# 데이터가 바뀔 때마다 증가하는 세대 번호(data_generation)로 응답을 태깅한다.
+# - 클라이언트 ETag 가 현재 세대와 같으면 304 Not Modified (렌더링 생략)
+# - 아니면 같은 세대 동안 렌더링된 응답 바이트를 재사용
+
+data_generation = 0
+# 재시작 후 세대 번호가 다시 0 부터 시작해도 이전 ETag 와 겹치지 않도록 시작 시각을 포함,
+# 다중 프로세스 모드에서는 워커마다 세대 번호가 따로 증가하므로 pid 도 포함
+_etag_prefix = f"{int(time.time()):x}{os.getpid():x}"
+data_last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+_generation_lock = threading.Lock()
+
+
+def bump_data_generation():
+    """데이터 변경 알림 (캐시된 응답 무효화)"""
+    global data_generation, data_last_modified
+    with _generation_lock:
+        data_generation += 1
+        data_last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ResponseCache:
+    """(경로, 쿼리, 사용자) 별 렌더링 결과 LRU 캐시 (전체 바이트 수 제한)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()    # key -> (generation, body, mimetype, headers)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != generation:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, generation, body, mimetype, headers=None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generation, body, mimetype, headers or {})
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry[1])
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+
+def cached_response(f):
+    """데이터 세대 기반 ETag / Last-Modified 와 응답 캐시를 적용하는 데코레이터"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        generation = data_generation
+        last_modified = data_last_modified
+        key = (request.path, request.query_string, session.get('username'),
+               request.headers.get('Accept-Encoding', ''))
+        etag = f"{_etag_prefix}-{generation}-{zlib.crc32(repr(key).encode()):08x}"
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            entry = response_cache.get(key, generation)
+            if entry is not None:
+                response = Response(entry[1], mimetype=entry[2], headers=entry[3])
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # 스트리밍 응답은 본문을 모으지 않고 그대로 내보낸다 (ETag 만 적용)
+                if not response.is_streamed:
+                    headers = {name: response.headers[name]
+                               for name in ('Content-Encoding', 'Vary') if name in response.headers}
+                    response_cache.put(key, generation, response.get_data(), response.mimetype, headers)
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+
 # ==================== ChirpStack 데이터 처리 ====================
 
 def process_chirpstack_data(payload):
@@ -248,10 +3407,255 @@ def process_chirpstack_data(payload):
         return processed_data
         
     except Exception as e:
-        print(f"✗ ChirpStack 데이터 처리 오류: {e}")
+        logger.error(f"✗ ChirpStack 데이터 처리 오류: {e}")
         return None
 
 
+def decode_uplink(payload, event_time=False):
+    """ChirpStack v4 uplink 이벤트를 저장용 데이터로 변환 (저장할 수 없는 값은 ValueError)
+
+    event_time=True 이면 수신 시각 대신 이벤트의 time 을 로컬 시각으로 바꿔 사용한다 (과거 데이터 가져오기).
+    """
+    object_data = payload.get('object', {})
+    uplink_logger.debug("object_data: %s", object_data)
+
+    device_info = payload.get('deviceInfo', {})
+    rx_info = payload.get('rxInfo', [{}])[0]
+
+    # 온도는 부호 없는 1바이트로 디코딩되어 들어오므로 음수로 변환
+    temperature = _number_field('temperature', object_data.get('temperature', 0))
+    if temperature is not None and temperature >= 128:
+        temperature = temperature - 256
+
+    data = {
+        'timestamp': _event_timestamp(payload) if event_time else datetime.now().isoformat(),
+        'device_name': device_info.get('deviceName', 'Unknown'),
+        'dev_eui': device_info.get('devEui', 'Unknown'),
+        'temperature': _real(temperature),
+        'rssi': _number_field('rssi', rx_info.get('rssi', 0)),
+        'snr': _real(_number_field('snr', rx_info.get('snr', 0))),
+        'f_port': payload.get('fPort', 0),
+        'f_cnt': payload.get('fCnt', 0)
+    }
+    for field in ('device_name', 'dev_eui'):
+        if not isinstance(data[field], str):
+            raise ValueError(f'{field} 가 문자열이 아님: {data[field]!r}')
+    return data
+
+
+def _number_field(name, value):
+    """숫자 필드 검증 (None 은 NULL 로 저장, 숫자가 아니면 ValueError)"""
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(f'{name} 가 숫자가 아님: {value!r}')
+    return value
+
+
+def _event_timestamp(payload):
+    """이벤트 시각(time, 없으면 첫 게이트웨이 수신 시각)을 시간대 없는 로컬 ISO 문자열로"""
+    value = payload.get('time') or (payload.get('rxInfo') or [{}])[0].get('time')
+    if not value:
+        raise ValueError('time 없음')
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
+# ==================== 대량 수신 / 과거 데이터 가져오기 ====================
+#
+# ChirpStack uplink 이벤트 여러 건을 JSON 배열 또는 NDJSON 으로 받아
+# (/uplink/batch 본문, import-uplinks 명령의 파일) 스트리밍으로 파싱한다.
+# - 디코딩은 /uplink 와 같은 decode_uplink() 를 쓰되 저장 시각은 이벤트의 time 을 사용
+# - 잘못된 이벤트는 건너뛰고 거부 건수/사유를 결과에 남김
+# - IMPORT_BATCH_SIZE 건씩 수신 대기열을 거치지 않고 바로 한 트랜잭션으로 저장
+#   (중복 제거/통계/롤업은 실시간 수신과 동일, 과거 데이터이므로 알림 평가는 하지 않음)
+# - 읽기 워커에서는 배치를 writer 프로세스의 import 명령으로 보내 저장한다
+# NDJSON 은 줄마다 _json_loads (orjson 이 있으면 orjson) 로, JSON 배열은 표준 json 으로 원소를 하나씩 읽는다.
+
+def _iter_lines(stream, buffer, read_size):
+    while True:
+        lines = buffer.split(b'\n')
+        buffer = lines.pop()
+        yield from lines
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        buffer += chunk
+    yield buffer
+
+
+def _iter_json_array(stream, buffer, read_size):
+    """'[' 뒤의 내용에서 배열 원소를 하나씩 (배열 구조가 깨지면 ValueError)"""
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    json_decoder = json.JSONDecoder()
+    text = text_decoder.decode(buffer)
+    pos = 0
+    eof = False
+    number = 0
+    while True:
+        while pos < len(text) and text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(text) and text[pos] == ']':
+            return
+        if pos < len(text):
+            try:
+                value, pos_after = json_decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f'{number + 1}번째 원소 JSON 오류: {e}')
+            else:
+                number += 1
+                yield number, value, None
+                pos = pos_after
+                continue
+        elif eof:
+            raise ValueError('JSON 배열이 끝나지 않았습니다')
+        # 원소가 잘렸으면 더 읽어서 다시 시도
+        chunk = stream.read(read_size)
+        eof = not chunk
+        text = text[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+
+def iter_uplink_events(stream, read_size=IMPORT_READ_SIZE):
+    """JSON 배열 또는 NDJSON 바이너리 스트림에서 (순번, 이벤트, 파싱 오류) 를 차례로 반환"""
+    head = stream.read(read_size)
+    while head and not head.strip():
+        head = stream.read(read_size)
+    head = head.lstrip()
+    if head.startswith(codecs.BOM_UTF8):
+        head = head[len(codecs.BOM_UTF8):].lstrip()
+    if head.startswith(b'['):
+        yield from _iter_json_array(stream, head[1:], read_size)
+        return
+
+    number = 0
+    for line in _iter_lines(stream, head, read_size):
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            yield number, _json_loads(line), None
+        except ValueError as e:
+            yield number, None, f'JSON 오류: {e}'
+
+
+def _decode_import_event(payload):
+    """가져오기용 이벤트 검증 및 디코딩 (잘못된 이벤트는 ValueError - 배치 전체가 아닌 그 이벤트만 거부)
+
+    decode_uplink() 가 deviceName / devEui / temperature / rssi / snr 을, 여기서 정수 필드를 확인한다.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('이벤트가 객체가 아님')
+    if not (payload.get('deviceInfo') or {}).get('devEui'):
+        raise ValueError('devEui 없음')
+    try:
+        data = decode_uplink(payload, event_time=True)
+    except (TypeError, AttributeError, IndexError) as e:
+        raise ValueError(f'디코딩 오류: {e}')
+    for field in ('f_cnt', 'f_port', 'rssi'):
+        if data[field] is not None and not isinstance(data[field], int):
+            raise ValueError(f'{field} 가 정수가 아님: {data[field]!r}')
+    return data
+
+
+def _import_batch(batch):
+    """가져온 배치 저장: (저장 건수, 중복 건수)"""
+    if PROCESS_ROLE == 'reader':
+        # writer 는 배치 전체를 한 트랜잭션으로 저장한 뒤 응답하므로 대기 시간을 배치 크기에 맞춤
+        # (응답 전에 시간 초과로 끊으면 저장된 배치를 실패로 알리게 되어 재시도 시 중복 저장됨)
+        timeout = WRITER_TIMEOUT + len(batch) * IMPORT_WRITER_TIMEOUT_PER_ROW
+        reply = query_writer('import', timeout=timeout, records=batch)
+        if reply is None:
+            raise ConnectionError('writer 프로세스에 연결할 수 없습니다')
+        return tuple(reply)
+    return _save_batch(batch, live=False)[1:]
+
+
+def import_uplinks(events, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """iter_uplink_events() 의 이벤트를 batch_size 건씩 저장하고 결과 dict 반환
+
+    progress(result) 는 배치를 저장할 때마다 호출된다.
+    입력 구조 오류(깨진 JSON 배열)는 그때까지 저장한 뒤 result['error'] 에 남긴다.
+    """
+    result = {'received': 0, 'stored': 0, 'duplicates': 0, 'rejected': 0, 'errors': []}
+    started = time.monotonic()
+    batch = []
+
+    def flush():
+        stored, duplicates = _import_batch(batch)
+        result['stored'] += stored
+        result['duplicates'] += duplicates
+        result['seconds'] = round(time.monotonic() - started, 3)
+        batch.clear()
+        if progress:
+            progress(result)
+
+    try:
+        for number, payload, error in events:
+            result['received'] += 1
+            if error is None:
+                try:
+                    batch.append(_decode_import_event(payload))
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                result['rejected'] += 1
+                if len(result['errors']) < IMPORT_MAX_ERRORS:
+                    result['errors'].append({'line': number, 'error': error})
+            elif len(batch) >= batch_size:
+                flush()
+    except ValueError as e:
+        result['error'] = str(e)
+    if batch:
+        flush()
+    result['seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def _log_import_progress(result):
+    logger.info(f"✓ 가져오기 진행: {result['received']}건 읽음, 저장 {result['stored']}건, "
+                f"중복 {result['duplicates']}건, 거부 {result['rejected']}건 ({result['seconds']}초)")
+
+
+@app.cli.command('import-uplinks')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--batch', 'batch_size', default=IMPORT_BATCH_SIZE, show_default=True, help='트랜잭션 당 행 수')
+def import_uplinks_command(paths, batch_size):
+    """ChirpStack uplink 이벤트 덤프 가져오기: flask --app dataServer import-uplinks FILE... (JSON 배열 / NDJSON, .gz, - 는 표준 입력)"""
+    total = {'received': 0, 'stored': 0, 'duplicates': 0, 'rejected': 0}
+
+    def progress(result):
+        rate = result['received'] / result['seconds'] if result['seconds'] else 0
+        print(f"  {result['received']}건 읽음, 저장 {result['stored']}건, 중복 {result['duplicates']}건, "
+              f"거부 {result['rejected']}건 ({rate:.0f}건/초)", flush=True)
+
+    for path in paths:
+        print(f"가져오기: {path}")
+        if path == '-':
+            stream = sys.stdin.buffer
+        elif path.endswith('.gz'):
+            stream = gzip.open(path, 'rb')
+        else:
+            stream = open(path, 'rb')
+        try:
+            with stream:
+                result = import_uplinks(iter_uplink_events(stream), batch_size, progress)
+        except (ValueError, sqlite3.Error, OSError, EOFError, WriterError) as e:
+            # 이미 저장한 배치는 남아 있음 (진행 상황 출력 참고)
+            print(f"  ✗ 가져오기 중단: {e}")
+            raise SystemExit(1)
+        for error in result['errors']:
+            print(f"  ✗ {error['line']}번째 이벤트 거부: {error['error']}")
+        if 'error' in result:
+            print(f"  ✗ 입력 오류: {result['error']}")
+        for key in total:
+            total[key] += result[key]
+    print(f"✓ 가져오기 완료: 읽음 {total['received']}건, 저장 {total['stored']}건, "
+          f"중복 {total['duplicates']}건, 거부 {total['rejected']}건")
+
+
 # ==================== Flask 라우트 ====================
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -264,7 +3668,7 @@ def login():
         if username in USERS and password in USERS[username]:
             session['logged_in'] = True
             session['username'] = username
-            return redirect(url_for('index00'))
+            return redirect(url_for('dashboard'))
         else:
             #return render_template_string(LOGIN_TEMPLATE, error="잘못된 사용자명 또는 비밀번호입니다.")
             return render_template('login_template.html', error="잘못된 사용자명 또는 비밀번호입니다.")
@@ -287,264 +3691,790 @@ def logout():
     #abort(403, description="이 리소스에 접근할 권한이 없습니다")
 
 @app.route('/')
+@app.route('/data<size>')
 @login_required
-def index00():
-    """메인 대시보드"""
-    data = get_latest_data(20)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_20.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
-
-
-@app.route('/data10')
-@login_required
-def index10():
-    """메인 대시보드"""
-    data = get_latest_data(10)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_10.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
+@cached_response
+def dashboard(size=None):
+    """메인 대시보드 (/?limit=N, /data20 · /data1k 등 기존 경로는 limit 별칭)
 
+    DASHBOARD_STREAM_MIN_LIMIT 를 넘는 limit 은 행을 하나씩 렌더링하며 바로 내보내므로
+    첫 바이트까지의 시간과 메모리 사용량이 행 수와 무관하다 (응답 캐시에는 저장하지 않음)
+    """
+    if size is not None:
+        limit = DASHBOARD_ALIASES.get(size)
+        if limit is None:
+            abort(404)
+    else:
+        limit = request.args.get('limit', str(DASHBOARD_DEFAULT_LIMIT))
+        limit = int(limit) if limit.isdigit() else 0
+        if not 1 <= limit <= DASHBOARD_MAX_LIMIT:
+            return Response(f"limit 은 1 ~ {DASHBOARD_MAX_LIMIT} 사이의 정수여야 합니다", status=400)
 
-@app.route('/data20')
-@login_required
-def index20():
-    """메인 대시보드"""
-    data = get_latest_data(20)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_20.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
-
+    rows = iter_latest_rows(limit)
+    first = next(rows, None)
+    context = {
+        'data': (dict(zip(LORAWAN_COLUMNS, row)) for row in itertools.chain([first], rows)),
+        'has_data': first is not None,
+        'limit': limit,
+        'live': limit <= DASHBOARD_LIVE_MAX_LIMIT,
+        'stats': get_statistics(),
+        'username': session.get('username', 'User')
+    }
 
-@app.route('/data50')
-@login_required
-def index50():
-    """메인 대시보드"""
-    data = get_latest_data(50)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_50.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
+    if limit <= DASHBOARD_STREAM_MIN_LIMIT:
+        return render_template('dashboard_template.html', **context)
+    return Response(_join_chunks(stream_template('dashboard_template.html', **context),
+                                 DASHBOARD_STREAM_BUFFER),
+                    mimetype='text/html')
 
 
-@app.route('/data100')
-@login_required
-def index100():
-    """메인 대시보드"""
-    data = get_latest_data(100)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_100.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
+def _join_chunks(chunks, size):
+    """템플릿이 내보내는 작은 문자열 조각을 size 개씩 모아 전송 (조각마다 쓰면 시스템 콜이 너무 많음)"""
+    while True:
+        batch = ''.join(itertools.islice(chunks, size))
+        if not batch:
+            break
+        yield batch.encode('utf-8')
 
 
-@app.route('/data1k')
+@app.route('/api/records')
 @login_required
-def index1k():
-    """메인 대시보드"""
-    data = get_latest_data(1000)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_1k.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
-
+@cached_response
+def api_records():
+    """API: 키셋 페이지네이션 레코드 조회
 
-@app.route('/data10k')
-@login_required
-def index10k():
-    """메인 대시보드"""
-    data = get_latest_data(10000)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_10k.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
+    쿼리 인자: after_id, before_id, limit (최대 RECORDS_MAX_PAGE_SIZE),
+              dev_eui, from, to (ISO 시간), fields (쉼표 구분 컬럼),
+              format (json|columnar|msgpack|arrow)
+    """
+    try:
+        page = get_records_page(request.args)
+        columns = page.pop('columns')
+        rows = page.pop('rows')
+        return encode_rows_response(columns, rows, page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
 
-@app.route('/data30k')
-@login_required
-def index30k():
-    """메인 대시보드"""
-    data = get_latest_data(30000)
-    stats = get_statistics()
-    username = session.get('username', 'User')
-    
-    return render_template(
-        'dashboard_template_30k.html',
-        data=data, 
-        stats=stats, 
-        username=username
-    )
 
+# 고정 크기 API (기존 클라이언트 호환용 - 신규 클라이언트는 /api/records 사용)
 @app.route('/api/data20')
 @login_required
+@cached_response
 def api_data20():
-    """API: 최근 데이터 JSON 형식으로 반환"""
+    """API: 최근 데이터 반환 (format: json|columnar|msgpack|arrow)"""
     limit = request.args.get('limit', 20, type=int)
-    data = get_latest_data(limit)
-    return jsonify(data)
+    return encode_rows_response(LORAWAN_COLUMNS, get_latest_rows(limit))
 
 @app.route('/api/data50')
 @login_required
+@cached_response
 def api_data50():
-    """API: 최근 데이터 JSON 형식으로 반환"""
+    """API: 최근 데이터 반환 (format: json|columnar|msgpack|arrow)"""
     limit = request.args.get('limit', 50, type=int)
-    data = get_latest_data(limit)
-    return jsonify(data)
+    return encode_rows_response(LORAWAN_COLUMNS, get_latest_rows(limit))
 
 @app.route('/api/data100')
 @login_required
+@cached_response
 def api_data100():
-    """API: 최근 데이터 JSON 형식으로 반환"""
+    """API: 최근 데이터 반환 (format: json|columnar|msgpack|arrow)"""
     limit = request.args.get('limit', 100, type=int)
-    data = get_latest_data(limit)
-    return jsonify(data)
+    return encode_rows_response(LORAWAN_COLUMNS, get_latest_rows(limit))
 
 @app.route('/api/data10k')
 @login_required
+@cached_response
 def api_data10k():
-    """API: 최근 데이터 JSON 형식으로 반환"""
+    """API: 최근 데이터 반환 (format: json|columnar|msgpack|arrow)"""
     limit = request.args.get('limit', 10000, type=int)
-    data = get_latest_data(limit)
-    return jsonify(data)
+    return encode_rows_response(LORAWAN_COLUMNS, get_latest_rows(limit))
 
 @app.route('/api/data30k')
 @login_required
+@cached_response
 def api_data30k():
-    """API: 최근 데이터 JSON 형식으로 반환"""
+    """API: 최근 데이터 반환 (format: json|columnar|msgpack|arrow)"""
     limit = request.args.get('limit', 30000, type=int)
-    data = get_latest_data(limit)
-    return jsonify(data)
+    return encode_rows_response(LORAWAN_COLUMNS, get_latest_rows(limit))
 
 
 # SQLite 데이터를 엑셀로 변환하는 함수
-def create_excel_from_db(query, params=None):
-    with db_lock:
-        try:
-            # 데이터베이스 연결
-            conn = sqlite3.connect(DB_PATH)
-            conn.row_factory = sqlite3.Row  # 컬럼명 접근을 위해
-            cursor = conn.cursor()
-    
-            # 쿼리 실행
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-    
-            rows = cursor.fetchall()
-    
-            # 엑셀 워크북 생성
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "데이터"
-            
-            if rows:
-                # 헤더 스타일 설정
-                header_font = Font(bold=True, color="FFFFFF")
-                header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        
-                # 헤더 작성
-                columns = rows[0].keys()
-                for col_idx, column in enumerate(columns, 1):
-                    cell = ws.cell(row=1, column=col_idx, value=column)
-                    cell.font = header_font
-                    cell.fill = header_fill
-        
-                # 데이터 작성
-                for row_idx, row in enumerate(rows, 2):
-                    for col_idx, column in enumerate(columns, 1):
-                        ws.cell(row=row_idx, column=col_idx, value=row[column])
+def create_excel_from_db(query, params=None, conn=None, output=None, progress=None):
+    """쿼리 결과를 엑셀 파일로 변환 (output 을 주지 않으면 임시 파일 객체를 만들어 반환)
+
+    커서에서 EXPORT_FETCH_SIZE 행씩 읽어 write-only 워크북에 바로 기록하므로
+    테이블 크기와 관계없이 메모리 사용량이 일정하다.
+    열 너비는 처음 EXCEL_WIDTH_SAMPLE_ROWS 행으로 추정한다.
+    conn 은 스냅샷 읽기용 연결, progress(기록한 행 수) 는 청크마다 호출된다.
+    """
+    try:
+        # 데이터베이스 연결 (스레드별 읽기 연결 - 수신 저장을 막지 않음)
+        cursor = (conn or get_read_connection()).cursor()
+
+        # 쿼리 실행
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+
+        columns = [description[0] for description in cursor.description]
+        sample = cursor.fetchmany(EXCEL_WIDTH_SAMPLE_ROWS)
+
+        # 엑셀 워크북 생성 (write-only: 행을 순서대로 디스크에 기록)
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("데이터")
         
-                # 열 너비 자동 조정
-                for column in ws.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-            
-            conn.close()
+        if sample:
+            # 열 너비 추정 (샘플 기준, 헤더 포함)
+            for col_idx, column in enumerate(columns):
+                max_length = max(len(str(row[col_idx])) for row in sample)
+                max_length = max(max_length, len(column))
+                adjusted_width = min(max_length + 2, 50)
+                ws.column_dimensions[get_column_letter(col_idx + 1)].width = adjusted_width
+
+            # 헤더 스타일 설정
+            header_font = Font(bold=True, color="FFFFFF")
+            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
     
-            # 메모리에 엑셀 파일 저장
-            excel_file = BytesIO()
-            wb.save(excel_file)
-            excel_file.seek(0)
+            # 헤더 작성
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(ws, value=column)
+                cell.font = header_font
+                cell.fill = header_fill
+                header.append(cell)
+            ws.append(header)
     
-            return excel_file
+            # 데이터 작성
+            rows = sample
+            written = 0
+            while rows:
+                for row in rows:
+                    ws.append(row)
+                written += len(rows)
+                if progress:
+                    progress(written)
+                rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+        
+        cursor.close()
 
-        except sqlite3.Error as e:
-            print(f"✗ 데이터 저장 오류: {e}")
-            return None
+        # 임시 파일에 저장 (닫히면 자동 삭제)
+        excel_file = output or tempfile.TemporaryFile()
+        wb.save(excel_file)
+        excel_file.seek(0)
+
+        return excel_file
+
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 저장 오류: {e}")
+        return None
 
 @app.route('/download/all')
 @login_required
 def download_all():
+    """전체 데이터 엑셀 다운로드
+
+    백그라운드 내보내기 작업으로 만들고 EXPORT_JOB_WAIT 초 안에 끝나면 바로 전송한다.
+    더 걸리면 202 와 작업 상태를 돌려주므로 /api/exports/<id> 로 확인 후 내려받는다.
+    """
     try:
-        query = "SELECT * FROM lorawan_data"
-        excel_file = create_excel_from_db(query)
+        job = submit_export('xlsx', {})
+        deadline = time.monotonic() + EXPORT_JOB_WAIT
+        while job['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.2)
+            job = get_export_job(job['id'])
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 503
+    except WriterError as e:
+        return jsonify({'error': str(e)}), 500
 
-        filename = f"seoul015_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    if job['status'] == 'done':
+        return _send_export(job)
+    if job['status'] in ('queued', 'running'):
+        return _export_job_response(job, 202)
+    return jsonify({'error': job.get('error') or '내보내기 실패'}), 500
 
-        return send_file(
-            excel_file,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+
+# ==================== 데이터 내보내기 (CSV / NDJSON / Parquet) ====================
+
+EXPORT_MIMETYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def _iter_export_rows(conditions, params, time_range=(None, None), conn=None):
+    """필터 조건에 맞는 행을 EXPORT_FETCH_SIZE 단위 청크로 반환 (id 순, conn: 스냅샷 읽기용 연결)"""
+    sql, params = select_records_sql(LORAWAN_COLUMNS, conditions, params, time_range=time_range)
+    cursor = (conn or get_read_connection()).cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _export_csv(chunks):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LORAWAN_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _export_ndjson(chunks):
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(LORAWAN_COLUMNS, row)), ensure_ascii=False) + '\n'
+            for row in rows
+        ).encode('utf-8')
+
+
+def _parquet_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('timestamp', pa.string()),
+        ('device_name', pa.string()),
+        ('dev_eui', pa.string()),
+        ('temperature', pa.float64()),
+        ('rssi', pa.int64()),
+        ('snr', pa.float64()),
+        ('f_port', pa.int64()),
+        ('f_cnt', pa.int64()),
+        ('created_at', pa.string())
+    ])
+
+
+def _export_parquet(chunks):
+    """청크마다 row group 하나를 기록하고, 파일에 기록된 만큼 바로 전송"""
+    schema = _parquet_schema()
+    fd, path = tempfile.mkstemp(suffix='.parquet')
+    os.close(fd)
+    try:
+        with open(path, 'rb') as reader:
+            writer = pq.ParquetWriter(path, schema, compression='zstd')
+            try:
+                for rows in chunks:
+                    columns = list(zip(*rows))
+                    table = pa.Table.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                        schema=schema
+                    )
+                    writer.write_table(table)
+                    data = reader.read()
+                    if data:
+                        yield data
+            finally:
+                writer.close()
+            yield reader.read()
+    finally:
+        os.remove(path)
+
+
+EXPORT_WRITERS = {
+    'csv': _export_csv,
+    'ndjson': _export_ndjson,
+    'parquet': _export_parquet
+}
+
+
+@app.route('/download/export')
+@login_required
+def download_export():
+    """필터 조건에 맞는 데이터를 CSV / NDJSON / Parquet 로 스트리밍 다운로드
+
+    쿼리 인자: format (csv|ndjson|parquet), dev_eui, from, to (ISO 시간)
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_WRITERS:
+        return jsonify({'error': f'지원하지 않는 형식: {export_format}'}), 400
+    if export_format == 'parquet' and pq is None:
+        return jsonify({'error': 'Parquet 내보내기에는 pyarrow 가 필요합니다'}), 501
+
+    try:
+        conditions, params, time_range = _parse_record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    chunks = _iter_export_rows(conditions, params, time_range)
+    filename = f"seoul015_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+
+    return Response(
+        stream_with_context(_timed_export(export_format, EXPORT_WRITERS[export_format](chunks))),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+# ==================== 백그라운드 내보내기 작업 ====================
+#
+# 큰 내보내기는 요청 스레드에서 만들지 않고 작업으로 제출한다.
+#   POST /api/exports                → 작업 제출 (202, Location: 상태 URL)
+#   GET  /api/exports/<id>           → 진행 상황 (rows / total)
+#   GET  /api/exports/<id>/download  → 완료된 파일
+# 작업은 EXPORT_JOB_WORKERS 개의 스레드 풀에서 작업마다 읽기 전용 연결을 새로 열고,
+# 읽기 트랜잭션 하나 안에서 건수와 행을 읽어 한 시점의 스냅샷을 내보낸다 (WAL 이라 쓰기를 막지 않음).
+# 완료된 파일은 EXPORT_JOB_DIR 에 두고, 새 데이터가 들어오기 전(data_generation 이 같을 때)
+# 같은 형식/조건으로 제출하면 다시 만들지 않고 그 작업을 돌려준다.
+# 파일은 마지막 사용 후 EXPORT_JOB_RETENTION 초가 지나면 삭제하고, 전체 크기가 EXPORT_JOB_QUOTA_BYTES 를
+# 넘으면 이전 세대 파일부터, 같은 세대에서는 오래 쓰이지 않은 순으로 삭제한다.
+# 작업 목록은 저장을 담당하는 프로세스(standalone / writer)의 메모리에 있고,
+# 읽기 워커는 writer 프로세스에 제출/조회를 요청한 뒤 같은 디렉토리의 파일을 직접 전송한다.
+
+class ExportJobs:
+    """내보내기 작업 목록, 작업 스레드 풀, 완료 파일 캐시"""
+
+    def __init__(self, directory, workers, quota_bytes, retention):
+        self.directory = directory
+        self.workers = workers
+        self.quota_bytes = quota_bytes
+        self.retention = retention
+        self._jobs = OrderedDict()     # id -> 작업 dict (제출 순)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _start(self):
+        """첫 제출 때 디렉토리와 스레드 풀 준비 (작업 목록이 없는 이전 실행의 파일은 삭제)"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.startswith('export-'):
+                os.remove(os.path.join(self.directory, name))
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='export')
+
+    def submit(self, export_format, filters):
+        """작업 제출 후 작업 정보 반환 (같은 형식/조건의 현재 세대 작업이 있으면 그 작업)"""
+        generation = data_generation
+        now = time.time()
+        with self._lock:
+            if self._executor is None:
+                self._start()
+            self._expire(now)
+            for job in reversed(self._jobs.values()):
+                if (job['format'] == export_format and job['filters'] == filters
+                        and job['generation'] == generation and job['status'] in ('queued', 'running', 'done')):
+                    job['accessed'] = now
+                    return dict(job)
+
+            job_id = os.urandom(8).hex()
+            job = {
+                'id': job_id,
+                'format': export_format,
+                'filters': filters,
+                'status': 'queued',
+                'generation': generation,
+                'rows': 0,
+                'total': None,
+                'bytes': 0,
+                'error': None,
+                'submitted': datetime.now().isoformat(),
+                'finished': None,
+                'filename': f"seoul015_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}",
+                'path': os.path.abspath(os.path.join(self.directory, f'export-{job_id}.{export_format}')),
+                'accessed': now
+            }
+            self._jobs[job_id] = job
+        self._executor.submit(self._run, job)
+        return dict(job)
+
+    def get(self, job_id, touch=False):
+        """작업 정보 (없으면 None, touch: 내려받을 때 마지막 사용 시각 갱신)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if touch:
+                job['accessed'] = time.time()
+            return dict(job)
+
+    def _run(self, job):
+        job['status'] = 'running'
+        started = time.perf_counter()
+        temp_path = job['path'] + '.tmp'
+        conn = _open_connection(read_only=True)
+        try:
+            conditions, params, time_range = _parse_record_filters(job['filters'])
+            # 건수와 행을 같은 읽기 트랜잭션에서 읽는다 (스냅샷은 첫 SELECT 시점에 고정)
+            conn.execute('BEGIN')
+            count_sql, count_params = select_records_sql(('id',), conditions, params, time_range=time_range)
+            job['total'] = conn.execute(f'SELECT COUNT(*) FROM ({count_sql})', count_params).fetchone()[0]
+            with open(temp_path, 'wb') as output:
+                self._write(job, conn, conditions, params, time_range, output)
+            os.replace(temp_path, job['path'])
+        except Exception as e:
+            logger.error(f"✗ 내보내기 작업 오류 ({job['id']}): {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            with self._lock:
+                job.update(status='failed', error=str(e), finished=datetime.now().isoformat())
+            return
+        finally:
+            conn.close()
+            export_seconds.observe(time.perf_counter() - started, (job['format'],))
+
+        with self._lock:
+            job.update(status='done', bytes=os.path.getsize(job['path']), finished=datetime.now().isoformat())
+            self._expire(time.time(), keep=job)
+        logger.info(f"✓ 내보내기 완료 ({job['id']}): {job['rows']}행, {job['bytes']} bytes")
+
+    @staticmethod
+    def _write(job, conn, conditions, params, time_range, output):
+        """스냅샷 연결에서 읽은 행을 형식에 맞게 output 에 기록 (job['rows'] 에 진행 상황)"""
+        if job['format'] == 'xlsx':
+            def progress(rows):
+                job['rows'] = rows
+
+            query, query_params = select_records_sql(LORAWAN_COLUMNS, conditions, params, time_range=time_range)
+            if create_excel_from_db(query, query_params, conn, output, progress) is None:
+                raise RuntimeError('엑셀 파일 생성 실패')
+            return
+
+        def counted(chunks):
+            for rows in chunks:
+                job['rows'] += len(rows)
+                yield rows
+
+        chunks = counted(_iter_export_rows(conditions, params, time_range, conn))
+        for data in EXPORT_WRITERS[job['format']](chunks):
+            output.write(data)
+
+    def _expire(self, now, keep=None):
+        """보관 시간이 지난 작업을 지우고 파일 크기 합을 한도 안으로 (self._lock 안에서 호출, keep 은 남김)"""
+        for job in list(self._jobs.values()):
+            if job['status'] in ('done', 'failed', 'expired') and now - job['accessed'] > self.retention:
+                self._remove_file(job)
+                del self._jobs[job['id']]
+
+        done = [job for job in self._jobs.values() if job['status'] == 'done' and job is not keep]
+        total = sum(job['bytes'] for job in done) + (keep['bytes'] if keep else 0)
+        # 새 데이터가 들어와 다시 쓰이지 않을 이전 세대 파일부터, 같은 세대는 오래 쓰이지 않은 순
+        done.sort(key=lambda job: (job['generation'] == data_generation, job['accessed']))
+        for job in done:
+            if total <= self.quota_bytes:
+                break
+            total -= job['bytes']
+            self._remove_file(job)
+            job['status'] = 'expired'
+
+    @staticmethod
+    def _remove_file(job):
+        try:
+            os.remove(job['path'])
+        except FileNotFoundError:
+            pass
+
+
+export_jobs = ExportJobs(EXPORT_JOB_DIR, EXPORT_JOB_WORKERS, EXPORT_JOB_QUOTA_BYTES, EXPORT_JOB_RETENTION)
+
+
+def submit_export(export_format, filters):
+    """내보내기 작업 제출 (읽기 워커는 writer 프로세스에 요청, 연결 실패 시 ConnectionError)"""
+    if PROCESS_ROLE != 'reader':
+        return export_jobs.submit(export_format, filters)
+    job = query_writer('export_submit', format=export_format, filters=filters)
+    if job is None:
+        raise ConnectionError('writer 프로세스에 연결할 수 없습니다')
+    return job
+
+
+def get_export_job(job_id, touch=False):
+    """내보내기 작업 정보 (없으면 None, 읽기 워커는 writer 프로세스에 요청)"""
+    if PROCESS_ROLE != 'reader':
+        return export_jobs.get(job_id, touch)
+    job = query_writer('export_status', id=job_id, touch=touch)
+    if job is None:
+        raise ConnectionError('writer 프로세스에 연결할 수 없습니다')
+    return job or None
+
+
+def _export_job_response(job, status=200):
+    """작업 정보 JSON (서버 내부 경로 제외, 상태/내려받기 URL 포함)"""
+    info = {key: value for key, value in job.items() if key not in ('path', 'accessed')}
+    info['status_url'] = url_for('api_export_status', job_id=job['id'])
+    if job['status'] == 'done':
+        info['download_url'] = url_for('api_export_download', job_id=job['id'])
+    response = jsonify(info)
+    response.status_code = status
+    if status == 202:
+        response.headers['Location'] = info['status_url']
+    return response
+
+
+def _send_export(job):
+    try:
+        return send_file(job['path'], mimetype=EXPORT_MIMETYPES[job['format']],
+                         as_attachment=True, download_name=job['filename'])
+    except FileNotFoundError:
+        # 조회와 전송 사이에 한도 초과로 삭제된 경우
+        return jsonify({'error': '내보내기 파일이 만료되었습니다. 다시 제출하세요'}), 410
+
+
+@app.route('/api/exports', methods=['POST'])
+@login_required
+def api_export_submit():
+    """API: 내보내기 작업 제출
+
+    인자 (JSON 본문 또는 폼/쿼리): format (xlsx|csv|ndjson|parquet), dev_eui, from, to (ISO 시간)
+    새 데이터가 들어오기 전에 같은 조건으로 제출된 작업이 있으면 그 작업을 돌려준다.
+    """
+    args = request.get_json(silent=True) or request.values
+    export_format = args.get('format', 'csv')
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'error': f'지원하지 않는 형식: {export_format}'}), 400
+    if export_format == 'parquet' and pq is None:
+        return jsonify({'error': 'Parquet 내보내기에는 pyarrow 가 필요합니다'}), 501
+
+    filters = {name: str(args[name]) for name in ('dev_eui', 'from', 'to') if args.get(name)}
+    try:
+        _parse_record_filters(filters)
+        job = submit_export(export_format, filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 503
+    except WriterError as e:
+        return jsonify({'error': str(e)}), 500
+    return _export_job_response(job, 200 if job['status'] == 'done' else 202)
+
+
+@app.route('/api/exports/<job_id>')
+@login_required
+def api_export_status(job_id):
+    """API: 내보내기 작업 상태 (queued|running|done|failed|expired, rows / total)"""
+    try:
+        job = get_export_job(job_id)
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 503
+    except WriterError as e:
+        return jsonify({'error': str(e)}), 500
+    if job is None:
+        return jsonify({'error': 'Unknown export job'}), 404
+    return _export_job_response(job)
+
+
+@app.route('/api/exports/<job_id>/download')
+@login_required
+def api_export_download(job_id):
+    """완료된 내보내기 파일 다운로드"""
+    try:
+        job = get_export_job(job_id, touch=True)
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 503
+    except WriterError as e:
+        return jsonify({'error': str(e)}), 500
+    if job is None:
+        return jsonify({'error': 'Unknown export job'}), 404
+    if job['status'] == 'expired':
+        return jsonify({'error': '내보내기 파일이 만료되었습니다. 다시 제출하세요'}), 410
+    if job['status'] != 'done':
+        return _export_job_response(job, 409)
+    return _send_export(job)
+
+
+@app.route('/api/devices')
+@login_required
+@cached_response
+def api_devices():
+    """API: 디바이스별 최신 상태 목록 (메모리 캐시)"""
+    devices = device_states.snapshot()
+    return jsonify({'count': len(devices), 'devices': devices})
+
+
+@app.route('/api/devices/<dev_eui>')
+@login_required
+@cached_response
+def api_device(dev_eui):
+    """API: 디바이스 최신 상태"""
+    state = device_states.get(dev_eui)
+    if state is None:
+        return jsonify({'error': 'Unknown device'}), 404
+    return jsonify(state)
+
+
+@app.route('/api/devices/<dev_eui>/history')
+@login_required
+@cached_response
+def api_device_history(dev_eui):
+    """API: 디바이스 장기 이력 (롤업 기반)
+
+    쿼리 인자: from, to (ISO 시간, 기본: 최근 24시간), points (포인트 수 예산)
+    """
+    try:
+        end = request.args.get('to')
+        end = datetime.fromisoformat(end) if end else datetime.now()
+        start = request.args.get('from')
+        start = datetime.fromisoformat(start) if start else end - timedelta(days=1)
+    except ValueError as e:
+        return jsonify({'error': f'잘못된 시간 형식: {e}'}), 400
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return jsonify({'error': '시간대 없는 로컬 시각을 사용하세요'}), 400
+
+    points = request.args.get('points', ROLLUP_DEFAULT_POINTS, type=int)
+    points = max(1, min(points, ROLLUP_MAX_POINTS))
+
+    try:
+        return jsonify(get_device_history(dev_eui, start, end, points))
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/devices/<dev_eui>/series')
+@login_required
+@cached_response
+def api_device_series(dev_eui):
+    """API: 디바이스 원본 시계열 (시간순, 복합 인덱스 범위 조회)
+
+    쿼리 인자: from, to (ISO 시간, 기본: 최근 24시간), limit (최대 SERIES_MAX_LIMIT)
+    """
+    try:
+        end = request.args.get('to')
+        end = datetime.fromisoformat(end) if end else datetime.now()
+        start = request.args.get('from')
+        start = datetime.fromisoformat(start) if start else end - timedelta(days=1)
+    except ValueError as e:
+        return jsonify({'error': f'잘못된 시간 형식: {e}'}), 400
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return jsonify({'error': '시간대 없는 로컬 시각을 사용하세요'}), 400
+
+    limit = request.args.get('limit', SERIES_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, SERIES_MAX_LIMIT))
+
+    try:
+        return jsonify(get_device_series(dev_eui, start, end, limit))
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/analytics')
+@login_required
+@cached_response
+def api_analytics():
+    """API: 구간 분석 (온도 백분위, RSSI/SNR 히스토그램, f_cnt 기반 패킷 손실, 디바이스별 링크 점수)
+
+    쿼리 인자: dev_eui (생략 시 전체), from, to (ISO 시간, 기본: 최근 24시간),
+              devices (응답에 넣을 디바이스 수, 링크 점수 낮은 순)
+    """
+    if np is None:
+        return jsonify({'error': '분석 API 에는 numpy 가 필요합니다'}), 501
+
+    try:
+        end = request.args.get('to')
+        end = datetime.fromisoformat(end) if end else None
+        start = request.args.get('from')
+        start = datetime.fromisoformat(start) if start else None
+    except ValueError as e:
+        return jsonify({'error': f'잘못된 시간 형식: {e}'}), 400
+    if any(moment is not None and moment.tzinfo is not None for moment in (start, end)):
+        return jsonify({'error': '시간대 없는 로컬 시각을 사용하세요'}), 400
+
+    limit = request.args.get('devices', ANALYTICS_DEFAULT_DEVICES, type=int)
+    limit = max(0, limit)
+
+    try:
+        result = get_analytics(request.args.get('dev_eui') or None, start, end)
+    except sqlite3.Error as e:
+        logger.error(f"✗ 데이터 조회 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify(dict(result, devices=result['devices'][:limit]))
+
+
+@app.route('/api/stream')
+@login_required
+def api_stream():
+    """API: 신규 데이터 및 통계 실시간 전송 (Server-Sent Events)"""
+    subscriber = live_feed.subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'Too many live subscribers'}), 503, {'Retry-After': '30'}
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    def generate():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+
+            # 재연결 시 놓친 데이터를 링 버퍼에서 이어서 전송
+            if last_event_id is not None:
+                missed = [row for row in recent_buffer.latest(SSE_QUEUE_SIZE) if row[0] > last_event_id]
+                if missed:
+                    missed.reverse()
+                    yield _format_sse(missed)
+
+            deadline = time.monotonic() + SSE_MAX_CONNECTION_TIME
+            while time.monotonic() < deadline:
+                try:
+                    message = subscriber.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @app.route('/api/stats')
 @login_required
+@cached_response
 def api_stats():
     """API: 통계 정보 JSON 형식으로 반환"""
     stats = get_statistics()
     return jsonify(stats)
 
 
+@app.route('/api/alerts')
+@login_required
+def api_alerts():
+    """API: 현재 발생 중인 알림 (임계값 / 무응답)"""
+    if PROCESS_ROLE == 'reader':
+        try:
+            alerts = query_writer('alerts')
+        except WriterError as e:
+            return jsonify({'error': str(e)}), 500
+        if alerts is None:
+            return jsonify({'error': 'writer 프로세스에 연결할 수 없습니다'}), 503
+    else:
+        alerts = alert_engine.active()
+    return jsonify({'count': len(alerts), 'alerts': alerts})
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 수집용 지표 (텍스트 형식, 로그인 불필요)
+
+    읽기 워커에서는 요청/내보내기 지표는 해당 워커의 값이고, 저장 쪽 지표는 writer 프로세스에서 받아 붙인다.
+    """
+    if PROCESS_ROLE == 'reader':
+        try:
+            body = render_metrics(writer_side=False) + query_writer('metrics', '')
+        except WriterError as e:
+            return Response(f'# writer 지표 오류: {e}\n', status=500, mimetype='text/plain; charset=utf-8')
+    else:
+        body = render_metrics()
+    return Response(body, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 #@app.route('/webhook', methods=['POST'])
 @app.route('/uplink', methods=['POST'])
 def chirpstack_webhook():
@@ -552,101 +4482,80 @@ def chirpstack_webhook():
     ChirpStack HTTP Integration Webhook
     포트 8088로 수신
     """
-    query = parse_qs(urlparse(request.url).query)
-    #print('query:', query)
-    #if query['event'][0] in ['join']:
-    if query['event'][0] not in ['up']:
-        return jsonify({'not up packet': str(query)}), 500
+    event = request.args.get('event')
+    if event not in ('up', 'join'):
+        return jsonify({'not up packet': str(request.args.to_dict(flat=False))}), 500
 
     try:
-        # JSON 데이터 수신
-        payload = request.get_json()
+        # JSON 데이터 수신 (고속 디코더로 본문 직접 파싱)
+        try:
+            payload = _json_loads(request.get_data(cache=False))
+        except ValueError:
+            return jsonify({'error': 'Invalid JSON'}), 400
         
         if not payload:
             return jsonify({'error': 'No data received'}), 400
-        #else:
-            #print('payload:', payload)
         
-        # 데이터 처리
-        object_data = payload.get('object', {})
-        print('object_data:', object_data)
-
-        device_info = payload.get('deviceInfo', {})
-        device_name = device_info.get('deviceName', 'Unknown')
-        dev_eui = device_info.get('devEui', 'Unknown')
-
-        #data = payload.get('data', {})
-        #rx_info = payload.get('rxInfo', [{}])[0] if payload.get('rxInfo') else {}
-        rx_info = payload.get('rxInfo', [{}])[0]
-
-        #print('deviceInfo:', device_info)
-        #print('data:', data)
-        #print('rxInfo:', rx_info)
+        if event == 'join':
+            # 재접속하면 f_cnt 가 0 부터 다시 시작하므로 writer 에 중복 판정 기록 초기화를 요청
+            dev_eui = payload.get('deviceInfo', {}).get('devEui')
+            if not dev_eui:
+                return jsonify({'error': 'No devEui'}), 400
+            if not enqueue_lorawan_data({'event': 'join', 'dev_eui': dev_eui}):
+                return jsonify({'error': 'Ingest queue full'}), 503, {'Retry-After': '1'}
+            uplink_logger.info("✓ 재접속(join) 수신 Device: %s", dev_eui)
+            return jsonify({'status': 'success', 'message': 'Join received'}), 200
         
-        # 디코딩된 데이터 추출
-        object_data = payload.get('object', {})
-        #print('object:', object_data)
+        # 데이터 처리 (잘못된 값은 대기열에 넣기 전에 거부 - 수신 응답 후에는 알릴 수 없음)
+        try:
+            processed_data = decode_uplink(payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        #print('timestamp', datetime.now().isoformat())
-        #print('device_name', device_info.get('deviceName', 'Unknown'))
-        #print('dev_eui', device_info.get('devEui', 'Unknown'))
-        #print('temperature', object_data.get('temperature'))
-        #print('rssi', rx_info.get('rssi'))
-        #print('snr', rx_info.get('loRaSNR'))
-        #print('f_port', payload.get('fPort', 0))
-        #print('f_cnt', payload.get('fCnt', 0))
-
-        #if 'data' in object_data:
-            #temperature = object_data.get('temperature')
-        #else:
-            #temperature = 0
-        temperature = object_data.get('temperature', 0)
-        print('temperature:', temperature)
-        if temperature >= 128:
-            temperature = temperature - 256
-        #elif temperature == 0:
-            #temperature = 0.1
-        print('temperature:', temperature)
-
-        # 처리된 데이터 생성
-        #timestamp = datetime.now() + timedelta(hours=9)
-        processed_data = {
-            'timestamp': datetime.now().isoformat(),
-            #'timestamp': timestamp.isoformat(),
-            'device_name': device_info.get('deviceName', 'Unknown'),
-            'dev_eui': device_info.get('devEui', 'Unknown'),
-            #'temperature': object_data.get('temperature', 0),
-            'temperature': temperature,
-            'rssi': rx_info.get('rssi', 0),
-            #'snr': rx_info.get('loRaSNR'),
-            'snr': rx_info.get('snr', 0),
-            'f_port': payload.get('fPort', 0),
-            'f_cnt': payload.get('fCnt', 0)
-        }
+        # 수신 대기열 등록 (저장은 writer 스레드가 배치로 처리)
+        if not enqueue_lorawan_data(processed_data):
+            logger.error("✗ 수신 대기열 가득 참 - 요청 거부")
+            return jsonify({'error': 'Ingest queue full'}), 503, {'Retry-After': '1'}
         
-        #return processed_data
-
-        #processed_data = process_chirpstack_data(payload)
-        if processed_data:
-            # 데이터베이스 저장
-            record_id = save_lorawan_data(processed_data)
-            
-            print(f"✓ 데이터 수신 및 저장 (ID: {record_id})")
-            print(f"  Device: {processed_data['device_name']} ({processed_data['dev_eui']})")
-            print(f"  Temperature: {processed_data['temperature']}°C")
-            print(f"  RSSI: {processed_data['rssi']} dBm")
-            
-            return jsonify({
-                'status': 'success',
-                'record_id': record_id,
-                'message': 'Data received and stored'
-            }), 200
-        else:
-            return jsonify({'error': 'Failed to process data'}), 400
+        uplink_logger.info(
+            "✓ 데이터 수신 (대기열 등록) Device: %s (%s) Temperature: %s°C RSSI: %s dBm",
+            processed_data['device_name'], processed_data['dev_eui'],
+            processed_data['temperature'], processed_data['rssi']
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Data received and queued'
+        }), 200
             
     except Exception as e:
-        print(f"✗ Webhook 오류: {e}")
+        logger.error(f"✗ Webhook 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/uplink/batch', methods=['POST'])
+def chirpstack_webhook_batch():
+    """ChirpStack uplink 이벤트 여러 건 수신 (JSON 배열 또는 NDJSON, Content-Encoding: gzip 가능)
+
+    장애 기간 백필이나 다른 서버에서의 이전용. 이벤트의 time 을 저장 시각으로 사용한다.
+    """
+    stream = request.stream
+    if request.headers.get('Content-Encoding') == 'gzip':
+        stream = gzip.GzipFile(fileobj=stream)
+    try:
+        result = import_uplinks(iter_uplink_events(stream), progress=_log_import_progress)
+    except ConnectionError as e:
+        logger.error(f"✗ 대량 수신 오류: {e}")
+        return jsonify({'error': str(e)}), 503
+    except ValueError as e:
+        logger.error(f"✗ 대량 수신 오류: {e}")
+        return jsonify({'error': str(e)}), 400
+    except (sqlite3.Error, OSError, EOFError, WriterError) as e:
+        logger.error(f"✗ 대량 수신 오류: {e}")
         return jsonify({'error': str(e)}), 500
+    if result['received']:
+        uplink_logger.info("✓ 대량 수신: %s건 중 %s건 저장", result['received'], result['stored'])
+    return jsonify(result), 400 if 'error' in result else 200
 
 
 # ==================== 메인 실행 ====================
@@ -3,7 +3,8 @@
 blzPid=`ps aux | grep "dataServer:app" | awk '{ print $2 }'`
 
 if [ -n "$blzPid" ]; then
-    echo sudo kill -9 $blzPid
-    sudo kill -9 $blzPid &> /dev/null
+    # SIGTERM: gunicorn graceful shutdown (수신 대기열 flush 후 종료)
+    echo sudo kill -TERM $blzPid
+    sudo kill -TERM $blzPid &> /dev/null
 fi
 
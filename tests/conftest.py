@@ -0,0 +1,72 @@
+"""
+dataServer 테스트 공통 설정
+
+dataServer 는 import 시 현재 디렉토리의 DB 를 초기화하므로 세션마다 임시 디렉토리로 옮겨 간 뒤
+import 한다. 운영 중인 기존 DB 와 같은 v1 테이블을 먼저 만들어 두어, 다른 프로세스에서 실행한
+CLI(partitions, migrate-schema) 결과를 실행 중인 서버가 반영하는지까지 한 세션에서 확인한다.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'bench'))
+
+from build_db import V1_TABLE  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def workdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('dataserver')
+    os.chdir(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def ds(workdir):
+    conn = sqlite3.connect('seoultel015.db')
+    conn.execute(V1_TABLE)
+    conn.close()
+    sys.path.insert(0, REPO_DIR)
+    import dataServer
+    yield dataServer
+    dataServer.stop_ingest_writer()
+
+
+@pytest.fixture
+def client(ds):
+    client = ds.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['username'] = 'admin'
+    return client
+
+
+@pytest.fixture
+def run_cli(workdir):
+    """다른 프로세스에서 flask --app dataServer <args> 실행 (같은 DB 디렉토리)"""
+    def run(*args):
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        return subprocess.run(
+            [sys.executable, '-m', 'flask', '--app', 'dataServer', *args],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        )
+    return run
+
+
+def make_record(timestamp, dev_eui, f_cnt, temperature=20.5):
+    """save_lorawan_batch 에 넣는 형태의 레코드"""
+    return {
+        'timestamp': timestamp.isoformat(),
+        'device_name': f'sensor-{dev_eui}',
+        'dev_eui': dev_eui,
+        'temperature': temperature,
+        'rssi': -90,
+        'snr': 7.5,
+        'f_port': 2,
+        'f_cnt': f_cnt
+    }
@@ -0,0 +1,29 @@
+import time
+from datetime import datetime
+
+
+def test_restart_counts_silence_from_last_seen_and_skips_reported(ds, workdir):
+    silent_after = 3600
+    now = time.time()
+    old = now - 5 * silent_after
+    last_seen = datetime.fromtimestamp(old).isoformat()
+
+    # 이전 실행의 기록: SILENT01 은 무응답 알림 발생 중, SILENT02 는 발생 후 해제
+    notifier = ds.FileNotifier(str(workdir / 'restart-alerts.ndjson'))
+    for dev_eui, state in [('SILENT01', 'firing'), ('SILENT02', 'firing'), ('SILENT02', 'resolved')]:
+        notifier.send({'type': 'silent', 'state': state, 'rule': 'silent', 'dev_eui': dev_eui,
+                       'silent_after': silent_after, 'last_seen': last_seen, 'time': last_seen})
+    reported = notifier.silent_alerts()
+    assert list(reported) == ['SILENT01']
+
+    engine = ds.AlertEngine([], silent_after)
+    engine.watch([
+        ('SILENT01', 'a', old),                      # 이미 알림: 다시 보내지 않음
+        ('SILENT02', 'b', old),                      # 해제 후 다시 무응답: 한 번 알림
+        ('RECENT01', 'c', now - silent_after / 2),   # 기한은 시작 시각이 아닌 마지막 수신부터
+    ], reported)
+    assert engine.check_silent(now) == 1
+    fired = {alert['dev_eui']: alert for alert in engine.active()}
+    assert set(fired) == {'SILENT01', 'SILENT02'} and fired['SILENT02']['last_seen'] == last_seen
+    assert engine.check_silent(now + silent_after) == 1
+    assert engine.check_silent(now + 10 * silent_after) == 0
@@ -0,0 +1,38 @@
+import json
+from datetime import datetime, timedelta
+
+
+def event(dev_eui, f_cnt, moment, **fields):
+    payload = {
+        'time': moment.isoformat() + 'Z',
+        'deviceInfo': {'deviceName': f'sensor-{dev_eui}', 'devEui': dev_eui},
+        'rxInfo': [{'rssi': -80, 'snr': 5.5}], 'object': {'temperature': 21}, 'fPort': 2, 'fCnt': f_cnt
+    }
+    for path, value in fields.items():
+        target = payload
+        *parents, name = path.split('.')
+        for parent in parents:
+            target = target[parent] if not parent.isdigit() else target[int(parent)]
+        target[name] = value
+    return payload
+
+
+def test_bad_events_are_rejected_individually(ds, client, run_cli, workdir):
+    start = datetime(2026, 9, 1)
+    events = [event('IMPORT02', i, start + timedelta(minutes=i)) for i in range(5)]
+    events[1] = event('IMPORT02', 1, start, **{'deviceInfo.deviceName': None})
+    events[2] = event('IMPORT02', 2, start, **{'rxInfo.0.snr': 'x'})
+    events[3] = event('IMPORT02', 3, start, **{'object.temperature': 'warm'})
+    body = '\n'.join(json.dumps(item) for item in events)
+
+    response = client.post('/uplink/batch', data=body)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result['received'], result['stored'], result['rejected']) == (5, 2, 3)
+    assert [error['line'] for error in result['errors']] == [2, 3, 4]
+
+    # 같은 입력을 CLI 로 가져와도 잘못된 이벤트만 거부 (나머지는 중복으로 걸러짐)
+    path = workdir / 'events.ndjson'
+    path.write_text(body)
+    output = run_cli('import-uplinks', str(path)).stdout
+    assert '거부 3건' in output
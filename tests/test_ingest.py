@@ -0,0 +1,71 @@
+import threading
+from datetime import datetime
+
+
+def uplink(dev_eui, f_cnt, temperature=21, snr=5):
+    return {
+        'deviceInfo': {'deviceName': f'sensor-{dev_eui}', 'devEui': dev_eui},
+        'rxInfo': [{'rssi': -80, 'snr': snr}], 'object': {'temperature': temperature}, 'fPort': 2, 'fCnt': f_cnt
+    }
+
+
+def stored_count(ds, dev_eui):
+    return ds.get_read_connection().execute(
+        'SELECT COUNT(*) FROM lorawan_data_all WHERE dev_eui = ?', (dev_eui,)
+    ).fetchone()[0]
+
+
+def test_non_numeric_values_are_rejected_before_queueing(ds, client):
+    assert client.post('/uplink?event=up', json=uplink('DECODE01', 1)).status_code == 200
+    response = client.post('/uplink?event=up', json=uplink('DECODE01', 2, snr='x'))
+    assert response.status_code == 400 and 'snr' in response.get_json()['error']
+    response = client.post('/uplink?event=up', json=uplink('DECODE01', 3, temperature='warm'))
+    assert response.status_code == 400 and 'temperature' in response.get_json()['error']
+    assert client.post('/uplink?event=up', json=uplink('DECODE01', 4)).status_code == 200
+    ds.flush_ingest_queue()
+    assert stored_count(ds, 'DECODE01') == 2
+
+
+def flush(ds, timeout=10):
+    """flush_ingest_queue() 가 timeout 안에 끝나는지 (writer 스레드가 멈추면 영원히 대기)"""
+    thread = threading.Thread(target=ds.flush_ingest_queue, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def record(dev_eui, f_cnt, **values):
+    return dict({
+        'timestamp': datetime.now().isoformat(), 'device_name': f'sensor-{dev_eui}', 'dev_eui': dev_eui,
+        'temperature': 20.5, 'rssi': -90, 'snr': 7.5, 'f_port': 2, 'f_cnt': f_cnt
+    }, **values)
+
+
+def test_poisoned_rows_do_not_drop_the_batch(ds):
+    dropped = ds.rows_dropped_total._values.get((), 0)
+    # 한 배치로 묶이도록 연달아 등록 (대기열 등록 = 수신 응답 200)
+    for i in range(10):
+        assert ds.enqueue_lorawan_data(record('POISON01', i))
+        if i == 4:
+            assert ds.enqueue_lorawan_data(record('POISON01', 100, device_name=None))
+            assert ds.enqueue_lorawan_data(record('POISON01', 101, temperature='x'))
+    assert flush(ds)
+    assert stored_count(ds, 'POISON01') == 10
+    assert ds.rows_dropped_total._values.get((), 0) == dropped + 2
+    stats = ds.get_statistics()
+    assert stats['total_count'] == ds.rebuild_statistics()['total_count']
+
+
+def test_writer_thread_survives_unexpected_errors(ds, monkeypatch):
+    def broken(batch):
+        raise RuntimeError('disk on fire')
+
+    monkeypatch.setattr(ds, 'save_lorawan_batch', broken)
+    assert ds.enqueue_lorawan_data(record('BROKEN01', 1))
+    assert flush(ds)
+    assert ds._ingest_thread.is_alive()
+
+    monkeypatch.undo()
+    assert ds.enqueue_lorawan_data(record('BROKEN01', 2))
+    assert flush(ds)
+    assert stored_count(ds, 'BROKEN01') == 1
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from conftest import make_record
+
+
+def test_reads_follow_partitions_moved_by_another_process(ds, client, run_cli):
+    # 지난 달 이전 데이터 3000건 (CLI 가 월별 파티션으로 옮길 대상)
+    start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(days=75)
+    ds.save_lorawan_batch([
+        make_record(start + timedelta(minutes=30 * i), 'PART0001', i) for i in range(3000)
+    ])
+    response = client.get('/download/export?format=csv&dev_eui=PART0001')
+    assert len(response.data.decode().splitlines()) == 3001
+
+    run_cli('partitions')
+
+    response = client.get('/download/export?format=csv&dev_eui=PART0001')
+    assert len(response.data.decode().splitlines()) == 3001
+    page = client.get('/api/records?dev_eui=PART0001&limit=1000').get_json()
+    assert page['count'] == 1000 and page['has_more']
+    assert ds._partitions
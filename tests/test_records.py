@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from werkzeug.datastructures import MultiDict
+
+from conftest import make_record
+
+
+def test_device_keyset_pages_read_in_id_order(ds, client):
+    now = datetime.now().replace(microsecond=0)
+    ds.save_lorawan_batch([
+        make_record(now - timedelta(seconds=300 - i), 'KEYSET01' if i % 3 else 'KEYSET02', i) for i in range(300)
+    ])
+    args = MultiDict({'dev_eui': 'KEYSET01', 'limit': '50'})
+    conditions, params, _ = ds._parse_record_filters(args)
+    sql, params = ds.select_records_sql(
+        ds.LORAWAN_COLUMNS, conditions + ['d.id < ?'], params + [10 ** 9], order='DESC', limit=51,
+        id_range=(None, 10 ** 9)
+    )
+    plan = [row[3] for row in ds.get_read_connection().execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+    assert not [step for step in plan if 'TEMP B-TREE' in step], plan
+
+    ids = []
+    before_id = None
+    while True:
+        query = '/api/records?dev_eui=KEYSET01&limit=50' + (f'&before_id={before_id}' if before_id else '')
+        page = client.get(query).get_json()
+        ids.extend(record['id'] for record in page['records'])
+        if not page['has_more']:
+            break
+        before_id = page['next_before_id']
+    assert len(ids) == 200 and ids == sorted(ids, reverse=True)
+
+
+def test_buffer_and_db_rows_match(ds, client):
+    # 디코더는 온도를 정수로 내보냄
+    response = client.post('/uplink?event=up', json={
+        'deviceInfo': {'deviceName': 'sensor-BUFFER01', 'devEui': 'BUFFER01'},
+        'rxInfo': [{'rssi': -80, 'snr': 5}], 'object': {'temperature': 21}, 'fPort': 2, 'fCnt': 1
+    })
+    assert response.status_code == 200
+    ds.flush_ingest_queue()
+
+    # 응답 캐시를 거치지 않도록 쿼리 문자열을 다르게
+    buffered = client.get('/api/data20?limit=20')
+    capacity = ds.recent_buffer.capacity
+    ds.recent_buffer.capacity = 0
+    try:
+        stored = client.get('/api/data20?limit=20&format=json')
+    finally:
+        ds.recent_buffer.capacity = capacity
+    assert buffered.data == stored.data
+    record = next(record for record in stored.get_json() if record['dev_eui'] == 'BUFFER01')
+    assert isinstance(record['temperature'], float) and isinstance(record['snr'], float)
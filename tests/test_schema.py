@@ -0,0 +1,53 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import make_record
+
+
+def test_reads_follow_schema_migrated_by_another_process(ds, client, run_cli):
+    now = datetime.now().replace(microsecond=0)
+    # 월별 파티션과 현재 파티션에 걸친 v1 데이터
+    ds.save_lorawan_batch([
+        make_record(now - timedelta(days=70) + timedelta(hours=i), 'SCHEMA01', i) for i in range(100)
+    ] + [make_record(now - timedelta(minutes=100 - i), 'SCHEMA01', 100 + i) for i in range(100)])
+    run_cli('partitions')
+    before = client.get('/api/records?dev_eui=SCHEMA01&limit=500').get_json()
+    assert before['count'] == 200
+    # 과거 데이터도 created_at 은 수신 시각(timestamp)이 아닌 저장한 시각
+    assert before['records'][-1]['created_at'][:10] != before['records'][-1]['timestamp'][:10]
+    assert ds.SCHEMA_VERSION == 1
+
+    run_cli('migrate-schema')
+
+    # 저장 없이 조회만으로 전환을 반영해야 함
+    after = client.get('/api/records?dev_eui=SCHEMA01&limit=500').get_json()
+    assert ds.SCHEMA_VERSION == 2
+    # created_at(UTC 저장 시각)까지 그대로 유지
+    assert after == before
+    response = client.get('/download/export?format=csv&dev_eui=SCHEMA01')
+    assert len(response.data.decode().splitlines()) == 201
+
+
+
+def test_created_at_is_utc_save_time(ds, client):
+    if ds.SCHEMA_VERSION < 2:
+        ds.migrate_schema()
+    saved = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    ds.save_lorawan_batch([make_record(datetime(2026, 1, 2, 3, 4, 5), 'CREATED1', 1)])
+    record = client.get('/api/records?dev_eui=CREATED1').get_json()['records'][0]
+    assert record['timestamp'] == '2026-01-02T03:04:05'
+    assert abs((datetime.fromisoformat(record['created_at']) - saved).total_seconds()) < 5
+
+
+def test_invalid_device_is_an_integrity_error(ds):
+    if ds.SCHEMA_VERSION < 2:
+        ds.migrate_schema()
+    record = make_record(datetime.now(), 'INVALID1', 1)
+    with pytest.raises(sqlite3.IntegrityError, match='잘못된 디바이스'):
+        ds.save_lorawan_batch([dict(record, device_name=None)])
+    with pytest.raises(sqlite3.IntegrityError, match='잘못된 timestamp'):
+        ds.save_lorawan_batch([dict(record, timestamp='yesterday')])
+    # 실패한 배치가 이후 저장을 막지 않음
+    assert ds.save_lorawan_batch([record])
@@ -0,0 +1,56 @@
+import os
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import make_record
+
+
+@pytest.fixture
+def writer(ds, monkeypatch, workdir):
+    """테스트 프로세스 안에서 writer 소켓 서버를 띄우고 읽기 워커 역할로 전환"""
+    path = os.path.join(workdir, 'test-writer.sock')
+    server = socketserver.ThreadingUnixStreamServer(path, ds._WriterRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(ds, 'WRITER_SOCKET', path)
+    monkeypatch.setattr(ds, 'PROCESS_ROLE', 'reader')
+    yield server
+    ds._close_writer_connection()
+    server.shutdown()
+    server.server_close()
+    os.unlink(path)
+
+
+def test_writer_command_error_is_passed_through(ds, client, writer, monkeypatch):
+    def fail(request):
+        raise RuntimeError('alert engine stopped')
+
+    monkeypatch.setitem(ds.WRITER_COMMANDS, 'alerts', fail)
+    response = client.get('/api/alerts')
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'alert engine stopped'}
+
+    # 같은 연결로 다음 명령이 계속 처리됨
+    monkeypatch.setitem(ds.WRITER_COMMANDS, 'alerts', lambda request: [])
+    assert client.get('/api/alerts').get_json() == {'count': 0, 'alerts': []}
+    with pytest.raises(ds.WriterError, match='알 수 없는 명령'):
+        ds.query_writer('missing')
+
+
+def test_import_waits_for_the_whole_batch(ds, writer, monkeypatch):
+    save_batch = ds._save_batch
+
+    def slow_save_batch(batch, live=True):
+        time.sleep(0.5)
+        return save_batch(batch, live)
+
+    monkeypatch.setattr(ds, '_save_batch', slow_save_batch)
+    monkeypatch.setattr(ds, 'WRITER_TIMEOUT', 0.2)
+    monkeypatch.setattr(ds, 'IMPORT_WRITER_TIMEOUT_PER_ROW', 0.01)
+    start = datetime(2026, 10, 1)
+    batch = [make_record(start + timedelta(seconds=i), 'IMPORT01', i) for i in range(100)]
+    assert ds._import_batch(batch) == (100, 0)